@@ -21,7 +21,9 @@ import time
 
 from datetime import datetime
 
-from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes, Array
+import numpy as np
+
+from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes
 from construct import Container
 
 import empower.managers.ranmanager.lvapp as lvapp
@@ -50,6 +52,7 @@ COUNTERS_ENTRY = Struct(
 )
 COUNTERS_ENTRY.name = "counters_entry"
 
+# the entries are decoded with numpy (see COUNTERS_ENTRIES)
 BIN_COUNTERS_RESPONSE = Struct(
     "version" / Int8ub,
     "type" / Int8ub,
@@ -60,10 +63,68 @@ BIN_COUNTERS_RESPONSE = Struct(
     "sta" / Bytes(6),
     "nb_tx" / Int16ub,
     "nb_rx" / Int16ub,
-    "stats" / Array(lambda ctx: ctx.nb_tx + ctx.nb_rx, COUNTERS_ENTRY),
+    "stats" / Bytes(lambda ctx: (ctx.nb_tx + ctx.nb_rx) *
+                    COUNTERS_ENTRY.sizeof()),
 )
 BIN_COUNTERS_RESPONSE.name = "bin_counters_response"
 
+# same layout as COUNTERS_ENTRY
+COUNTERS_ENTRIES = np.dtype([("size", ">u2"), ("count", ">u4")])
+
+
+def parse_bins(bins):
+    """Parse and validate a list of bins (or a comma separated string)."""
+
+    if isinstance(bins, str):
+        bins = [int(x) for x in bins.split(",")]
+
+    if not isinstance(bins, list):
+        raise ValueError("bins must be either a list of a string")
+
+    if [x for x in bins if isinstance(x, int)] != bins:
+        raise ValueError("bins values must be integers")
+
+    if sorted(bins) != bins:
+        raise ValueError("bins must be monotonically increasing")
+
+    if sorted(set(bins)) != sorted(bins):
+        raise ValueError("bins values must not contain duplicates")
+
+    if [x for x in bins if x > 0] != bins:
+        raise ValueError("bins values must be positive")
+
+    return bins
+
+
+def decode_counters(response):
+    """Return the TX and RX entries of a BIN_COUNTERS_RESPONSE."""
+
+    entries = np.frombuffer(response.stats, dtype=COUNTERS_ENTRIES)
+
+    return entries[:response.nb_tx], entries[response.nb_tx:]
+
+
+def bin_counters(entries, bins):
+    """Return the bytes and the packets per bin.
+
+    Each entry has format [ size, count ] where count is the number of
+    packets and size is the size-long (bytes, including the Ethernet 2
+    header) TX/RX by the LVAP. A packet falls in the first bin not smaller
+    than its size, larger packets are not counted.
+    """
+
+    index = np.searchsorted(bins, entries["size"], side="left")
+    valid = index < len(bins)
+
+    index = index[valid]
+    counts = entries["count"][valid].astype(np.float64)
+
+    nb_bytes = np.bincount(index, weights=counts * entries["size"][valid],
+                           minlength=len(bins))
+    nb_packets = np.bincount(index, weights=counts, minlength=len(bins))
+
+    return nb_bytes.astype(np.int64), nb_packets.astype(np.int64)
+
 
 class LVAPBinCounter(EWiFiApp):
     """LVAP Bin Counter Primitive.
@@ -95,7 +156,8 @@ class LVAPBinCounter(EWiFiApp):
                          every=every)
 
         # Register messages
-        lvapp.register_message(PT_BIN_COUNTERS_REQUEST, BIN_COUNTERS_REQUEST)
+        lvapp.register_message(PT_BIN_COUNTERS_REQUEST, BIN_COUNTERS_REQUEST,
+                               telemetry=True)
         lvapp.register_message(PT_BIN_COUNTERS_RESPONSE, BIN_COUNTERS_RESPONSE)
 
         # Data structures
@@ -141,25 +203,7 @@ class LVAPBinCounter(EWiFiApp):
     def bins(self, bins):
         """ Set the bins. Default is [ 8192 ]. """
 
-        if isinstance(bins, str):
-            bins = [int(x) for x in bins.split(",")]
-
-        if not isinstance(bins, list):
-            raise ValueError("bins must be either a list of a string")
-
-        if [x for x in bins if isinstance(x, int)] != bins:
-            raise ValueError("bins values must be integers")
-
-        if sorted(bins) != bins:
-            raise ValueError("bins must be monotonically increasing")
-
-        if sorted(set(bins)) != sorted(bins):
-            raise ValueError("bins values must not contain duplicates")
-
-        if [x for x in bins if x > 0] != bins:
-            raise ValueError("bins values must be positive")
-
-        self.params['bins'] = bins
+        self.params['bins'] = parse_bins(bins)
 
     def to_dict(self):
         """Return JSON-serializable representation of the object."""
@@ -187,56 +231,6 @@ class LVAPBinCounter(EWiFiApp):
                                          msg,
                                          self.handle_response)
 
-    def fill_bytes_samples(self, data):
-        """ Compute samples.
-
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
-
-        Each 2-tuple has format [ size, count ] where count is the number of
-        packets and size is the size-long (bytes, including the Ethernet 2
-        header) TX/RX by the LVAP.
-        """
-
-        samples = sorted(data, key=lambda entry: entry.size)
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if not entry:
-                continue
-            for i in range(0, len(self.bins)):
-                if entry.size <= self.bins[i]:
-                    out[i] = out[i] + entry.size * entry.count
-                    break
-
-        return out
-
-    def fill_packets_samples(self, data):
-        """Compute samples.
-
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
-
-        Each 2-tuple has format [ size, count ] where count is the number of
-        packets and size is the size-long (bytes, including the Ethernet 2
-        header) TX/RX by the LVAP.
-        """
-
-        samples = sorted(data, key=lambda entry: entry.size)
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if not entry:
-                continue
-            for i in range(0, len(self.bins)):
-                if entry.size <= self.bins[i]:
-                    out[i] = out[i] + entry.count
-                    break
-
-        return out
-
     @classmethod
     def update_stats(cls, delta, last, current):
         """Update stats."""
@@ -254,8 +248,7 @@ class LVAPBinCounter(EWiFiApp):
 
         # update this object
 
-        tx_samples = response.stats[0:response.nb_tx]
-        rx_samples = response.stats[response.nb_tx:-1]
+        tx_samples, rx_samples = decode_counters(response)
 
         old_tx_bytes = self.counters["tx_bytes"]
         old_rx_bytes = self.counters["rx_bytes"]
@@ -263,11 +256,14 @@ class LVAPBinCounter(EWiFiApp):
         old_tx_packets = self.counters["tx_packets"]
         old_rx_packets = self.counters["rx_packets"]
 
-        self.counters["tx_bytes"] = self.fill_bytes_samples(tx_samples)
-        self.counters["rx_bytes"] = self.fill_bytes_samples(rx_samples)
+        tx_bytes, tx_packets = bin_counters(tx_samples, self.bins)
+        rx_bytes, rx_packets = bin_counters(rx_samples, self.bins)
 
-        self.counters["tx_packets"] = self.fill_packets_samples(tx_samples)
-        self.counters["rx_packets"] = self.fill_packets_samples(rx_samples)
+        self.counters["tx_bytes"] = tx_bytes.tolist()
+        self.counters["rx_bytes"] = rx_bytes.tolist()
+
+        self.counters["tx_packets"] = tx_packets.tolist()
+        self.counters["rx_packets"] = rx_packets.tolist()
 
         self.counters["tx_bps"] = [0.0] * len(self.bins)
         self.counters["rx_bps"] = [0.0] * len(self.bins)
@@ -312,12 +308,9 @@ class LVAPBinCounter(EWiFiApp):
                 "rx_pps": self.counters["rx_pps"][idx]
             }
 
-            tags = dict(self.params)
-            tags["bin"] = self.bins[idx]
-
             sample = {
                 "measurement": self.name,
-                "tags": tags,
+                "tags": self.tags(bin=self.bins[idx]),
                 "time": timestamp,
                 "fields": fields
             }
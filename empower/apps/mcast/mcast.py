@@ -31,6 +31,7 @@ from empower.managers.ranmanager.lvapp.txpolicy import TX_MCAST_LEGACY
 from empower.managers.ranmanager.lvapp.txpolicy import TX_MCAST_DMS_H
 from empower.managers.ranmanager.lvapp.txpolicy import TX_MCAST_LEGACY_H
 from empower.managers.ranmanager.lvapp.resourcepool import BT_HT20
+from empower.workers.wifircstats.wifircstats import get_rc_stats
 
 TX_MCAST_SDNPLAY = 0x3
 TX_MCAST_SDNPLAY_H = "sdn@play"
@@ -188,6 +189,7 @@ class Mcast(EWiFiApp):
         super().__init__(context=context, service_id=service_id,
                          mcast_policy=mcast_policy, every=every)
 
+        self.rc_stats = None
         self.receptors = {}
         self.receptors_mcses = {}
         self.receptors_quality = {}
@@ -299,14 +301,18 @@ class Mcast(EWiFiApp):
     def handle_lvap_join(self, lvap):
         """Called when an LVAP joins a tenant."""
 
-        service = "empower.apps.wifircstats.wifircstats"
+        if not self.rc_stats:
+            self.rc_stats = get_rc_stats()
+
         self.receptors[lvap.addr] = \
-            self.register_service(service, sta=lvap.addr)
+            self.rc_stats.subscribe([lvap.addr], self.compute_receptor_mcs)
 
     def handle_lvap_leave(self, lvap):
         """Called when an LVAP leaves the network."""
 
         if lvap.addr in self.receptors:
+            self.rc_stats.unsubscribe(self.receptors[lvap.addr],
+                                      self.compute_receptor_mcs)
             del self.receptors[lvap.addr]
 
         if lvap.addr in self.receptors_mcses:
@@ -315,37 +321,45 @@ class Mcast(EWiFiApp):
         if lvap.addr in self.receptors_quality:
             del self.receptors_quality[lvap.addr]
 
-    def compute_receptors_mcs(self):
-        """New stats available."""
+    def stop(self):
+        """Stop the app and remove the RC stats subscriptions."""
+
+        for subscription in self.receptors.values():
+            self.rc_stats.unsubscribe(subscription, self.compute_receptor_mcs)
+
+        self.receptors = {}
+
+        super().stop()
+
+    def compute_receptor_mcs(self, sta):
+        """New stats available for a receptor."""
 
-        for rcstats in self.receptors.values():
+        rates = self.rc_stats.table.station(sta)
 
-            highest_prob = 0
+        if not rates:
+            return
 
-            sta = rcstats.sta
-            keys = [float(i) for i in rcstats.rates.keys()]
-            best_mcs = min(list(map(int, keys)))
+        highest_prob = 0
+        best_mcs = int(min(rates))
 
-            self.receptors_mcses[sta] = []
+        self.receptors_mcses[sta] = []
 
-            for mcs, stats in rcstats.rates.items():
-                if stats["prob"] >= self.prob_threshold:
-                    self.receptors_mcses[sta].append(int(float(mcs)))
-                elif stats["prob"] > highest_prob:
-                    best_mcs = int(float(mcs))
-                    highest_prob = stats["prob"]
+        for mcs, stats in rates.items():
+            if stats["prob"] >= self.prob_threshold:
+                self.receptors_mcses[sta].append(int(mcs))
+            elif stats["prob"] > highest_prob:
+                best_mcs = int(mcs)
+                highest_prob = stats["prob"]
 
-            if not self.receptors_mcses[sta]:
-                self.receptors_quality[sta] = False
-                self.receptors_mcses[sta].append(best_mcs)
-            else:
-                self.receptors_quality[sta] = True
+        if not self.receptors_mcses[sta]:
+            self.receptors_quality[sta] = False
+            self.receptors_mcses[sta].append(best_mcs)
+        else:
+            self.receptors_quality[sta] = True
 
     def calculate_group_mcs(self, group_receivers):
         """Compute group MCS magic."""
 
-        self.compute_receptors_mcs()
-
         if not self.receptors_mcses:
             return 0
 
@@ -100,7 +100,7 @@ class TXPBinCounter(EWiFiApp):
 
         # Register messages
         lvapp.register_message(PT_TXP_BIN_COUNTERS_REQUEST,
-                               TXP_BIN_COUNTERS_REQUEST)
+                               TXP_BIN_COUNTERS_REQUEST, telemetry=True)
 
         lvapp.register_message(PT_TXP_BIN_COUNTERS_RESPONSE,
                                TXP_BIN_COUNTERS_RESPONSE)
@@ -311,12 +311,9 @@ class TXPBinCounter(EWiFiApp):
                 "tx_pps": self.counters["tx_pps"][idx]
             }
 
-            tags = dict(self.params)
-            tags["bin"] = self.bins[idx]
-
             sample = {
                 "measurement": self.name,
-                "tags": tags,
+                "tags": self.tags(bin=self.bins[idx]),
                 "time": timestamp,
                 "fields": fields
             }
@@ -328,6 +328,9 @@ class UEMeasurements(ELTEApp):
                 "rsrq": self.rsrq,
             }
 
+            self.ue_measurements.update(user.imsi, user.cell, self.rsrp,
+                                        self.rsrq)
+
         # handle callbacks
         self.handle_callbacks()
 
@@ -29,6 +29,32 @@ MANIFEST = {
             "mandatory": False,
             "default": EVERY,
             "type": "int"
+        },
+        "hysteresis": {
+            "desc": "The minimum RSSI gain for a handover (in dB).",
+            "mandatory": False,
+            "default": 3,
+            "type": "int"
+        },
+        "max_load": {
+            "desc": "The maximum number of LVAPs per block (0: unlimited).",
+            "mandatory": False,
+            "default": 0,
+            "type": "int"
+        },
+        "window": {
+            "desc": "Smooth the RSSI over this time window (in s, 0: use "
+                    "the last report).",
+            "mandatory": False,
+            "default": 0,
+            "type": "int"
+        },
+        "max_handovers": {
+            "desc": "The maximum number of handovers per round "
+                    "(0: unlimited).",
+            "mandatory": False,
+            "default": 0,
+            "type": "int"
         }
     }
 }
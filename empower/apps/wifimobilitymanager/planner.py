@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Vectorized handover planner."""
+
+import numpy as np
+
+
+class HandoverPlanner:
+    """Vectorized handover planner.
+
+    Builds a stations x blocks RSSI matrix from the inverted UCQM and picks
+    the best block for every station in a single pass. A station is moved
+    only if the target block is not its current downlink block and if the
+    target RSSI exceeds the current one by at least the hysteresis margin.
+
+    Handovers are granted in order of decreasing RSSI gain. A station whose
+    best block is full (max_load) falls back to the next best block still
+    satisfying the hysteresis margin. At most max_handovers are granted per
+    round.
+
+    Attributes:
+        hysteresis: the hysteresis margin (in dB)
+        max_load: the maximum number of LVAPs per block (0 means unlimited)
+        max_handovers: the maximum handovers per round (0 means unlimited)
+    """
+
+    def __init__(self, hysteresis=0, max_load=0, max_handovers=0):
+
+        self.hysteresis = hysteresis
+        self.max_load = max_load
+        self.max_handovers = max_handovers
+
+    def matrix(self, lvaps, ucqm):
+        """Return the RSSI matrix, the blocks, and the current blocks.
+
+        Unheard (station, block) pairs are set to -inf. The current block of
+        a station is -1 if its downlink block is not in the matrix.
+        """
+
+        columns = {}
+        blocks = []
+
+        for lvap in lvaps:
+            for _, block in ucqm.get(lvap.addr, {}).values():
+                if block not in columns:
+                    columns[block] = len(blocks)
+                    blocks.append(block)
+
+        for lvap in lvaps:
+            if lvap.downlink not in columns:
+                columns[lvap.downlink] = len(blocks)
+                blocks.append(lvap.downlink)
+
+        rssi = np.full((len(lvaps), len(blocks)), -np.inf)
+        current = np.empty(len(lvaps), dtype=np.intp)
+
+        for row, lvap in enumerate(lvaps):
+
+            for value, block in ucqm.get(lvap.addr, {}).values():
+                rssi[row, columns[block]] = value
+
+            current[row] = columns[lvap.downlink]
+
+        return rssi, blocks, current
+
+    def plan(self, lvaps, ucqm, load=None):
+        """Return the handovers as a list of (lvap, block) tuples.
+
+        Args:
+            lvaps: the LVAPs to plan for (all with a downlink block)
+            ucqm: the inverted UCQM (station -> {key -> (rssi, block)})
+            load: the LVAPs on each block, including the ones that are not
+                planned for (block -> count, default: count lvaps)
+        """
+
+        lvaps = list(lvaps)
+
+        if not lvaps:
+            return []
+
+        rssi, blocks, current = self.matrix(lvaps, ucqm)
+
+        rows = np.arange(len(lvaps))
+
+        best = np.argmax(rssi, axis=1)
+        best_rssi = rssi[rows, best]
+        threshold = rssi[rows, current] + self.hysteresis
+
+        candidates = np.flatnonzero((best != current) &
+                                    np.isfinite(best_rssi) &
+                                    (best_rssi > threshold))
+
+        if not candidates.size:
+            return []
+
+        gain = best_rssi[candidates] - rssi[candidates, current[candidates]]
+        candidates = candidates[np.argsort(-gain, kind="stable")]
+
+        if not self.max_load:
+
+            if self.max_handovers:
+                candidates = candidates[:self.max_handovers]
+
+            return [(lvaps[row], blocks[best[row]]) for row in candidates]
+
+        if load is None:
+            load = np.bincount(current, minlength=len(blocks))
+        else:
+            load = np.array([load.get(block, 0) for block in blocks])
+
+        handovers = []
+
+        for row in candidates:
+
+            if self.max_handovers and len(handovers) >= self.max_handovers:
+                break
+
+            order = np.argsort(-rssi[row], kind="stable")
+            order = order[rssi[row, order] > threshold[row]]
+            order = order[load[order] < self.max_load]
+
+            if not order.size:
+                continue
+
+            target = order[0]
+
+            load[current[row]] -= 1
+            load[target] += 1
+
+            handovers.append((lvaps[row], blocks[target]))
+
+        return handovers
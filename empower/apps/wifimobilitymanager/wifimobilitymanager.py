@@ -17,42 +17,185 @@
 
 """A simple Wi-Fi mobility manager."""
 
+from collections import Counter
+
 from empower_core.app import EVERY
 
+from empower_core.launcher import srv_or_die
+
 from empower.managers.ranmanager.lvapp.wifiapp import EWiFiApp
+from empower.apps.wifimobilitymanager.planner import HandoverPlanner
 
 
 class WiFiMobilityManager(EWiFiApp):
     """A simple Wi-Fi mobility manager.
 
     This app will peridodically handover every LVAP in the network to the
-    interface with the highest RSSI.
+    interface with the highest RSSI. LVAPs are moved only if the RSSI gain is
+    above the hysteresis margin and if the target block is not full.
 
     Parameters:
         service_id: the application id as an UUID (mandatory)
         project_id: the project id as an UUID (mandatory)
         every: the loop period in ms (optional, default 2000ms)
+        hysteresis: the minimum RSSI gain in dB (optional, default 3)
+        max_load: the maximum LVAPs per block (optional, default 0, i.e. no
+            limit)
+        max_handovers: the maximum handovers per round (optional, default 0,
+            i.e. no limit)
+        window: use the RSSI EWMA over this time window in s (optional,
+            default 0, i.e. use the last report)
 
     Example:
         POST /api/v1/projects/52313ecb-9d00-4b7d-b873-b55d3d9ada26/apps
         {
             "name": "empower.apps.wifimobilitymanager.wifimobilitymanager",
             "params": {
-                "every": 2000
+                "every": 2000,
+                "hysteresis": 3,
+                "max_load": 10,
+                "max_handovers": 5
             }
         }
     """
 
+    def __init__(self, context, service_id, hysteresis, max_load,
+                 max_handovers, window, every=EVERY):
+
+        super().__init__(context=context,
+                         service_id=service_id,
+                         hysteresis=hysteresis,
+                         max_load=max_load,
+                         max_handovers=max_handovers,
+                         window=window,
+                         every=every)
+
+    @property
+    def hysteresis(self):
+        """Return the hysteresis margin."""
+
+        return self.params['hysteresis']
+
+    @hysteresis.setter
+    def hysteresis(self, hysteresis):
+        """Set the hysteresis margin."""
+
+        self.params['hysteresis'] = int(hysteresis)
+
+    @property
+    def max_load(self):
+        """Return the maximum number of LVAPs per block."""
+
+        return self.params['max_load']
+
+    @max_load.setter
+    def max_load(self, max_load):
+        """Set the maximum number of LVAPs per block."""
+
+        self.params['max_load'] = int(max_load)
+
+    @property
+    def max_handovers(self):
+        """Return the maximum number of handovers per round."""
+
+        return self.params['max_handovers']
+
+    @max_handovers.setter
+    def max_handovers(self, max_handovers):
+        """Set the maximum number of handovers per round."""
+
+        self.params['max_handovers'] = int(max_handovers)
+
+    @property
+    def window(self):
+        """Return the RSSI smoothing window."""
+
+        return self.params['window']
+
+    @window.setter
+    def window(self, window):
+        """Set the RSSI smoothing window."""
+
+        self.params['window'] = int(window)
+
+    def ucqm(self, lvaps):
+        """Return the inverted UCQM for the LVAPs.
+
+        If a window is set the RSSI is the EWMA of the reports received in
+        the window.
+        """
+
+        lvappmanager = srv_or_die("lvappmanager")
+
+        if not self.window:
+            return lvappmanager.blocks.ucqm
+
+        ucqm = {}
+
+        for lvap in lvaps:
+
+            ucqm[lvap.addr] = {}
+
+            for key, (rssi, block) in \
+                    lvappmanager.blocks.ucqm.get(lvap.addr, {}).items():
+
+                smoothed = lvappmanager.stats.query("ucqm.mov_rssi",
+                                                    key + (lvap.addr,),
+                                                    "ewma", self.window)
+
+                ucqm[lvap.addr][key] = \
+                    (rssi if smoothed is None else smoothed, block)
+
+        return ucqm
+
+    def load(self):
+        """Return the number of LVAPs on each block, in all the projects.
+
+        LVAPs with a handover in progress are counted on both blocks.
+        """
+
+        load = Counter()
+
+        for lvap in srv_or_die("lvappmanager").lvaps.values():
+
+            if lvap.downlink:
+                load[lvap.downlink] += 1
+
+            if lvap.target_blocks and \
+                    lvap.target_blocks[0] != lvap.downlink:
+                load[lvap.target_blocks[0]] += 1
+
+        return load
+
     def loop(self):
         """Periodic job."""
 
-        for lvap in self.lvaps.values():
-            lvap.blocks = self.blocks().sort_by_rssi(lvap.addr).first()
+        # LVAPs with a handover in progress cannot be moved
+        lvaps = [lvap for lvap in self.lvaps.values()
+                 if lvap.is_running() and not lvap.pending and lvap.downlink]
+
+        planner = HandoverPlanner(hysteresis=self.hysteresis,
+                                  max_load=self.max_load,
+                                  max_handovers=self.max_handovers)
+
+        ucqm = self.ucqm(lvaps)
+
+        # the plan is computed first since moving an LVAP can change its
+        # SSID, i.e. its project
+        load = self.load() if self.max_load else None
+
+        for lvap, block in planner.plan(lvaps, ucqm, load):
+            lvap.blocks = block
 
 
-def launch(context, service_id, every=EVERY):
+def launch(context, service_id, hysteresis=3, max_load=0, max_handovers=0,
+           window=0, every=EVERY):
     """ Initialize the module. """
 
     return WiFiMobilityManager(context=context,
                                service_id=service_id,
+                               hysteresis=hysteresis,
+                               max_load=max_load,
+                               max_handovers=max_handovers,
+                               window=window,
                                every=every)
@@ -19,12 +19,15 @@
 
 from datetime import datetime
 
-from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes, Array
+import numpy as np
+
+from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes
 from construct import Container
 
 import empower.managers.ranmanager.lvapp as lvapp
 
 from empower_core.etheraddress import EtherAddress
+from empower_core.launcher import srv_or_die
 from empower.managers.ranmanager.lvapp.wifiapp import EWiFiApp
 from empower_core.app import EVERY
 
@@ -55,6 +58,7 @@ RC_ENTRY = Struct(
 )
 RC_ENTRY.name = "rc_entry"
 
+# the entries are decoded with numpy (see RC_ENTRIES)
 WIFI_RC_STATS_RESPONSE = Struct(
     "version" / Int8ub,
     "type" / Int8ub,
@@ -65,10 +69,44 @@ WIFI_RC_STATS_RESPONSE = Struct(
     "iface_id" / Int32ub,
     "sta" / Bytes(6),
     "nb_entries" / Int16ub,
-    "stats" / Array(lambda ctx: ctx.nb_entries, RC_ENTRY),
+    "stats" / Bytes(lambda ctx: ctx.nb_entries * RC_ENTRY.sizeof()),
 )
 WIFI_RC_STATS_RESPONSE.name = "wifi_rc_stats_response"
 
+# same layout as RC_ENTRY
+RC_ENTRIES = np.dtype([("rate", "u1"), ("prob", ">u4"), ("cur_prob", ">u4"),
+                       ("cur_tp", ">u4"), ("last_attempts", ">u4"),
+                       ("last_successes", ">u4"), ("hist_attempts", ">u4"),
+                       ("hist_successes", ">u4")])
+
+# the fields of the decoded statistics, in this order
+RC_FIELDS = ("prob", "cur_prob", "cur_tp", "last_attempts", "last_successes",
+             "hist_attempts", "hist_successes")
+
+
+def decode_rc_stats(response, ht_caps):
+    """Return the rates and the statistics of a WIFI_RC_STATS_RESPONSE.
+
+    Rates are MCS indexes for HT stations and Mbps otherwise. Statistics
+    are returned as a (field, rate) array (see RC_FIELDS), probabilities
+    are in percent.
+    """
+
+    entries = np.frombuffer(response.stats, dtype=RC_ENTRIES)
+
+    if ht_caps:
+        rates = entries["rate"].astype(np.int64)
+    else:
+        rates = entries["rate"] / 2.0
+
+    stats = np.array([entries[field] for field in RC_FIELDS],
+                     dtype=np.float64).reshape(len(RC_FIELDS), -1)
+
+    stats[0:2] /= 180.0
+    stats[2] /= (18000 << 10) / 96 * 10
+
+    return rates, stats
+
 
 class RCStats(EWiFiApp):
     """WiFi Rate Control Statistics Primitive.
@@ -99,7 +137,7 @@ class RCStats(EWiFiApp):
 
         # Register messages
         lvapp.register_message(PT_WIFI_RC_STATS_REQUEST,
-                               WIFI_RC_STATS_REQUEST)
+                               WIFI_RC_STATS_REQUEST, telemetry=True)
         lvapp.register_message(PT_WIFI_RC_STATS_RESPONSE,
                                WIFI_RC_STATS_RESPONSE)
 
@@ -156,51 +194,40 @@ class RCStats(EWiFiApp):
         """Handle WIFI_RC_STATS_RESPONSE message."""
 
         lvap = self.context.lvaps[self.sta]
+        stats = srv_or_die("lvappmanager").stats
+
+        rates, fields = decode_rc_stats(response, lvap.ht_caps)
 
         # update this object
-        self.rates = {}
-        self.best_prob = None
-        self.best_tp = None
+        self.rates = {rate: dict(zip(RC_FIELDS, values))
+                      for rate, values in zip(rates.tolist(),
+                                              fields.T.tolist())}
+
+        if rates.size:
+            self.best_prob = rates[fields[0].argmax()].item()
+            self.best_tp = rates[fields[2].argmax()].item()
+        else:
+            self.best_prob = None
+            self.best_tp = None
 
         # generate data points
         points = []
         timestamp = datetime.utcnow()
 
-        for entry in response.stats:
+        for rate, values in self.rates.items():
 
-            rate = entry.rate if lvap.ht_caps else entry.rate / 2.0
-
-            fields = {
-                'prob': entry.prob / 180.0,
-                'cur_prob': entry.cur_prob / 180.0,
-                'cur_tp': entry.cur_tp / ((18000 << 10) / 96) / 10,
-                'last_attempts': entry.last_attempts,
-                'last_successes': entry.last_successes,
-                'hist_attempts': entry.hist_attempts,
-                'hist_successes': entry.hist_successes,
-            }
-
-            tags = dict(self.params)
-            tags["rate"] = rate
-
-            self.rates[rate] = fields
+            stats.append("rc.prob", (self.sta, rate), values['prob'])
+            stats.append("rc.cur_tp", (self.sta, rate), values['cur_tp'])
 
             sample = {
                 "measurement": self.name,
-                "tags": tags,
+                "tags": self.tags(rate=rate),
                 "time": timestamp,
-                "fields": fields
+                "fields": values
             }
 
             points.append(sample)
 
-        # compute statistics
-        self.best_prob = \
-            max(self.rates.keys(), key=(lambda key: self.rates[key]['prob']))
-
-        self.best_tp = \
-            max(self.rates.keys(), key=(lambda key: self.rates[key]['cur_tp']))
-
         # save to db
         self.write_points(points)
 
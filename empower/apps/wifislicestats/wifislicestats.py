@@ -98,7 +98,7 @@ class SliceStats(EWiFiApp):
 
         # Register messages
         lvapp.register_message(PT_WIFI_SLICE_STATS_REQUEST,
-                               WIFI_SLICE_STATS_REQUEST)
+                               WIFI_SLICE_STATS_REQUEST, telemetry=True)
         lvapp.register_message(PT_WIFI_SLICE_STATS_RESPONSE,
                                WIFI_SLICE_STATS_RESPONSE)
 
@@ -171,13 +171,9 @@ class SliceStats(EWiFiApp):
                 'tx_bytes': entry.tx_bytes,
             }
 
-            tags = dict(self.params)
-            tags["wtp"] = wtp
-            tags["iface_id"] = entry.iface_id
-
             sample = {
                 "measurement": self.name,
-                "tags": tags,
+                "tags": self.tags(wtp=wtp, iface_id=entry.iface_id),
                 "time": timestamp,
                 "fields": self.stats[wtp][entry.iface_id]
             }
@@ -48,6 +48,9 @@ T_STA_SCHED_TYPES = [T_STA_SCHED_RR, T_STA_SCHED_DRR, T_STA_SCHED_ADRR]
 T_UE_SCHED_RR = 0
 T_UE_SCHED_TYPES = [T_UE_SCHED_RR]
 
+# The BSSIDs cache is flushed when it grows above this size
+BSSID_CACHE_SIZE = 4096
+
 
 class ACLDictField(fields.DictField):
     """A field that stores a regular Python dictionary."""
@@ -284,6 +287,9 @@ class EmpowerProject(Env):
         # Save pointer to ProjectManager
         self.manager = srv_or_die("projectsmanager")
 
+        # Generated BSSIDs (mac -> bssid)
+        self.bssids = {}
+
     @property
     def vbses(self):
         """Return the VBSes."""
@@ -298,39 +304,33 @@ class EmpowerProject(Env):
 
     @property
     def users(self):
-        """Return the UEs."""
+        """Return the UEs (read-only live view)."""
 
         if not self.lte_props:
             return {}
 
-        users = {k: v for k, v in srv_or_die("vbspmanager").users.items()
-                 if v.plmnid == self.lte_props.plmnid}
-
-        return users
+        return srv_or_die("vbspmanager").users.view("plmnid",
+                                                  self.lte_props.plmnid)
 
     @property
     def lvaps(self):
-        """Return the LVAPs."""
+        """Return the LVAPs (read-only live view)."""
 
         if not self.wifi_props:
             return {}
 
-        lvaps = {k: v for k, v in srv_or_die("lvappmanager").lvaps.items()
-                 if v.ssid == self.wifi_props.ssid}
-
-        return lvaps
+        return srv_or_die("lvappmanager").lvaps.view("ssid",
+                                                  self.wifi_props.ssid)
 
     @property
     def vaps(self):
-        """Return the VAPs."""
+        """Return the VAPs (read-only live view)."""
 
         if not self.wifi_props:
             return {}
 
-        vaps = {k: v for k, v in srv_or_die("lvappmanager").vaps.items()
-                if v.ssid == self.wifi_props.ssid}
-
-        return vaps
+        return srv_or_die("lvappmanager").vaps.view("ssid",
+                                                 self.wifi_props.ssid)
 
     def load_service(self, service_id, name, params):
         """Load a service instance."""
@@ -352,19 +352,26 @@ class EmpowerProject(Env):
 
         self.save()
 
+        self.manager.index_acl(self, acl.addr)
+
         return acl
 
     def remove_acl(self, addr=None):
         """Upsert new slice."""
 
         if addr:
-            del self.wifi_props.allowed[str(addr)]
+            removed = [str(addr)]
         else:
-            for k in list(self.wifi_props.allowed.keys()):
-                del self.wifi_props.allowed[k]
+            removed = list(self.wifi_props.allowed.keys())
+
+        for k in removed:
+            del self.wifi_props.allowed[k]
 
         self.save()
 
+        for k in removed:
+            self.manager.unindex_acl(self, k)
+
     def upsert_wifi_slice(self, **kwargs):
         """Upsert new slice."""
 
@@ -460,14 +467,30 @@ class EmpowerProject(Env):
         tokens = [self.project_id.hex[0:12][i:i + 2] for i in range(0, 12, 2)]
         return EtherAddress(':'.join(tokens))
 
+    @property
+    def bssid_prefix(self):
+        """Return the first three octets of the BSSIDs of this project.
+
+        This is the tenant prefix with the multicast bit cleared.
+        """
+
+        prefix = self.project_id.bytes
+
+        return bytes([prefix[0] & 0xFE, prefix[1], prefix[2]])
+
     def generate_bssid(self, mac):
         """ Generate a new BSSID address. """
 
-        base_mac = self.get_prefix()
+        if mac in self.bssids:
+            return self.bssids[mac]
+
+        if len(self.bssids) >= BSSID_CACHE_SIZE:
+            self.bssids.clear()
+
+        # the BSSID prefix followed by the last three octets of mac
+        suffix = EtherAddress(mac).to_raw()
+        bssid = EtherAddress(self.bssid_prefix + suffix[3:6])
 
-        base = str(base_mac).split(":")[0:3]
-        unicast_addr_mask = int(base[0], 16) & 0xFE
-        base[0] = str(format(unicast_addr_mask, 'X'))
-        suffix = str(mac).split(":")[3:6]
+        self.bssids[mac] = bssid
 
-        return EtherAddress(":".join(base + suffix))
+        return bssid
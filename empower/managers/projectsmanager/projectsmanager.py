@@ -19,6 +19,8 @@
 
 from pymodm.errors import ValidationError
 
+from empower_core.etheraddress import EtherAddress
+from empower_core.launcher import srv_or_die
 from empower_core.projectsmanager.projectsmanager import ProjectsManager
 
 from empower_core.projectsmanager.appcallbackhandler import \
@@ -45,7 +47,13 @@ from empower.managers.projectsmanager.projectsusershandler import \
 
 
 class EmpowerProjectsManager(ProjectsManager):
-    """Projects manager."""
+    """Projects manager.
+
+    Projects are indexed by SSID, by PLMNID, by BSSID prefix (unique BSSID
+    projects only), and by the stations in their ACLs. The indexes are
+    updated every time a project is created, updated, or removed and every
+    time its ACL is modified.
+    """
 
     HANDLERS = [CatalogHandler, AppsHandler, ProjectsLVAPsHandler,
                 ProjectsHandler, ProjectsWiFiACLHandler,
@@ -54,44 +62,146 @@ class EmpowerProjectsManager(ProjectsManager):
 
     PROJECT_IMPL = EmpowerProject
 
-    def load_project_by_ssid(self, ssid):
-        """Find a project by SSID."""
+    def __init__(self, context, service_id, catalog_packages):
+
+        super().__init__(context=context, service_id=service_id,
+                         catalog_packages=catalog_packages)
+
+        # SSID -> project and PLMNID -> project
+        self.projects_by_ssid = {}
+        self.projects_by_plmnid = {}
+
+        # station -> projects whose ACL includes the station
+        # (project_id -> project)
+        self.projects_by_sta = {}
+
+        # BSSID prefix -> unique BSSID projects (project_id -> project)
+        self.projects_by_prefix = {}
+
+    def start(self):
+        """Start projects manager."""
+
+        super().start()
 
         for project in self.projects.values():
-            if not project.wifi_props:
+            self.add_to_indexes(project)
+
+    def add_to_indexes(self, project):
+        """Add a project to the SSID, PLMNID, and ACL indexes."""
+
+        if project.wifi_props:
+
+            self.projects_by_ssid[project.wifi_props.ssid] = project
+
+            for addr in project.wifi_props.allowed:
+                self.index_acl(project, addr)
+
+            if project.wifi_props.bssid_type == T_BSSID_TYPE_UNIQUE:
+                prefix = project.bssid_prefix
+                if prefix not in self.projects_by_prefix:
+                    self.projects_by_prefix[prefix] = {}
+                self.projects_by_prefix[prefix][project.project_id] = project
+
+        if project.lte_props:
+            self.projects_by_plmnid[project.lte_props.plmnid] = project
+
+    def remove_from_indexes(self, project):
+        """Remove a project from the SSID, PLMNID, and ACL indexes."""
+
+        for index in (self.projects_by_ssid, self.projects_by_plmnid):
+            for key in [k for k, v in index.items() if v is project]:
+                del index[key]
+
+        if project.wifi_props:
+
+            for addr in project.wifi_props.allowed:
+                self.unindex_acl(project, addr)
+
+            projects = self.projects_by_prefix.get(project.bssid_prefix, {})
+            projects.pop(project.project_id, None)
+
+            if not projects:
+                self.projects_by_prefix.pop(project.bssid_prefix, None)
+
+        # another project may be using the same SSID or PLMNID
+        for other in self.projects.values():
+
+            if other is project:
                 continue
-            if project.wifi_props.ssid == ssid:
-                break
-        else:
-            project = None
 
-        return project
+            if other.wifi_props:
+                self.projects_by_ssid.setdefault(other.wifi_props.ssid, other)
+
+            if other.lte_props:
+                self.projects_by_plmnid.setdefault(other.lte_props.plmnid,
+                                                   other)
+
+    def index_acl(self, project, addr):
+        """Add a station to the ACL index of a project."""
+
+        sta = EtherAddress(addr)
+
+        if sta not in self.projects_by_sta:
+            self.projects_by_sta[sta] = {}
+
+        self.projects_by_sta[sta][project.project_id] = project
+
+    def unindex_acl(self, project, addr):
+        """Remove a station from the ACL index of a project."""
+
+        sta = EtherAddress(addr)
+        projects = self.projects_by_sta.get(sta)
+
+        if not projects:
+            return
+
+        projects.pop(project.project_id, None)
+
+        if not projects:
+            del self.projects_by_sta[sta]
+
+    def load_project_by_ssid(self, ssid):
+        """Find a project by SSID."""
+
+        return self.projects_by_ssid.get(ssid)
 
     def load_project_by_plmnid(self, plmnid):
         """Find a project by PLMNID."""
 
-        for project in self.projects.values():
-            if not project.lte_props:
-                continue
-            if project.lte_props.plmnid == plmnid:
-                break
-        else:
-            project = None
+        return self.projects_by_plmnid.get(plmnid)
 
-        return project
+    def load_projects_by_bssid(self, bssid, sta):
+        """Return the projects that can serve sta on the specified BSSID.
+
+        Unique BSSIDs are generated from the project prefix and the station
+        address, so they are resolved through the prefix index. Shared BSSIDs
+        are the BSSIDs of the VAPs, which carry the SSID of their project.
+        Unique BSSID projects are returned first.
+        """
+
+        projects = []
+
+        raw = bssid.to_raw()
+
+        if raw[3:6] == sta.to_raw()[3:6]:
+            projects.extend(self.projects_by_prefix.get(raw[0:3], {}).values())
+
+        vap = srv_or_die("lvappmanager").vaps.get(bssid)
+
+        if vap:
+            project = self.projects_by_ssid.get(vap.ssid)
+            if project and \
+                    project.wifi_props.bssid_type == T_BSSID_TYPE_SHARED:
+                projects.append(project)
+
+        return projects
 
     def get_available_ssids(self, sta, block):
         """Return the list of available networks for the specified sta."""
 
         networks = list()
 
-        for project in self.projects.values():
-
-            if not project.wifi_props:
-                continue
-
-            if str(sta) not in project.wifi_props.allowed:
-                continue
+        for project in self.projects_by_sta.get(sta, {}).values():
 
             if project.wifi_props.bssid_type == T_BSSID_TYPE_SHARED:
 
@@ -130,6 +240,8 @@ class EmpowerProjectsManager(ProjectsManager):
             project.upsert_wifi_slice(slice_id=0)
             project.upsert_lte_slice(slice_id=0)
 
+            self.add_to_indexes(project)
+
         except ValueError as ex:
             self.remove(project.project_id)
             raise ValueError(ex)
@@ -140,6 +252,16 @@ class EmpowerProjectsManager(ProjectsManager):
 
         return self.projects[project_id]
 
+    def update(self, project_id, desc):
+        """Update project."""
+
+        project = super().update(project_id=project_id, desc=desc)
+
+        self.remove_from_indexes(project)
+        self.add_to_indexes(project)
+
+        return project
+
     def remove(self, project_id):
         """Remove project."""
 
@@ -159,6 +281,7 @@ class EmpowerProjectsManager(ProjectsManager):
 
             # Reset the LVAP
             del lvap.wtp.connection.manager.lvaps[lvap.addr]
+            lvap.wtp.connection.manager.stats.remove_entities(lvap.addr)
             lvap.clear_blocks()
 
         # Remove hosted UEs
@@ -170,6 +293,7 @@ class EmpowerProjectsManager(ProjectsManager):
 
             # Reset the LVAP
             del user.vbs.connection.manager.users[user.imsi]
+            user.vbs.connection.manager.stats.remove_entities(user.imsi)
 
         # Remove hosted VAPs
         for vap in list(project.vaps.values()):
@@ -179,6 +303,7 @@ class EmpowerProjectsManager(ProjectsManager):
             vap.clear_block()
 
         # Remove project
+        self.remove_from_indexes(project)
         super().remove(project_id)
 
 
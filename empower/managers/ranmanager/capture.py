@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound messages capture."""
+
+import os
+import mmap
+import logging
+import struct
+import time
+
+from collections import namedtuple
+
+# File header: magic and protocol name
+MAGIC = b"EMPCAP01"
+FILE_HEADER_FMT = struct.Struct(">8s16s")
+
+# Record header: timestamp, direction, device, message length
+RECORD_FMT = struct.Struct(">dB6sI")
+
+INBOUND = 0
+OUTBOUND = 1
+
+Record = namedtuple("Record", "ts direction device data")
+
+
+class CaptureWriter:
+    """Append-only southbound capture file.
+
+    Existing files are appended to only if they are captures of the same
+    protocol.
+
+    The file starts with a fixed header (magic and protocol name) followed by
+    one record per framed message. Each record is a fixed size header
+    (timestamp, direction, device address, message length) followed by the
+    message exactly as it was sent or received.
+
+    Attributes:
+        path: the capture file
+        proto: the protocol module (lvapp, vbsp)
+        records: the number of records written
+    """
+
+    def __init__(self, path, proto):
+
+        self.path = path
+        self.proto = proto
+        self.records = 0
+        self.log = logging.getLogger(self.__class__.__module__)
+
+        name = proto.__name__.split(".")[-1].encode()
+
+        if os.path.exists(path) and os.path.getsize(path):
+            self.file = open(path, "r+b")
+            self.seek_end(name)
+        else:
+            self.file = open(path, "wb")
+            self.file.write(FILE_HEADER_FMT.pack(MAGIC, name))
+
+        self.hdr_len = proto.HEADER_FMT.size
+
+    def seek_end(self, name):
+        """Move to the end of the last complete record of an existing file.
+
+        Raise ValueError if the file is not a capture of the protocol name.
+        A truncated last record (e.g. the controller has been killed) is
+        dropped.
+        """
+
+        size = os.fstat(self.file.fileno()).st_size
+        header = self.file.read(FILE_HEADER_FMT.size)
+
+        if len(header) == FILE_HEADER_FMT.size:
+            magic, proto = FILE_HEADER_FMT.unpack(header)
+        else:
+            magic, proto = None, None
+
+        if magic != MAGIC or proto.rstrip(b"\0") != name:
+            self.file.close()
+            raise ValueError("%s is not a %s capture file" %
+                             (self.path, name.decode()))
+
+        offset = FILE_HEADER_FMT.size
+
+        while offset + RECORD_FMT.size <= size:
+
+            self.file.seek(offset)
+            length = RECORD_FMT.unpack(self.file.read(RECORD_FMT.size))[3]
+
+            if offset + RECORD_FMT.size + length > size:
+                break
+
+            offset += RECORD_FMT.size + length
+
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def record(self, direction, device, data):
+        """Append a message."""
+
+        self.file.write(RECORD_FMT.pack(time.time(), direction, device,
+                                        len(data)))
+        self.file.write(data)
+        self.records += 1
+
+    def record_stream(self, direction, data):
+        """Append all the messages in data (a sequence of framed messages).
+
+        If a message has an invalid length the rest of data is appended as
+        a single record.
+        """
+
+        offset = 0
+        device = bytes(6)
+
+        while offset + self.hdr_len <= len(data):
+
+            hdr = self.proto.decode_header(data[offset:])
+            device = hdr.device
+
+            if hdr.length < self.hdr_len or offset + hdr.length > len(data):
+                self.log.warning("Invalid message length %u at offset %u",
+                                 hdr.length, offset)
+                break
+
+            self.record(direction, device, data[offset:offset + hdr.length])
+            offset += hdr.length
+
+        if offset < len(data):
+            self.record(direction, device, data[offset:])
+
+    def close(self):
+        """Flush and close the file."""
+
+        self.file.close()
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {
+            "path": self.path,
+            "records": self.records
+        }
+
+
+class CaptureReader:
+    """Read a southbound capture file.
+
+    The file is memory mapped, the data field of the returned records is a
+    copy of the message so the reader can be closed while they are in use.
+
+    Attributes:
+        path: the capture file
+        proto: the protocol name (lvapp, vbsp)
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+
+        with open(path, "rb") as capture:
+            size = os.fstat(capture.fileno()).st_size
+            if size < FILE_HEADER_FMT.size:
+                raise ValueError("Invalid capture file %s" % path)
+            self.mmap = mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, proto = FILE_HEADER_FMT.unpack_from(self.mmap)
+
+        if magic != MAGIC:
+            self.mmap.close()
+            raise ValueError("Invalid capture file %s" % path)
+
+        self.proto = proto.rstrip(b"\0").decode()
+
+    def __iter__(self):
+
+        offset = FILE_HEADER_FMT.size
+        size = len(self.mmap)
+
+        while offset + RECORD_FMT.size <= size:
+
+            ts, direction, device, length = \
+                RECORD_FMT.unpack_from(self.mmap, offset)
+
+            offset += RECORD_FMT.size
+
+            # truncated record (e.g. the controller has been killed)
+            if offset + length > size:
+                break
+
+            yield Record(ts, direction, device,
+                         self.mmap[offset:offset + length])
+
+            offset += length
+
+    def close(self):
+        """Release the mapping."""
+
+        self.mmap.close()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Precompiled codecs for southbound messages."""
+
+import struct
+
+from collections import namedtuple
+
+from construct import Struct, FormatField, Bytes, BitsInteger, Padded, \
+    GreedyRange, Array, Flag, Renamed, Transformed, Container, StreamError
+
+BITS_FMT = {8: "B", 16: "H", 32: "I", 64: "Q"}
+
+TailField = namedtuple("TailField", "name count fmt record sizes")
+
+
+def check_sizes(sizes, values):
+    """Check the length of the Bytes values, as construct does.
+
+    struct would silently pad or truncate them.
+    """
+
+    for index, name, length in sizes:
+        if len(values[index]) != length:
+            raise StreamError("bytes object of wrong length in %s, expected "
+                              "%u, found %u" % (name, length,
+                                                len(values[index])))
+
+
+class MessageCodec:
+    """Precompiled codec for a construct Struct.
+
+    The construct definition is compiled into a struct.Struct once. Only
+    messages made of a fixed-layout part optionally followed by a tail of
+    variable parts can be compiled. A variable part is either an Array or a
+    GreedyRange (which must be the last field) of fixed-layout items.
+
+    Messages are decoded into namedtuples, bit structs are decoded into
+    nested namedtuples whose _asdict() method returns a plain dict. Messages
+    can be encoded from both construct Containers and records.
+
+    Attributes:
+        parser: the construct Struct this codec has been compiled from
+        fmt: the precompiled struct for the fixed part of the message
+        fields: the fields in the fixed part of the message
+        sizes: the Bytes fields in the fixed part (index, name, length)
+        tail: the variable parts of the message (a list of TailFields)
+        record: the namedtuple used for decoded messages
+    """
+
+    def __init__(self, parser):
+
+        self.parser = parser
+        self.fields = []
+        self.sizes = []
+        self.tail = []
+
+        fmt = [">"]
+
+        for subcon in parser.subcons:
+
+            if not isinstance(subcon, Renamed):
+                raise TypeError("Unnamed field %s" % subcon)
+
+            if self.tail and self.tail[-1].count is None:
+                raise TypeError("GreedyRange must be the last field")
+
+            field = subcon.subcon
+
+            if isinstance(field, (Array, GreedyRange)):
+                count = field.count if isinstance(field, Array) else None
+                self.tail.append(self.__compile_tail(subcon.name, count,
+                                                     field.subcon))
+                continue
+
+            if self.tail:
+                raise TypeError("Fixed field %s after variable part" %
+                                subcon.name)
+
+            fmt.append(self.__compile_field(subcon.name, field))
+
+        self.fmt = struct.Struct("".join(fmt))
+
+        names = [x[0] for x in self.fields] + [x.name for x in self.tail]
+
+        self.record = namedtuple(parser.name or "container", names)
+
+    @property
+    def name(self):
+        """Return the message name."""
+
+        return self.parser.name
+
+    def sizeof(self):
+        """Return the size of the fixed part of the message."""
+
+        return self.fmt.size
+
+    def length(self, msg):
+        """Return the length of msg once encoded."""
+
+        length = self.fmt.size
+
+        for tail in self.tail:
+            length += len(getattr(msg, tail.name)) * tail.fmt.size
+
+        return length
+
+    def __compile_field(self, name, field):
+        """Compile a fixed-layout field, return the format string."""
+
+        if isinstance(field, FormatField) and field.fmtstr[0] == ">":
+            self.fields.append((name, None))
+            return field.fmtstr[1:]
+
+        if isinstance(field, Bytes) and isinstance(field.length, int):
+            self.sizes.append((len(self.fields), name, field.length))
+            self.fields.append((name, None))
+            return "%us" % field.length
+
+        if isinstance(field, Transformed) and isinstance(field.subcon, Struct):
+            fmt, bits = self.__compile_bits(name, field.subcon)
+            self.fields.append((name, bits))
+            return fmt
+
+        raise TypeError("Variable length field %s" % name)
+
+    @staticmethod
+    def __compile_tail(name, count, item):
+        """Compile the items of an Array or of a GreedyRange."""
+
+        if isinstance(item, FormatField) and item.fmtstr[0] == ">":
+            return TailField(name, count, struct.Struct(item.fmtstr), None,
+                             ())
+
+        if not isinstance(item, Struct):
+            raise TypeError("Unsupported item type in %s" % name)
+
+        codec = MessageCodec(item)
+
+        if codec.tail or [x for x in codec.fields if x[1]]:
+            raise TypeError("Unsupported item type in %s" % name)
+
+        return TailField(name, count, codec.fmt,
+                         namedtuple(name, [x[0] for x in codec.fields]),
+                         codec.sizes)
+
+    @staticmethod
+    def __compile_bits(name, parser):
+        """Compile a bit struct, return the format string and the fields.
+
+        Each field is returned as the tuple (name, shift, mask, is_flag).
+        Paddings are skipped.
+        """
+
+        total = parser.sizeof()
+
+        if total not in BITS_FMT:
+            raise TypeError("Invalid bit struct length %u" % total)
+
+        offset = total
+        bits = []
+
+        for subcon in parser.subcons:
+
+            field = subcon.subcon if isinstance(subcon, Renamed) else subcon
+            length = field.sizeof()
+            offset -= length
+
+            if isinstance(field, Padded):
+                continue
+
+            if field is Flag:
+                bits.append((subcon.name, offset, 0x1, True))
+                continue
+
+            if isinstance(field, BitsInteger):
+                bits.append((subcon.name, offset, (1 << length) - 1, False))
+                continue
+
+            raise TypeError("Unsupported bit field %s" % subcon.name)
+
+        record = namedtuple(name, [x[0] for x in bits])
+
+        return BITS_FMT[total], (record, bits)
+
+    def decode(self, buf):
+        """Decode a message from a buffer (bytes or memoryview)."""
+
+        values = self.fmt.unpack_from(buf)
+
+        out = []
+
+        for (_, bits), value in zip(self.fields, values):
+
+            if not bits:
+                out.append(value)
+                continue
+
+            record, fields = bits
+            out.append(record._make([bool((value >> shift) & 0x1) if flag
+                                     else (value >> shift) & mask
+                                     for _, shift, mask, flag in fields]))
+
+        if not self.tail:
+            return self.record._make(out)
+
+        # the array lengths are computed using the construct expressions, so
+        # they need a context with the fields decoded so far
+        ctx = Container(zip(self.record._fields, out))
+        offset = self.fmt.size
+
+        for tail in self.tail:
+
+            size = tail.fmt.size
+
+            if tail.count is None:
+                count = (len(buf) - offset) // size
+            elif callable(tail.count):
+                count = tail.count(ctx)
+            else:
+                count = tail.count
+
+            stop = offset + count * size
+
+            if stop > len(buf):
+                raise ValueError("Truncated field %s" % tail.name)
+
+            if tail.record:
+                items = [tail.record._make(x) for x in
+                         tail.fmt.iter_unpack(buf[offset:stop])]
+            else:
+                items = [x[0] for x in tail.fmt.iter_unpack(buf[offset:stop])]
+
+            out.append(items)
+            ctx[tail.name] = items
+            offset = stop
+
+        return self.record._make(out)
+
+    def parse(self, buf):
+        """Same as decode, for compatibility with construct."""
+
+        return self.decode(buf)
+
+    def values(self, msg):
+        """Return the values to be packed for the fixed part of msg."""
+
+        out = []
+
+        for name, bits in self.fields:
+
+            value = getattr(msg, name)
+
+            if not bits:
+                out.append(value)
+                continue
+
+            packed = 0
+
+            for field, shift, mask, _ in bits[1]:
+                packed |= (int(getattr(value, field)) & mask) << shift
+
+            out.append(packed)
+
+        check_sizes(self.sizes, out)
+
+        return out
+
+    def encode_into(self, buf, offset, msg):
+        """Encode msg into buf starting from offset.
+
+        The buffer must be large enough to hold the message (see length).
+        Return the offset of the first byte after the message.
+        """
+
+        self.fmt.pack_into(buf, offset, *self.values(msg))
+        offset += self.fmt.size
+
+        for tail in self.tail:
+
+            pack_into = tail.fmt.pack_into
+            size = tail.fmt.size
+
+            if tail.record:
+                fields = tail.record._fields
+                for item in getattr(msg, tail.name):
+                    values = [getattr(item, x) for x in fields]
+                    check_sizes(tail.sizes, values)
+                    pack_into(buf, offset, *values)
+                    offset += size
+            else:
+                for item in getattr(msg, tail.name):
+                    pack_into(buf, offset, item)
+                    offset += size
+
+        return offset
+
+    def encode(self, msg):
+        """Encode a message (a Container or a record) into bytes."""
+
+        if not self.tail:
+            return self.fmt.pack(*self.values(msg))
+
+        buf = bytearray(self.length(msg))
+        self.encode_into(buf, 0, msg)
+
+        return bytes(buf)
+
+    def build(self, msg):
+        """Same as encode, for compatibility with construct."""
+
+        return self.encode(msg)
+
+
+def compile_codec(parser):
+    """Return the codec for parser or None if it cannot be compiled."""
+
+    if not isinstance(parser, Struct):
+        return None
+
+    try:
+        return MessageCodec(parser)
+    except TypeError:
+        return None
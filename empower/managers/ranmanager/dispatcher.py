@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound messages dispatcher."""
+
+from time import perf_counter
+from collections import namedtuple
+
+from empower_core.serialize import serializable_dict
+
+Route = namedtuple("Route", "name default callbacks resolve_xid stats")
+
+
+@serializable_dict
+class HandlerStats:
+    """Call counter and cumulative run time of a message handler."""
+
+    __slots__ = ("calls", "time")
+
+    def __init__(self):
+
+        self.calls = 0
+        self.time = 0.0
+
+    def update(self, elapsed):
+        """Account for a new call."""
+
+        self.calls += 1
+        self.time += elapsed
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {
+            "calls": self.calls,
+            "time": self.time,
+            "avg_time": self.time / self.calls if self.calls else 0.0
+        }
+
+
+@serializable_dict
+class MessageStats(HandlerStats):
+    """Statistics for a message type, broken down by handler."""
+
+    __slots__ = ("handlers",)
+
+    def __init__(self):
+
+        super().__init__()
+        self.handlers = {}
+
+    def handler(self, name):
+        """Return the statistics for the handler name."""
+
+        if name not in self.handlers:
+            self.handlers[name] = HandlerStats()
+
+        return self.handlers[name]
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        out = super().to_dict()
+        out["handlers"] = self.handlers
+        return out
+
+
+@serializable_dict
+class Dispatcher:
+    """Southbound messages dispatcher.
+
+    Maps each message type to a Route made of the default handler defined by
+    the connection class (_handle_<name>), the callbacks registered by the
+    apps, whether pending xids must be resolved, and the statistics for the
+    message type.
+
+    The table is built once per protocol and connection class and it is
+    rebuilt only when the protocol GENERATION counter changes, i.e. when
+    messages or callbacks are registered or unregistered.
+
+    Attributes:
+        proto: the protocol module (lvapp, vbsp)
+        connection_type: the connection class
+        routes: the routing table (pt_type -> Route)
+        stats: the per-type statistics (pt_type -> MessageStats)
+    """
+
+    def __init__(self, proto, connection_type):
+
+        self.proto = proto
+        self.connection_type = connection_type
+        self.generation = None
+        self.routes = {}
+        self.stats = {}
+
+    @staticmethod
+    def handler_name(handler):
+        """Return a printable name for a callback."""
+
+        owner = getattr(handler, "__self__", None)
+        service_id = getattr(owner, "service_id", None)
+
+        if service_id:
+            return "%s (%s)" % (handler.__qualname__, service_id)
+
+        return getattr(handler, "__qualname__", repr(handler))
+
+    def msg_name(self, pt_type):
+        """Return the name of a message type."""
+
+        parser = self.proto.PT_TYPES[pt_type]
+
+        if not parser:
+            return pt_type
+
+        if isinstance(parser, tuple):
+            return parser[1]
+
+        return parser.name
+
+    def build(self):
+        """Rebuild the routing table from the protocol tables."""
+
+        routes = {}
+
+        for pt_type in self.proto.PT_TYPES:
+
+            name = self.msg_name(pt_type)
+            default = getattr(self.connection_type, "_handle_%s" % name, None)
+
+            if pt_type not in self.stats:
+                self.stats[pt_type] = MessageStats()
+
+            stats = self.stats[pt_type]
+
+            handlers = self.proto.PT_TYPES_HANDLERS.get(pt_type, [])
+            callbacks = tuple((x, stats.handler(self.handler_name(x)))
+                              for x in handlers)
+
+            # messages sent to self have no parser and no xid
+            resolve_xid = bool(self.proto.PT_TYPES[pt_type])
+
+            routes[pt_type] = Route(name=name,
+                                    default=default,
+                                    callbacks=callbacks,
+                                    resolve_xid=resolve_xid,
+                                    stats=stats)
+
+        self.routes = routes
+        self.generation = self.proto.GENERATION
+
+    def route(self, pt_type):
+        """Return the route for pt_type or None if the type is unknown."""
+
+        if self.generation != self.proto.GENERATION:
+            self.build()
+
+        return self.routes.get(pt_type)
+
+    def dispatch(self, connection, pt_type, msg):
+        """Dispatch a message received on a connection."""
+
+        route = self.route(pt_type)
+
+        if not route:
+            return
+
+        start = perf_counter()
+
+        if route.default:
+            route.default(connection, msg)
+
+        for handler, stats in route.callbacks:
+            begin = perf_counter()
+            handler(msg, connection.device)
+            stats.update(perf_counter() - begin)
+
+        if route.resolve_xid and msg.xid in connection.xids:
+            connection.resolve_xid(msg)
+
+        route.stats.update(perf_counter() - start)
+
+    def notify(self, pt_type, target):
+        """Dispatch a message sent to self (e.g. DEVICE_UP)."""
+
+        route = self.route(pt_type)
+
+        if not route:
+            return
+
+        start = perf_counter()
+
+        for handler, stats in route.callbacks:
+            begin = perf_counter()
+            handler(target)
+            stats.update(perf_counter() - begin)
+
+        route.stats.update(perf_counter() - start)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {self.msg_name(k): v for k, v in self.stats.items()
+                if v.calls and k in self.proto.PT_TYPES}
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Dict with a secondary index."""
+
+from collections.abc import Mapping
+
+from empower_core.serialize import serializable_dict
+
+
+@serializable_dict
+class DictView(Mapping):
+    """Read-only live view over a dict."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+
+        self.data = data
+
+    def __getitem__(self, key):
+
+        return self.data[key]
+
+    def __contains__(self, key):
+
+        return key in self.data
+
+    def __iter__(self):
+
+        return iter(self.data)
+
+    def __len__(self):
+
+        return len(self.data)
+
+    def __repr__(self):
+
+        return "%s(%r)" % (self.__class__.__name__, self.data)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return self.data
+
+
+class IndexedDict(dict):
+    """A dict grouping its values in one or more indexes.
+
+    Each index is defined by a function returning the group of a value (e.g.
+    the SSID of an LVAP or the address of the WTP hosting it), view() returns
+    a read-only live view over the items of a group. Items are indexed when
+    they are added or removed with [] and del, values that are modified in
+    place must be reindexed with reindex(). Groups are never removed, so the
+    views handed out stay valid.
+
+    Attributes:
+        indexes: the indexes (index -> function returning the group)
+        groups: the groups (index -> group -> {key: value})
+        keys_index: the group of each key (index -> key -> group)
+    """
+
+    def __init__(self, **indexes):
+
+        super().__init__()
+
+        self.indexes = indexes
+        self.groups = {index: {} for index in indexes}
+        self.keys_index = {index: {} for index in indexes}
+        self.views = {index: {} for index in indexes}
+
+    def group(self, index, name):
+        """Return the group name of index (creating it if needed)."""
+
+        groups = self.groups[index]
+
+        if name not in groups:
+            groups[name] = {}
+
+        return groups[name]
+
+    def view(self, index, name):
+        """Return a read-only live view over the group name of index."""
+
+        views = self.views[index]
+
+        if name not in views:
+            views[name] = DictView(self.group(index, name))
+
+        return views[name]
+
+    def reindex(self, key, index=None):
+        """Move key to the groups matching its current value.
+
+        Only the specified index is updated, if any.
+        """
+
+        if key not in self:
+            return
+
+        value = self[key]
+
+        for current in [index] if index else self.indexes:
+
+            name = self.indexes[current](value)
+            keys_index = self.keys_index[current]
+
+            if keys_index[key] == name:
+                continue
+
+            del self.groups[current][keys_index[key]][key]
+
+            self.group(current, name)[key] = value
+            keys_index[key] = name
+
+    def __setitem__(self, key, value):
+
+        if key in self:
+            self.unindex(key)
+
+        super().__setitem__(key, value)
+
+        for index, function in self.indexes.items():
+            name = function(value)
+            self.group(index, name)[key] = value
+            self.keys_index[index][key] = name
+
+    def __delitem__(self, key):
+
+        super().__delitem__(key)
+
+        self.unindex(key)
+
+    def unindex(self, key):
+        """Remove key from all the indexes."""
+
+        for index, keys_index in self.keys_index.items():
+            del self.groups[index][keys_index.pop(key)][key]
+
+    def pop(self, key, *args):
+
+        if key not in self:
+            return super().pop(key, *args)
+
+        value = self[key]
+        del self[key]
+
+        return value
+
+    def clear(self):
+
+        super().clear()
+
+        for index, groups in self.groups.items():
+            for group in groups.values():
+                group.clear()
+            self.keys_index[index].clear()
+
+    def update(self, *args, **kwargs):
+
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def popitem(self):
+
+        key = next(reversed(self))
+
+        return key, self.pop(key)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Liveness scheduler for RAN connections."""
+
+import math
+import heapq
+import itertools
+
+import tornado.ioloop
+
+
+class LivenessScheduler:
+    """Shared liveness scheduler.
+
+    Keeps the deadlines of all the connections of a RAN manager in a heap
+    and arms a single ioloop timeout for the earliest one. Hello messages
+    just push the connection deadline forward (see touch) without touching
+    the heap: stale entries are re-inserted with the current deadline when
+    they reach the top of the heap. Timeouts are rounded up to the scheduler
+    resolution so that connections expiring close to each other are
+    checked in the same wake-up.
+
+    Connections whose deadline expires are notified through their
+    heartbeat_timeout() method.
+
+    Attributes:
+        timeout: how long a connection can stay silent (in s)
+        resolution: the timer resolution (in s)
+        heap: the deadlines heap, entries are (deadline, token, connection)
+    """
+
+    def __init__(self, timeout, resolution):
+
+        self.timeout = timeout
+        self.resolution = resolution
+        self.heap = []
+        self.tokens = itertools.count()
+        self.timer = None
+        self.due = None
+
+    @property
+    def ioloop(self):
+        """Return the current ioloop."""
+
+        return tornado.ioloop.IOLoop.current()
+
+    def add(self, connection):
+        """Start monitoring a connection."""
+
+        connection.deadline = self.ioloop.time() + self.timeout
+        connection.hb_token = next(self.tokens)
+
+        heapq.heappush(self.heap, (connection.deadline, connection.hb_token,
+                                   connection))
+
+        self.schedule()
+
+    def touch(self, connection):
+        """Push the connection deadline forward."""
+
+        if connection.hb_token is None:
+            return
+
+        connection.deadline = self.ioloop.time() + self.timeout
+
+    def remove(self, connection):
+        """Stop monitoring a connection.
+
+        The heap entry is discarded when it reaches the top of the heap.
+        """
+
+        connection.deadline = None
+        connection.hb_token = None
+
+    def schedule(self):
+        """Arm the timer for the earliest deadline."""
+
+        if not self.heap:
+            return
+
+        due = math.ceil(self.heap[0][0] / self.resolution) * self.resolution
+
+        if self.timer and self.due <= due:
+            return
+
+        if self.timer:
+            self.ioloop.remove_timeout(self.timer)
+
+        self.due = due
+        self.timer = self.ioloop.call_at(due, self.expire)
+
+    def expire(self):
+        """Notify the connections whose deadline expired."""
+
+        self.timer = None
+        self.due = None
+
+        now = self.ioloop.time()
+
+        while self.heap and self.heap[0][0] <= now:
+
+            _, token, connection = heapq.heappop(self.heap)
+
+            # removed or re-added
+            if token != connection.hb_token:
+                continue
+
+            # hello received in the meantime
+            if connection.deadline > now:
+                heapq.heappush(self.heap, (connection.deadline, token,
+                                           connection))
+                continue
+
+            self.remove(connection)
+            connection.heartbeat_timeout()
+
+        self.schedule()
+
+    def stop(self):
+        """Cancel the timer."""
+
+        if self.timer:
+            self.ioloop.remove_timeout(self.timer)
+
+        self.timer = None
+        self.due = None
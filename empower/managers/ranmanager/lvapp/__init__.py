@@ -17,11 +17,17 @@
 
 """LVAPP protocols."""
 
+import struct
+
+from collections import namedtuple
+
 from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes, Array, \
     BitStruct, Padding, Flag, GreedyRange, BitsInteger
 
 from empower_core.ssid import WIFI_NWID_MAXSIZE
 
+from empower.managers.ranmanager.codec import compile_codec
+
 
 PT_VERSION = 0x00
 
@@ -82,6 +88,11 @@ HEADER = Struct(
 )
 HEADER.name = "header"
 
+# Precompiled version of HEADER used by the framing layer
+HEADER_FMT = struct.Struct(">BBIII6s")
+
+Header = namedtuple("Header", "version type length seq xid device")
+
 HELLO_REQUEST = Struct(
     "version" / Int8ub,
     "type" / Int8ub,
@@ -660,9 +671,40 @@ PT_TYPES_HANDLERS = {}
 for k in PT_TYPES:
     PT_TYPES_HANDLERS[k] = []
 
+# Bumped every time the tables above are modified, the dispatchers rebuild
+# their routing tables when this changes
+GENERATION = 0
 
-def register_message(pt_type, parser):
-    """Register new message and a new handler."""
+# Telemetry requests, sent with a lower priority than the control messages
+# (see RANConnection.enqueue)
+TELEMETRY = set()
+
+# Precompiled codecs, messages without a codec are parsed with construct
+CODECS = {}
+
+for k in PT_TYPES:
+    CODECS[k] = compile_codec(PT_TYPES[k])
+
+
+def decode_header(buf):
+    """Decode the fixed header at the beginning of buf."""
+
+    return Header._make(HEADER_FMT.unpack_from(buf))
+
+
+def register_message(pt_type, parser, telemetry=False):
+    """Register new message and a new handler.
+
+    Telemetry requests (e.g. statistics polls) are sent with a lower priority
+    than the control messages and can be coalesced or dropped if the device
+    is slow to drain its socket.
+    """
+
+    global GENERATION
+    GENERATION += 1
+
+    if telemetry:
+        TELEMETRY.add(pt_type)
 
     if pt_type not in PT_TYPES:
         PT_TYPES[pt_type] = parser
@@ -674,6 +716,9 @@ def register_message(pt_type, parser):
 def register_callbacks(app, callback_str='handle_'):
     """Register callbacks."""
 
+    global GENERATION
+    GENERATION += 1
+
     for pt_type in PT_TYPES_HANDLERS:
 
         if not PT_TYPES[pt_type]:
@@ -689,6 +734,9 @@ def register_callbacks(app, callback_str='handle_'):
 def unregister_callbacks(app, callback_str='handle_'):
     """Unregister callbacks."""
 
+    global GENERATION
+    GENERATION += 1
+
     for pt_type in PT_TYPES_HANDLERS:
 
         if not PT_TYPES[pt_type]:
@@ -704,6 +752,9 @@ def unregister_callbacks(app, callback_str='handle_'):
 def register_callback(pt_type, handler):
     """Register new message and a new handler."""
 
+    global GENERATION
+    GENERATION += 1
+
     if pt_type not in PT_TYPES:
         raise KeyError("Packet type %u undefined")
 
@@ -716,6 +767,9 @@ def register_callback(pt_type, handler):
 def unregister_callback(pt_type, handler):
     """Register new message and a new handler."""
 
+    global GENERATION
+    GENERATION += 1
+
     if pt_type not in PT_TYPES:
         raise KeyError("Packet type %u undefined")
 
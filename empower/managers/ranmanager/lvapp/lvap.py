@@ -150,6 +150,12 @@ class LVAP:
         # pending module ids (transions happen when list is empty)
         self.pending = []
 
+        # the configuration last sent to the agents (see fingerprint)
+        self._committed = None
+
+        # add lvap messages sent and suppressed by commit
+        self.commits = {"sent": 0, "suppressed": 0}
+
         # logger :)
         self.log = logging.getLogger(self.__class__.__module__)
 
@@ -168,8 +174,14 @@ class LVAP:
     def downlink(self, downlink):
         """Set the downlink."""
 
+        old_wtp = self.wtp
+
         self._downlink = downlink
 
+        # move the LVAP to the view of its new WTP
+        if self.wtp is not old_wtp:
+            srv_or_die("lvappmanager").lvaps.reindex(self.addr, "wtp")
+
     @property
     def uplink(self):
         """Return the uplink."""
@@ -192,6 +204,13 @@ class LVAP:
 
         self.pending.remove(xid)
 
+        # the agent did not apply the configuration, send it again at the
+        # next commit
+        if response.status:
+            self.log.error("Add lvap %u failed with status %u", xid,
+                           response.status)
+            self._committed = None
+
         # there are still pending transactions
         if self.pending:
             return
@@ -221,6 +240,13 @@ class LVAP:
 
         self.pending.remove(xid)
 
+        # the agent did not apply the configuration, send it again at the
+        # next commit
+        if response.status:
+            self.log.error("Add lvap %u failed with status %u", xid,
+                           response.status)
+            self._committed = None
+
         # there are still pending transactions
         if self.pending:
             return
@@ -228,6 +254,15 @@ class LVAP:
         # all blocks added, transitioning to running state
         self.state = PROCESS_RUNNING
 
+    def handle_add_lvap_timeout(self, request, *_):
+        """Called when an add lvap command is not acknowledged in time."""
+
+        self.log.warning("Add lvap %u timed out", request.xid)
+
+        # the configuration may have not been applied, send it again at the
+        # next commit
+        self._committed = None
+
     @property
     def state(self):
         """Return the state."""
@@ -266,6 +301,8 @@ class LVAP:
         # set uplink blocks
         self.__assign_uplink(self.target_blocks[1:])
 
+        self._committed = self.fingerprint()
+
     def _removing_spawning(self):
 
         # set new state
@@ -277,6 +314,8 @@ class LVAP:
         # set uplink blocks
         self.__assign_uplink(self.target_blocks[1:])
 
+        self._committed = self.fingerprint()
+
         # reset target blocks
         self.target_blocks = None
 
@@ -318,19 +357,40 @@ class LVAP:
             self.pending.append(xid)
 
         # reset uplink and downlink
-        self._downlink = None
+        self.downlink = None
         self._uplink = []
 
     def _running_running(self):
 
         pass
 
+    def fingerprint(self):
+        """Return the configuration carried by the add lvap messages."""
+
+        return (tuple(self.networks), self.bssid, self.ssid,
+                self.authentication_state, self.association_state,
+                self.ht_caps, tuple(sorted(self.ht_caps_info.items())),
+                self.encap, tuple(self.blocks))
+
     def commit(self):
-        """Send add lvap message for downlink and uplinks blocks."""
+        """Send add lvap message for downlink and uplinks blocks.
 
-        if not self.blocks:
+        Nothing is sent if the configuration did not change since the last
+        add lvap messages.
+        """
+
+        if not self.blocks or not self.blocks[0]:
+            return
+
+        fingerprint = self.fingerprint()
+
+        if fingerprint == self._committed:
+            self.commits["suppressed"] += 1
             return
 
+        self._committed = fingerprint
+        self.commits["sent"] += 1
+
         xid = self.blocks[0].wtp.connection.\
             send_add_lvap_request(self, self.blocks[0], True)
 
@@ -368,11 +428,17 @@ class LVAP:
     def ssid(self, ssid):
         """ Set the ssid. """
 
+        old_ssid = self._ssid
+
         if not ssid or ssid == SSID(b'\0'):
             self._ssid = None
         else:
             self._ssid = ssid
 
+        # move the LVAP to the view of its new project
+        if self._ssid != old_ssid:
+            srv_or_die("lvappmanager").lvaps.reindex(self.addr, "ssid")
+
     @property
     def encap(self):
         """Get the encap."""
@@ -518,7 +584,7 @@ class LVAP:
         self.pending.append(xid)
 
         # save block
-        self._downlink = dl_block
+        self.downlink = dl_block
 
     def __assign_uplink(self, ul_blocks):
         """Set the downlink blocks."""
@@ -547,12 +613,8 @@ class LVAP:
     def wtp(self, wtp):
         """Assigns LVAP to new wtp."""
 
-        # Initialize the Resource Pool
-        pool = ResourcePool()
-
-        # Update the pool with all the available ResourseBlocks
-        for block in wtp.blocks.values():
-            pool.append(block)
+        # The ResourseBlocks available at the WTP
+        pool = ResourcePool(wtp.blocks.values())
 
         # Filter blocks so we are sure to go to the same interface and band
         blocks = pool.filter_by_channel(self.blocks[0].channel) \
@@ -570,7 +632,7 @@ class LVAP:
             xid = block.wtp.connection.send_del_lvap_request(self)
             self.pending.append(xid)
 
-        self._downlink = None
+        self.downlink = None
         self._uplink = []
 
     def to_dict(self):
@@ -586,6 +648,7 @@ class LVAP:
                 'ht_caps_info': self.ht_caps_info,
                 'assoc_id': self.assoc_id,
                 'pending': self.pending,
+                'commits': self.commits,
                 'encap': self.encap,
                 'networks': self.networks,
                 'authentication_state': self.authentication_state,
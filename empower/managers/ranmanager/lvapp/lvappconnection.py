@@ -22,16 +22,14 @@ import time
 from random import randint
 
 from construct import Container
-from tornado.iostream import StreamClosedError
 
 from empower_core.launcher import srv_or_die
-from empower_core.ssid import SSID, WIFI_NWID_MAXSIZE
+from empower_core.ssid import SSID
 from empower_core.etheraddress import EtherAddress
 from empower.managers.ranmanager.lvapp.txpolicy import TxPolicy
 from empower.managers.ranmanager.lvapp.resourcepool import ResourceBlock
 from empower.managers.ranmanager.lvapp.lvap import LVAP, PROCESS_RUNNING
 from empower.managers.ranmanager.lvapp.vap import VAP
-from empower.managers.projectsmanager.project import T_BSSID_TYPE_SHARED
 from empower.managers.projectsmanager.project import T_BSSID_TYPE_UNIQUE
 from empower.managers.ranmanager.ranconnection import RANConnection
 
@@ -42,62 +40,46 @@ HB_PERIOD = 500
 class LVAPPConnection(RANConnection):
     """A persistent connection to a RAN device."""
 
-    def on_read(self, future):
-        """Assemble message from agent.
+    def on_message(self, hdr, data):
+        """Handle a message from the agent.
 
-        Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown.
+        The header has already been decoded by the framing layer. The message
+        is parsed straight from the receive buffer and then passed to the
+        suitable method or dropped if the packet type in unknown.
         """
 
-        try:
-            self.buffer = self.buffer + future.result()
-        except StreamClosedError as stream_ex:
-            self.log.error(stream_ex)
-            return
-
-        hdr = self.proto.HEADER.parse(self.buffer)
-
         if hdr.version != 0:
             self.log.warning("Invalid version, expected 0 got %u", hdr.version)
             self.stream.close()
             return
 
-        if len(self.buffer) < hdr.length:
-            remaining = hdr.length - len(self.buffer)
-            future = self.stream.read_bytes(remaining)
-            future.add_done_callback(self.on_read)
-            return
-
         # Check if we know the message type
-        if hdr.type not in self.proto.PT_TYPES:
+        parser = self.proto.PT_TYPES.get(hdr.type)
+
+        if not parser:
             self.log.warning("Unknown message type %u, ignoring.", hdr.type)
             return
 
         # Check if the Device is among the ones we known
         addr = EtherAddress(hdr.device)
+        device = self.manager.devices.get(addr)
 
-        if addr not in self.manager.devices:
+        if not device:
             self.log.warning("Unknown Device %s, closing connection.", addr)
             self.stream.close()
             return
 
-        device = self.manager.devices[addr]
-
         # Log message informations
-        parser = self.proto.PT_TYPES[hdr.type]
-        msg = parser.parse(self.buffer)
-        self.log.debug("Got %s message from %s seq %u", parser.name,
-                       EtherAddress(addr), hdr.seq)
+        codec = self.proto.CODECS.get(hdr.type)
+        msg = codec.decode(data) if codec else parser.parse(data)
+        self.log.debug("Got %s message from %s seq %u", parser.name, addr,
+                       hdr.seq)
 
         # If Device is not online and is not connected, then the only message
         # type we can accept is HELLO_RESPONSE
         if not device.is_connected():
 
             if msg.type != self.proto.PT_HELLO_REQUEST:
-                if not self.stream.closed():
-                    self.wait()
                 return
 
             # This is a new connection, set pointer to the device
@@ -109,8 +91,8 @@ class LVAPPConnection(RANConnection):
             # Transition to connected state
             device.set_connected()
 
-            # Start hb worker
-            self.hb_worker.start()
+            # Start monitoring the connection
+            self.manager.liveness.add(self)
 
             # Send caps request
             self.send_caps_request()
@@ -120,43 +102,15 @@ class LVAPPConnection(RANConnection):
         if device.is_connected() and not device.is_online():
             valid = (self.proto.PT_HELLO_REQUEST, self.proto.PT_CAPS_RESPONSE)
             if msg.type not in valid:
-                if not self.stream.closed():
-                    self.wait()
                 return
 
         # Otherwise handle message
         try:
-            method = self.proto.PT_TYPES[msg.type].name
-            self.handle_message(method, msg)
+            self.handle_message(hdr.type, msg)
         except Exception as ex:
             self.log.exception(ex)
             self.stream.close()
 
-        if not self.stream.closed():
-            self.wait()
-
-    def handle_message(self, method, msg):
-        """Handle incoming message."""
-
-        # If the default handler is defined then call it
-        handler_name = "_handle_%s" % method
-        if hasattr(self, handler_name):
-            handler = getattr(self, handler_name)
-            handler(msg)
-
-        # Call registered callbacks
-        if msg.type in self.proto.PT_TYPES_HANDLERS:
-            for handler in self.proto.PT_TYPES_HANDLERS[msg.type]:
-                handler(msg, self.device)
-
-        # Check if there are pending XIDs
-        if msg.xid in self.xids:
-            request = self.xids[msg.xid][0]
-            callback = self.xids[msg.xid][1]
-            if callback:
-                callback(msg, self.device, request)
-            del self.xids[msg.xid]
-
     def on_disconnect(self):
         """Handle device disconnection."""
 
@@ -166,35 +120,37 @@ class LVAPPConnection(RANConnection):
         self.log.warning("Device disconnected: %s", self.device.addr)
 
         # Remove hosted LVAPs
-        lvaps = [lvap for lvap in self.manager.lvaps.values()
-                 if lvap.wtp.addr == self.device.addr]
+        lvaps = self.manager.lvaps.view("wtp", self.device.addr)
 
-        for lvap in list(lvaps):
+        for lvap in list(lvaps.values()):
             del self.manager.lvaps[lvap.addr]
+            self.manager.stats.remove_entities(lvap.addr)
             lvap.clear_blocks()
 
         # remove hosted VAPs
-        vaps = [vap for vap in self.manager.vaps.values()
-                if vap.block.wtp.addr == self.device.addr]
+        vaps = self.manager.vaps.view("wtp", self.device.addr)
 
-        for vap in list(vaps):
+        for vap in list(vaps.values()):
             del self.manager.vaps[vap.bssid]
             vap.clear_block()
 
         # reset state
+        self.manager.blocks.remove_wtp(self.device.addr)
+        self.manager.stats.remove_entities(self.device.addr)
         self.device.set_disconnected()
         self.device.last_seen = 0
         self.device.connection = None
         self.device.blocks = {}
         self.device = None
 
-        # Stop hb worker
-        self.hb_worker.stop()
+        # Stop monitoring the connection
+        self.manager.liveness.remove(self)
 
-    def send_message(self, msg_type, msg, callback=None):
+    def send_message(self, msg_type, msg, callback=None, on_timeout=None):
         """Send message and set common parameters."""
 
         parser = self.proto.PT_TYPES[msg_type]
+        codec = self.proto.CODECS.get(msg_type)
 
         if self.stream.closed():
             self.log.warning("Stream closed, unabled to send %s message to %s",
@@ -216,10 +172,19 @@ class LVAPPConnection(RANConnection):
         self.log.debug("Sending %s message to %s seq %u",
                        parser.name, addr[0], msg.seq)
 
-        self.stream.write(parser.build(msg))
+        if codec:
+            msg.length = codec.length(msg)
+
+        if msg_type in self.proto.TELEMETRY:
+            self.enqueue(msg_type, codec.encode(msg) if codec
+                         else parser.build(msg))
+        elif codec:
+            self.write_message(codec, msg)
+        else:
+            self.write(parser.build(msg))
 
         if callback:
-            self.xids[msg.xid] = (msg, callback)
+            self.add_xid(msg_type, msg, callback, on_timeout)
 
         return msg.xid
 
@@ -269,6 +234,7 @@ class LVAPPConnection(RANConnection):
 
         self.device.last_seen = hello.seq
         self.device.last_seen_ts = time.time()
+        self.manager.liveness.touch(self)
 
         self.send_hello_response(hello.period)
 
@@ -284,6 +250,8 @@ class LVAPPConnection(RANConnection):
                               block.channel,
                               block.band)
 
+            self.manager.blocks.add(self.device.blocks[block.block_id])
+
         # set state to online
         self.device.set_online()
 
@@ -315,8 +283,7 @@ class LVAPPConnection(RANConnection):
         incoming_ssid = SSID(request.ssid)
         iface_id = request.iface_id
         ht_caps = request.flags.ht_caps
-        ht_caps_info = dict(request.ht_caps_info)
-        del ht_caps_info['_io']
+        ht_caps_info = request.ht_caps_info._asdict()
 
         block = self.device.blocks[request.iface_id]
 
@@ -416,43 +383,18 @@ class LVAPPConnection(RANConnection):
             self.send_auth_response(lvap)
             return
 
-        # Otherwise check if the requested BSSID belongs to a unique tenant
-        for project in srv_or_die("projectsmanager").projects.values():
-
-            if not project.wifi_props:
-                continue
-
-            if project.wifi_props.bssid_type == T_BSSID_TYPE_SHARED:
-                continue
-
-            bssid = project.generate_bssid(lvap.addr)
+        # Otherwise check if the requested BSSID belongs to a project
+        projects = srv_or_die("projectsmanager").load_projects_by_bssid(
+            incoming_bssid, lvap.addr)
 
-            if bssid == incoming_bssid:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = False
-                lvap.ssid = None
-                lvap.commit()
-                self.send_auth_response(lvap)
-                return
-
-        # Finally check if this is a shared bssid
-        for project in srv_or_die("projectsmanager").projects.values():
-
-            if not project.wifi_props:
-                continue
-
-            if project.wifi_props.bssid_type == T_BSSID_TYPE_UNIQUE:
-                continue
-
-            if incoming_bssid in project.vaps:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = False
-                lvap.ssid = None
-                lvap.commit()
-                self.send_auth_response(lvap)
-                return
+        if projects:
+            lvap.bssid = incoming_bssid
+            lvap.authentication_state = True
+            lvap.association_state = False
+            lvap.ssid = None
+            lvap.commit()
+            self.send_auth_response(lvap)
+            return
 
         self.log.info("Auth request from unknown BSSID %s", incoming_bssid)
 
@@ -462,8 +404,7 @@ class LVAPPConnection(RANConnection):
         sta = EtherAddress(request.sta)
 
         ht_caps = request.flags.ht_caps
-        ht_caps_info = dict(request.ht_caps_info)
-        del ht_caps_info['_io']
+        ht_caps_info = request.ht_caps_info._asdict()
 
         if sta not in self.manager.lvaps:
             self.log.info("Assoc request from unknown LVAP %s", sta)
@@ -479,44 +420,11 @@ class LVAPPConnection(RANConnection):
 
         incoming_ssid = SSID(request.ssid)
 
-        # Check if the requested SSID is from a unique project
-        for project in srv_or_die("projectsmanager").projects.values():
-
-            if not project.wifi_props:
-                continue
-
-            if project.wifi_props.bssid_type == T_BSSID_TYPE_SHARED:
-                continue
-
-            bssid = project.generate_bssid(lvap.addr)
-
-            if bssid != incoming_bssid:
-                self.log.info("Invalid BSSID %s", incoming_bssid)
-                continue
-
-            if project.wifi_props.ssid == incoming_ssid:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = True
-                lvap.ssid = incoming_ssid
-                lvap.ht_caps = ht_caps
-                lvap.ht_caps_info = ht_caps_info
-                lvap.commit()
-                self.send_assoc_response(lvap)
-                return
-
-        # Check if the requested SSID is from a unique project
-        for project in srv_or_die("projectsmanager").projects.values():
+        # Check if the requested SSID is from a project serving the BSSID
+        projects = srv_or_die("projectsmanager").load_projects_by_bssid(
+            incoming_bssid, lvap.addr)
 
-            if not project.wifi_props:
-                continue
-
-            if project.wifi_props.bssid_type == T_BSSID_TYPE_UNIQUE:
-                continue
-
-            if incoming_bssid not in project.vaps:
-                self.log.info("Invalid BSSID %s", incoming_bssid)
-                continue
+        for project in projects:
 
             if project.wifi_props.ssid == incoming_ssid:
                 lvap.bssid = incoming_bssid
@@ -548,8 +456,7 @@ class LVAPPConnection(RANConnection):
         lvap.authentication_state = bool(status.flags.authenticated)
         lvap.association_state = bool(status.flags.associated)
         lvap.ht_caps = bool(status.flags.ht_caps)
-        lvap.ht_caps_info = dict(status.ht_caps_info)
-        del lvap.ht_caps_info['_io']
+        lvap.ht_caps_info = status.ht_caps_info._asdict()
 
         ssid = SSID(status.ssid)
         if ssid == SSID():
@@ -686,46 +593,44 @@ class LVAPPConnection(RANConnection):
     def send_hello_response(self, period=2000):
         """Send a HELLO_REQUEST message."""
 
-        msg = Container(length=self.proto.HELLO_RESPONSE.sizeof(),
-                        period=period)
+        msg = Container(period=period)
 
         return self.send_message(self.proto.PT_HELLO_RESPONSE, msg)
 
     def send_caps_request(self):
         """Send a CAPS_REQUEST message."""
 
-        msg = Container(length=self.proto.CAPS_REQUEST.sizeof())
+        msg = Container()
         return self.send_message(self.proto.PT_CAPS_REQUEST, msg)
 
     def send_lvap_status_request(self):
         """Send a LVAP_STATUS_REQUEST message."""
 
-        msg = Container(length=self.proto.LVAP_STATUS_REQUEST.sizeof())
+        msg = Container()
         return self.send_message(self.proto.PT_LVAP_STATUS_REQUEST, msg)
 
     def send_vap_status_request(self):
         """Send a VAP_STATUS_REQUEST message."""
 
-        msg = Container(length=self.proto.VAP_STATUS_REQUEST.sizeof())
+        msg = Container()
         return self.send_message(self.proto.PT_VAP_STATUS_REQUEST, msg)
 
     def send_slice_status_request(self):
         """Send a PT_SLICE_STATUS_REQUEST message."""
 
-        msg = Container(length=self.proto.SLICE_STATUS_REQUEST.sizeof())
+        msg = Container()
         return self.send_message(self.proto.PT_SLICE_STATUS_REQUEST, msg)
 
     def send_tx_policy_status_request(self):
         """Send a TRANSMISSION_POLICY_STATUS_REQUEST message."""
 
-        msg = Container(length=self.proto.TX_POLICY_STATUS_REQUEST.sizeof())
+        msg = Container()
         return self.send_message(self.proto.PT_TX_POLICY_STATUS_REQUEST, msg)
 
     def send_add_vap(self, vap):
         """Send a ADD_VAP message."""
 
-        msg = Container(length=self.proto.ADD_VAP.sizeof(),
-                        iface_id=vap.block.block_id,
+        msg = Container(iface_id=vap.block.block_id,
                         bssid=vap.bssid.to_raw(),
                         ssid=vap.ssid.to_raw())
 
@@ -734,34 +639,39 @@ class LVAPPConnection(RANConnection):
     def send_del_vap(self, bssid):
         """Send a DEL_VAP message."""
 
-        msg = Container(length=self.proto.DEL_VAP.sizeof(),
-                        bssid=bssid.to_raw())
+        msg = Container(bssid=bssid.to_raw())
         return self.send_message(self.proto.PT_DEL_VAP, msg)
 
     def send_assoc_response(self, lvap):
         """Send a ASSOC_RESPONSE message."""
 
-        msg = Container(length=self.proto.ASSOC_RESPONSE.sizeof(),
-                        sta=lvap.addr.to_raw())
-        return self.send_message(self.proto.PT_ASSOC_RESPONSE, msg)
+        msg = Container(sta=lvap.addr.to_raw())
+        xid = self.send_message(self.proto.PT_ASSOC_RESPONSE, msg)
+        self.flush()
+
+        return xid
 
     def send_auth_response(self, lvap):
         """Send a AUTH_RESPONSE message."""
 
-        msg = Container(length=self.proto.AUTH_RESPONSE.sizeof(),
-                        sta=lvap.addr.to_raw(),
+        msg = Container(sta=lvap.addr.to_raw(),
                         bssid=lvap.bssid.to_raw())
 
-        return self.send_message(self.proto.PT_AUTH_RESPONSE, msg)
+        xid = self.send_message(self.proto.PT_AUTH_RESPONSE, msg)
+        self.flush()
+
+        return xid
 
     def send_probe_response(self, lvap, ssid):
         """Send a PROBE_RESPONSE message."""
 
-        msg = Container(length=self.proto.PROBE_RESPONSE.sizeof(),
-                        sta=lvap.addr.to_raw(),
+        msg = Container(sta=lvap.addr.to_raw(),
                         ssid=ssid.to_raw())
 
-        return self.send_message(self.proto.PT_PROBE_RESPONSE, msg)
+        xid = self.send_message(self.proto.PT_PROBE_RESPONSE, msg)
+        self.flush()
+
+        return xid
 
     def send_set_tx_policy(self, txp):
         """Send a SET_TX_POLICY message."""
@@ -770,8 +680,7 @@ class LVAPPConnection(RANConnection):
         rates = sorted([int(x * 2) for x in txp.mcs])
         ht_rates = sorted([int(x) for x in txp.ht_mcs])
 
-        msg = Container(length=39 + len(rates) + len(ht_rates),
-                        flags=flags,
+        msg = Container(flags=flags,
                         sta=txp.addr.to_raw(),
                         iface_id=txp.block.block_id,
                         rts_cts=txp.rts_cts,
@@ -788,11 +697,8 @@ class LVAPPConnection(RANConnection):
     def send_del_tx_policy(self, txp):
         """Send a DEL_TX_POLICY message."""
 
-        msg = Container(length=self.proto.DEL_TX_POLICY.sizeof(),
-                        sta=txp.addr.to_raw(),
-                        hwaddr=txp.block.hwaddr.to_raw(),
-                        channel=txp.block.channel,
-                        band=txp.block.band)
+        msg = Container(iface_id=txp.block.block_id,
+                        sta=txp.addr.to_raw())
 
         return self.send_message(self.proto.PT_DEL_TX_POLICY, msg)
 
@@ -816,8 +722,7 @@ class LVAPPConnection(RANConnection):
         if lvap.ssid:
             ssid = lvap.ssid
 
-        msg = Container(length=80,
-                        flags=flags,
+        msg = Container(flags=flags,
                         assoc_id=lvap.assoc_id,
                         iface_id=block.block_id,
                         ht_caps_info=Container(**lvap.ht_caps_info),
@@ -828,18 +733,17 @@ class LVAPPConnection(RANConnection):
                         networks=[])
 
         for network in lvap.networks:
-            msg.length = msg.length + 6 + WIFI_NWID_MAXSIZE + 1
             msg.networks.append(Container(bssid=network[0].to_raw(),
                                           ssid=network[1].to_raw()))
 
         return self.send_message(self.proto.PT_ADD_LVAP_REQUEST, msg,
-                                 lvap.handle_add_lvap_response)
+                                 lvap.handle_add_lvap_response,
+                                 lvap.handle_add_lvap_timeout)
 
     def send_del_lvap_request(self, lvap, csa_switch_channel=0):
         """Send a DEL_LVAP message."""
 
-        msg = Container(length=self.proto.DEL_LVAP_REQUEST.sizeof(),
-                        sta=lvap.addr.to_raw(),
+        msg = Container(sta=lvap.addr.to_raw(),
                         csa_switch_mode=0,
                         csa_switch_count=3,
                         csa_switch_channel=csa_switch_channel)
@@ -871,8 +775,7 @@ class LVAPPConnection(RANConnection):
 
         flags = Container(amsdu_aggregation=amsdu_aggregation)
 
-        msg = Container(length=self.proto.SET_SLICE.sizeof(),
-                        flags=flags,
+        msg = Container(flags=flags,
                         iface_id=block.block_id,
                         quantum=quantum,
                         sta_scheduler=sta_scheduler,
@@ -886,8 +789,7 @@ class LVAPPConnection(RANConnection):
 
         ssid = project.wifi_props.ssid
 
-        msg = Container(length=self.proto.DEL_SLICE.sizeof(),
-                        iface_id=block.block_id,
+        msg = Container(iface_id=block.block_id,
                         slice_id=slice_id,
                         ssid=ssid.to_raw())
 
@@ -896,8 +798,7 @@ class LVAPPConnection(RANConnection):
     def send_trigger_beacon(self, block_id, dst, bssid, ssid):
         """Send a TRIGGER_BEACON message."""
 
-        msg = Container(length=self.proto.TRIGGER_BEACON.sizeof(),
-                        block_id=block_id,
+        msg = Container(block_id=block_id,
                         dst=dst.to_raw(),
                         bssid=bssid.to_raw(),
                         ssid=ssid)
@@ -17,42 +17,85 @@
 
 """LVAPP RAN Manager."""
 
+from operator import attrgetter
+
 import empower.managers.ranmanager.lvapp as lvapp
 
 from empower.managers.ranmanager.ranmanager import RANManager
+from empower.managers.ranmanager.indexeddict import IndexedDict
+from empower.managers.ranmanager.transactions import XID_TIMEOUT
+from empower.managers.ranmanager.statsstore import SERIES_SIZE, MAX_SERIES
+from empower.managers.ranmanager.transactionshandler import \
+    LVAPPTransactionsHandler
+from empower.managers.ranmanager.statshandler import LVAPPStatsHandler
 from empower.managers.ranmanager.lvapp.beaconhandler import BeaconHandler
 from empower.managers.ranmanager.lvapp.wtphandler import WTPHandler
 from empower.managers.ranmanager.lvapp.lvaphandler import LVAPHandler
 from empower.managers.ranmanager.lvapp.lvappconnection import LVAPPConnection
+from empower.managers.ranmanager.lvapp.resourcepool import BlockRegistry
 from empower.managers.ranmanager.lvapp.wtp import WTP
 
 DEFAULT_PORT = 4433
 
 
+def lvap_wtp(lvap):
+    """Return the address of the WTP hosting the downlink of an LVAP."""
+
+    return lvap.wtp.addr if lvap.wtp else None
+
+
+def vap_wtp(vap):
+    """Return the address of the WTP hosting a VAP."""
+
+    return vap.block.wtp.addr
+
+
 class LVAPPManager(RANManager):
     """LVAPP RAN Manager
 
     Parameters:
         port: the port on which the TCP server should listen (optional,
             default: 4433)
+        xid_timeout: how long to wait for a reply to a request, in ms
+            (optional, default: 10000)
+        capture: record all the southbound messages to this file
+            (optional, default: None)
+        stats_size: the number of samples kept for every statistics series
+            (optional, default: 512)
+        stats_max_series: the max number of statistics series, new series
+            are rejected when the store is full (optional, default: 4096)
     """
 
-    HANDLERS = [LVAPHandler, WTPHandler, BeaconHandler]
+    HANDLERS = [LVAPHandler, WTPHandler, BeaconHandler,
+                LVAPPTransactionsHandler, LVAPPStatsHandler]
 
-    def __init__(self, context, service_id, port):
+    def __init__(self, context, service_id, port, xid_timeout, capture,
+                 stats_size, stats_max_series):
 
         super().__init__(context=context,
                          service_id=service_id,
                          device_type=WTP,
                          connection_type=LVAPPConnection,
                          proto=lvapp,
-                         port=port)
+                         port=port,
+                         xid_timeout=xid_timeout,
+                         capture=capture,
+                         stats_size=stats_size,
+                         stats_max_series=stats_max_series)
+
+        # LVAPs and VAPs, grouped by SSID and by hosting WTP
+        self.lvaps = IndexedDict(ssid=attrgetter("ssid"), wtp=lvap_wtp)
+        self.vaps = IndexedDict(ssid=attrgetter("ssid"), wtp=vap_wtp)
 
-        self.lvaps = {}
-        self.vaps = {}
+        # The resource blocks of the connected WTPs
+        self.blocks = BlockRegistry()
 
 
-def launch(context, service_id, port=DEFAULT_PORT):
+def launch(context, service_id, port=DEFAULT_PORT, xid_timeout=XID_TIMEOUT,
+           capture=None, stats_size=SERIES_SIZE, stats_max_series=MAX_SERIES):
     """ Initialize the module. """
 
-    return LVAPPManager(context=context, service_id=service_id, port=port)
+    return LVAPPManager(context=context, service_id=service_id, port=port,
+                        xid_timeout=xid_timeout, capture=capture,
+                        stats_size=stats_size,
+                        stats_max_series=stats_max_series)
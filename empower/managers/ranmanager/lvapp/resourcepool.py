@@ -17,8 +17,12 @@
 
 """EmPOWER resouce pool and resource block classes."""
 
+from operator import attrgetter, itemgetter
+
 from empower_core.serialize import serializable_dict
 
+from empower.managers.ranmanager.indexeddict import IndexedDict
+
 BT_L20 = 0
 BT_HT20 = 1
 
@@ -36,11 +40,23 @@ class ResourcePool(list):
     """Resource pool.
 
     This extends the list in order to add a few filtering and sorting methods
+
+    Pools returned by a BlockRegistry answer the filtering methods from the
+    indexes of the registry.
     """
 
+    def __init__(self, blocks=(), registry=None):
+
+        super().__init__(blocks)
+
+        self.registry = registry
+
     def sort_by_rssi(self, addr):
         """Return list sorted by rssi for the specific address."""
 
+        if self.registry is not None:
+            return ResourcePool(self.registry.ranked(addr))
+
         filtered = [x for x in self if addr in x.ucqm]
 
         blocks = sorted(filtered,
@@ -52,6 +68,9 @@ class ResourcePool(list):
     def filter_by_channel(self, channel):
         """Return list sorted filtered by channel."""
 
+        if self.registry is not None:
+            return self.registry.filter("channel", channel)
+
         blocks = []
 
         for block in self.__iter__():
@@ -63,6 +82,9 @@ class ResourcePool(list):
     def filter_by_band(self, band):
         """Return list sorted filtered by band."""
 
+        if self.registry is not None:
+            return self.registry.filter("band", band)
+
         blocks = []
 
         for block in self.__iter__():
@@ -90,6 +112,132 @@ class ResourcePool(list):
         return ResourcePool()
 
 
+def block_wtp(block):
+    """Return the address of the WTP of a block."""
+
+    return block.wtp.addr
+
+
+class BlockRegistry:
+    """The resource blocks of all the connected WTPs.
+
+    Blocks are added when the capabilities of a WTP are received and removed
+    when the WTP disconnects. Blocks are indexed by channel, by band, by
+    hwaddr, and by WTP.
+
+    The registry also keeps an inverted UCQM index, i.e. for each station the
+    blocks that can hear it and the RSSI they reported. The index is updated
+    every time the UCQM of a block is replaced (see update_ucqm).
+
+    Attributes:
+        blocks: the blocks ((wtp address, block_id) -> block)
+        ucqm: the inverted UCQM (station -> {block key -> (rssi, block)})
+    """
+
+    def __init__(self):
+
+        self.blocks = IndexedDict(channel=attrgetter("channel"),
+                                  band=attrgetter("band"),
+                                  hwaddr=attrgetter("hwaddr"),
+                                  wtp=block_wtp)
+
+        # all the blocks, rebuilt only when the registry changes
+        self._pool = None
+
+        self.ucqm = {}
+
+        # blocks sorted by RSSI (station -> [block]), rebuilt only when the
+        # UCQM entries for the station change
+        self._ranked = {}
+
+    def add(self, block):
+        """Add a block (replacing the block with the same id, if any)."""
+
+        self.blocks[(block.wtp.addr, block.block_id)] = block
+        self._pool = None
+
+    def remove_wtp(self, addr):
+        """Remove all the blocks of a WTP."""
+
+        for key, block in list(self.blocks.view("wtp", addr).items()):
+
+            for sta in block.ucqm:
+                self.unrank(sta, key)
+
+            del self.blocks[key]
+
+        self._pool = None
+
+    def pool(self):
+        """Return a pool with all the blocks."""
+
+        if self._pool is None:
+            self._pool = list(self.blocks.values())
+
+        return ResourcePool(self._pool, registry=self)
+
+    def filter(self, index, value):
+        """Return a pool with the blocks whose index matches value."""
+
+        return ResourcePool(self.blocks.view(index, value).values())
+
+    def update_ucqm(self, block, ucqm):
+        """Replace the UCQM of a block and update the inverted index."""
+
+        key = (block.wtp.addr, block.block_id)
+
+        for sta in block.ucqm:
+            if sta not in ucqm:
+                self.unrank(sta, key)
+
+        block.ucqm = ucqm
+
+        for sta, entry in ucqm.items():
+
+            if sta not in self.ucqm:
+                self.ucqm[sta] = {}
+
+            self.ucqm[sta][key] = (entry['mov_rssi'], block)
+            self._ranked.pop(sta, None)
+
+    def unrank(self, sta, key):
+        """Remove a block from the inverted UCQM of a station."""
+
+        entries = self.ucqm.get(sta)
+
+        if not entries or key not in entries:
+            return
+
+        del entries[key]
+        self._ranked.pop(sta, None)
+
+        if not entries:
+            del self.ucqm[sta]
+
+    def ranked(self, sta):
+        """Return the blocks that can hear sta, sorted by RSSI."""
+
+        if sta not in self._ranked:
+            entries = self.ucqm.get(sta, {}).values()
+            self._ranked[sta] = [block for _, block in
+                                 sorted(entries, key=itemgetter(0),
+                                        reverse=True)]
+
+        return self._ranked[sta]
+
+    def by_hwaddr(self, hwaddr):
+        """Return the block with the specified hwaddr or None."""
+
+        for block in self.blocks.view("hwaddr", hwaddr).values():
+            return block
+
+        return None
+
+    def __len__(self):
+
+        return len(self.blocks)
+
+
 @serializable_dict
 class ResourceBlock:
     """A Wi-Fi AP interface.
@@ -22,7 +22,7 @@ from empower_core.launcher import srv_or_die
 
 import empower.managers.ranmanager.lvapp as lvapp
 
-from empower.managers.ranmanager.lvapp.resourcepool import ResourcePool
+from empower.managers.ranmanager.pointswriter import WRITER, TagSets
 
 EVERY = 2000
 
@@ -32,18 +32,30 @@ class EWiFiWorker(EWorker):
 
     MODULES = [lvapp]
 
-    def blocks(self):
-        """Return the ResourseBlocks available to this app."""
+    def __init__(self, context, **kwargs):
+
+        # interned tag sets, see tags()
+        self.tag_sets = TagSets()
+
+        super().__init__(context=context, **kwargs)
+
+    def tags(self, **extra):
+        """Return the tags of a data point, i.e. the params plus extra.
 
-        # Initialize the Resource Pool
-        pool = ResourcePool()
+        The returned dict is shared and must not be modified.
+        """
 
-        # Update the pool with all the available ResourseBlocks
-        for wtp in self.wtps.values():
-            for block in wtp.blocks.values():
-                pool.append(block)
+        return self.tag_sets.get(self.params, extra)
+
+    def write_points(self, points):
+        """Queue points for the time-series manager."""
+
+        WRITER.write(points)
+
+    def blocks(self):
+        """Return the ResourseBlocks available to this app."""
 
-        return pool
+        return srv_or_die("lvappmanager").blocks.pool()
 
     @property
     def wtps(self):
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Batched time-series writer."""
+
+import atexit
+import logging
+import threading
+
+from collections import deque
+
+from empower_core.launcher import srv
+from empower_core.serialize import serialize, serializable_dict
+
+# Max number of points waiting to be written
+BUFFER_SIZE = 65536
+
+# Max number of points per batch
+BATCH_SIZE = 5000
+
+# Max time a point waits before being written (in s)
+FLUSH_INTERVAL = 1.0
+
+# Max time to wait for the pending points to be written on exit (in s)
+STOP_TIMEOUT = 5.0
+
+# Drop policies
+DROP_OLDEST = "oldest"
+DROP_NEWEST = "newest"
+
+# Max number of interned tag sets per service
+TAGS_CACHE_SIZE = 4096
+
+
+def tsmanager_sink(points):
+    """Write a batch of points to the time-series manager database."""
+
+    # srv_or_die would exit the writer thread
+    tsmanager = srv("tsmanager")
+    client = tsmanager.influxdb_client if tsmanager else None
+
+    if not client:
+        raise IOError("Time-series manager not started")
+
+    client.write_points(points=serialize(points))
+
+
+class TagSets:
+    """The interned tag sets of a service.
+
+    A tag set is made of the service params plus a few extra tags. The same
+    dict is returned for the same extra tags until the params change, so it
+    must not be modified.
+    """
+
+    def __init__(self):
+
+        self.params = None
+        self.tags = {}
+
+    def get(self, params, extra):
+        """Return the tag set for params and extra."""
+
+        if params != self.params or len(self.tags) >= TAGS_CACHE_SIZE:
+            self.params = dict(params)
+            self.tags = {}
+
+        key = tuple(extra.items())
+
+        if key not in self.tags:
+            tags = dict(params)
+            tags.update(extra)
+            self.tags[key] = tags
+
+        return self.tags[key]
+
+
+@serializable_dict
+class PointsWriter:
+    """Batched time-series writer.
+
+    Points are appended to a bounded buffer by the ioloop and written to the
+    sink in batches by a background thread. A batch is written when
+    batch_size points are waiting or every interval seconds. The deque
+    operations are atomic so the buffer is shared without locks.
+
+    When the buffer is full either the oldest or the incoming points are
+    dropped, depending on the drop policy.
+
+    Attributes:
+        sink: function writing a list of points
+        size: the buffer size
+        batch_size: the max number of points per batch
+        interval: the max time between batches (in s)
+        policy: the drop policy (oldest or newest)
+    """
+
+    def __init__(self, sink=tsmanager_sink, size=BUFFER_SIZE,
+                 batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL,
+                 policy=DROP_OLDEST):
+
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError("Invalid drop policy %s" % policy)
+
+        self.log = logging.getLogger(self.__class__.__module__)
+
+        self.sink = sink
+        self.size = size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.policy = policy
+
+        self.buffer = deque(maxlen=size)
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.running = False
+
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def start(self):
+        """Start the writer thread."""
+
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name="pointswriter")
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the writer thread and write the pending points.
+
+        Wait at most timeout seconds (forever if None) for the thread.
+        """
+
+        if not self.running:
+            return
+
+        self.running = False
+        self.wakeup.set()
+        self.thread.join(timeout)
+
+        if self.thread.is_alive():
+            self.log.warning("Points writer still busy, %u points pending",
+                             len(self.buffer))
+            return
+
+        self.thread = None
+
+    def write(self, points):
+        """Queue points for writing."""
+
+        if not self.running:
+            self.start()
+
+        for point in points:
+
+            if len(self.buffer) == self.size:
+
+                self.dropped += 1
+
+                if self.policy == DROP_NEWEST:
+                    continue
+
+            self.buffer.append(point)
+            self.accepted += 1
+
+        if len(self.buffer) >= self.batch_size:
+            self.wakeup.set()
+
+    def run(self):
+        """Write batches until stopped.
+
+        If the thread dies it is restarted by the next write.
+        """
+
+        try:
+
+            while self.running:
+                self.wakeup.wait(self.interval)
+                self.wakeup.clear()
+                self.flush()
+
+            self.flush()
+
+        except BaseException as ex:
+            self.log.error("Points writer stopped: %r", ex)
+
+        finally:
+            self.running = False
+
+    def flush(self):
+        """Write all the queued points."""
+
+        while self.buffer:
+
+            batch = []
+
+            while self.buffer and len(batch) < self.batch_size:
+                batch.append(self.buffer.popleft())
+
+            try:
+                self.sink(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as ex:
+                self.errors += 1
+                self.log.error("Unable to write %u points: %s",
+                               len(batch), ex)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {
+            "size": self.size,
+            "batch_size": self.batch_size,
+            "interval": self.interval,
+            "policy": self.policy,
+            "queued": len(self.buffer),
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors
+        }
+
+
+# The writer shared by all the apps and workers, the pending points are
+# written when the process exits
+WRITER = PointsWriter()
+atexit.register(WRITER.stop, STOP_TIMEOUT)
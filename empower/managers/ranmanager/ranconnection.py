@@ -17,15 +17,28 @@
 
 """Base RAN Connection."""
 
-import time
 import logging
 
+from collections import OrderedDict
+
 import tornado.ioloop
 
+from tornado.iostream import StreamClosedError
+
 from empower_core.serialize import serializable_dict
 
-HELLO_PERIOD = 2000
-HB_PERIOD = 500
+from empower.managers.ranmanager.capture import INBOUND, OUTBOUND
+
+# Initial size of the per-connection receive buffer, the buffer is grown if a
+# longer message is received
+BUFFER_SIZE = 4096
+
+# Telemetry requests are held back while more than this many bytes are
+# waiting to be written to the socket
+OUTBOUND_BUDGET = 65536
+
+# Queued telemetry requests are dropped (oldest first) above this size
+TELEMETRY_BUDGET = 65536
 
 
 @serializable_dict
@@ -48,12 +61,35 @@ class RANConnection:
         self._seq = 0
         self._xid = 0
 
-        self.buffer = b''
-
+        # Receive buffer, messages are read in place and handed over to the
+        # parsers as memoryview slices
+        self.hdr_len = self.proto.HEADER_FMT.size
+        self.buffer = bytearray(BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+
+        # Send buffer, outgoing messages are encoded in place and written to
+        # the stream with a single write at the end of the ioloop iteration
+        self.wbuffer = bytearray(BUFFER_SIZE)
+        self.wlen = 0
+        self.flush_pending = False
+
+        # Bytes handed over to the stream and not yet written to the socket
+        self.inflight = 0
+        self.max_inflight = 0
+
+        # Telemetry requests waiting for the socket to drain, identical
+        # requests are coalesced ((pt_type, body) -> (xid, data))
+        self.telemetry = OrderedDict()
+        self.telemetry_bytes = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+        # Pending transactions (xid -> Transaction), see TransactionManager
         self.xids = {}
 
-        self.hb_worker = \
-            tornado.ioloop.PeriodicCallback(self.heartbeat_cb, HB_PERIOD)
+        # Liveness deadline, see LivenessScheduler
+        self.deadline = None
+        self.hb_token = None
 
         self.wait()
 
@@ -62,7 +98,15 @@ class RANConnection:
 
         out = {
             "proto": self.proto.__name__,
-            "addr": None
+            "addr": None,
+            "outbound": {
+                "inflight": self.inflight,
+                "max_inflight": self.max_inflight,
+                "telemetry_queued": len(self.telemetry),
+                "telemetry_bytes": self.telemetry_bytes,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped
+            }
         }
 
         if self.stream and self.stream.socket:
@@ -88,19 +132,214 @@ class RANConnection:
     def wait(self):
         """ Wait for incoming packets on signalling channel """
 
-        self.buffer = b''
+        future = self.stream.read_into(self.view[:self.hdr_len])
+        future.add_done_callback(self.on_read_header)
+
+    def on_read_header(self, future):
+        """Decode the fixed header and read the rest of the message."""
+
+        try:
+            future.result()
+        except StreamClosedError as stream_ex:
+            self.log.error(stream_ex)
+            return
+
+        hdr = self.proto.decode_header(self.buffer)
+
+        if hdr.length < self.hdr_len:
+            self.log.warning("Invalid message length %u", hdr.length)
+            self.stream.close()
+            return
+
+        if hdr.length > len(self.buffer):
+            self.grow_buffer(hdr.length)
+
+        if hdr.length == self.hdr_len:
+            self.on_read(hdr)
+            return
+
+        future = self.stream.read_into(self.view[self.hdr_len:hdr.length])
+        future.add_done_callback(lambda future: self.on_read_body(hdr, future))
+
+    def on_read_body(self, hdr, future):
+        """Message fully read."""
+
+        try:
+            future.result()
+        except StreamClosedError as stream_ex:
+            self.log.error(stream_ex)
+            return
+
+        self.on_read(hdr)
+
+    def on_read(self, hdr):
+        """Pass a fully received message to the southbound handler."""
+
+        if self.manager.recorder:
+            self.manager.recorder.record(INBOUND, hdr.device,
+                                         self.view[:hdr.length])
+
+        self.on_message(hdr, self.view[:hdr.length])
+
+        if not self.stream.closed():
+            self.wait()
+
+    def grow_buffer(self, size):
+        """Replace the receive buffer with a larger one."""
+
+        buffer = bytearray(max(size, 2 * len(self.buffer)))
+        buffer[:self.hdr_len] = self.view[:self.hdr_len]
+
+        self.buffer = buffer
+        self.view = memoryview(self.buffer)
+
+    def write_message(self, codec, msg):
+        """Encode a message at the end of the send buffer.
+
+        The length field of the message must have been already set. The
+        message is sent when the send buffer is flushed.
+        """
+
+        self.reserve(msg.length)
+        self.wlen = codec.encode_into(self.wbuffer, self.wlen, msg)
+        self.schedule_flush()
+
+    def write(self, data):
+        """Append an already encoded message to the send buffer."""
+
+        self.reserve(len(data))
+        self.wbuffer[self.wlen:self.wlen + len(data)] = data
+        self.wlen += len(data)
+        self.schedule_flush()
+
+    def enqueue(self, pt_type, data):
+        """Queue an encoded telemetry request.
+
+        Telemetry requests are sent after all the control messages and only
+        while the socket keeps up. A request identical to one that is still
+        queued replaces it, the oldest requests are dropped if the queue
+        exceeds TELEMETRY_BUDGET. The transactions of the requests that are
+        replaced or dropped are removed.
+        """
+
+        hdr = self.proto.decode_header(data)
+        key = (pt_type, bytes(data[self.hdr_len:]))
+
+        if key in self.telemetry:
+            self.coalesced += 1
+            self.discard(key)
+
+        self.telemetry[key] = (hdr.xid, data)
+        self.telemetry_bytes += len(data)
 
-        hdr_len = self.proto.HEADER.sizeof()
+        while self.telemetry_bytes > TELEMETRY_BUDGET:
+            self.dropped += 1
+            self.discard(next(iter(self.telemetry)))
 
-        future = self.stream.read_bytes(hdr_len)
-        future.add_done_callback(self.on_read)
+        self.schedule_flush()
+
+    def discard(self, key):
+        """Remove a queued telemetry request and its transaction."""
+
+        xid, data = self.telemetry.pop(key)
+        self.telemetry_bytes -= len(data)
+
+        if xid in self.xids:
+            self.manager.transactions.remove(self.xids[xid])
+
+    def reserve(self, size):
+        """Make room for size bytes at the end of the send buffer."""
+
+        if self.wlen + size <= len(self.wbuffer):
+            return
+
+        wbuffer = bytearray(max(self.wlen + size, 2 * len(self.wbuffer)))
+        wbuffer[:self.wlen] = self.wbuffer[:self.wlen]
+
+        self.wbuffer = wbuffer
+
+    def schedule_flush(self):
+        """Flush the send buffer at the next ioloop iteration."""
+
+        if self.flush_pending:
+            return
+
+        self.flush_pending = True
+        tornado.ioloop.IOLoop.current().add_callback(self.flush)
+
+    def flush(self):
+        """Write all the pending messages to the stream.
+
+        Called once per ioloop iteration. Can be called directly in order to
+        send latency-critical messages immediately.
+        """
+
+        self.flush_pending = False
+
+        # telemetry goes after the control messages, as long as the socket
+        # is keeping up
+        while self.telemetry and \
+                self.inflight + self.wlen < OUTBOUND_BUDGET:
+            _, (_, data) = self.telemetry.popitem(last=False)
+            self.telemetry_bytes -= len(data)
+            self.reserve(len(data))
+            self.wbuffer[self.wlen:self.wlen + len(data)] = data
+            self.wlen += len(data)
+
+        if not self.wlen:
+            return
+
+        data = bytes(memoryview(self.wbuffer)[:self.wlen])
+        self.wlen = 0
+
+        if self.stream.closed():
+            self.log.warning("Stream closed, dropping %u bytes", len(data))
+            return
+
+        if self.manager.recorder:
+            self.manager.recorder.record_stream(OUTBOUND, data)
+
+        self.inflight += len(data)
+        self.max_inflight = max(self.max_inflight, self.inflight)
+
+        future = self.stream.write(data)
+        future.add_done_callback(lambda future: self.on_written(future,
+                                                                len(data)))
+
+    def on_written(self, future, size):
+        """Data handed over to the stream has been written to the socket."""
+
+        # retrieve the exception (if any), the stream has been closed
+        if future.exception():
+            return
+
+        self.inflight -= size
+
+        if self.telemetry:
+            self.schedule_flush()
+
+    def add_xid(self, pt_type, msg, callback, on_timeout=None):
+        """Wait for a reply to msg.
+
+        The callback is invoked when the reply is received, on_timeout (if
+        any) is invoked if no reply is received before the deadline.
+        """
+
+        self.manager.transactions.add(self, pt_type, msg, callback,
+                                      on_timeout)
+
+    def resolve_xid(self, msg):
+        """Invoke the callback of the request msg is answering to."""
+
+        txn = self.manager.transactions.complete(self, msg.xid)
+
+        if txn and txn.callback:
+            txn.callback(msg, self.device, txn.request)
 
     def send_message_to_self(self, target, pt_type):
         """Send a message to self."""
 
-        if pt_type in self.proto.PT_TYPES_HANDLERS:
-            for handler in self.proto.PT_TYPES_HANDLERS[pt_type]:
-                handler(target)
+        self.manager.dispatcher.notify(pt_type, target)
 
     def send_client_leave_message_to_self(self, client):
         """Send an CLIENT_LEAVE message to self."""
@@ -122,29 +361,32 @@ class RANConnection:
 
         self.send_message_to_self(self.device, self.proto.PT_DEVICE_DOWN)
 
-    def heartbeat_cb(self):
-        """Check if connection is still active."""
+    def heartbeat_timeout(self):
+        """No hello received before the deadline, close the connection."""
 
         if self.device and not self.stream.closed():
-            timeout = HELLO_PERIOD * 3
-            if (self.device.last_seen_ts + (timeout / 1000)) < time.time():
-                self.log.warning('Client inactive %s at %r',
-                                 self.device.addr,
-                                 self.stream.socket.getpeername())
-                self.stream.close()
+            self.log.warning('Client inactive %s at %r',
+                             self.device.addr,
+                             self.stream.socket.getpeername())
+            self.stream.close()
 
-    def handle_message(self, method, msg):
-        """Handle incoming message."""
+    def handle_message(self, pt_type, msg):
+        """Handle incoming message.
 
-        raise NotImplementedError()
+        The message is passed to the default handler (if any), then to the
+        callbacks registered by the apps, and finally to the callback of the
+        request it is answering to (if any).
+        """
+
+        self.manager.dispatcher.dispatch(self, pt_type, msg)
 
-    def on_read(self, future):
-        """Assemble message from agent.
+    def on_message(self, hdr, data):
+        """Handle a message from the agent.
 
-        Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown.
+        The header has already been decoded by the framing layer, data is a
+        memoryview over the whole message (header included) which is valid
+        only until this method returns. The parsed packet is then passed to
+        the suitable method or dropped if the packet type in unknown.
 
         The implementation of the method is southbound-specific."""
 
@@ -157,7 +399,7 @@ class RANConnection:
 
         raise NotImplementedError()
 
-    def send_message(self, msg_type, msg, callback=None):
+    def send_message(self, msg_type, msg, callback=None, on_timeout=None):
         """Send message and set common parameters
 
         The implementation of the method is southbound-specific."""
@@ -21,6 +21,15 @@ from tornado.tcpserver import TCPServer
 
 from empower_core.service import EService
 
+from empower.managers.ranmanager.capture import CaptureWriter
+from empower.managers.ranmanager.dispatcher import Dispatcher
+from empower.managers.ranmanager.liveness import LivenessScheduler
+from empower.managers.ranmanager.pointswriter import WRITER
+from empower.managers.ranmanager.statsstore import StatsStore, \
+    SERIES_SIZE, MAX_SERIES
+from empower.managers.ranmanager.transactions import TransactionManager, \
+    XID_TIMEOUT
+
 HELLO_PERIOD = 2000
 HB_PERIOD = 500
 
@@ -38,20 +47,47 @@ class RANManager(EService):
 
     Parameters:
         port: the port on which the TCP server should listen (optional)
+        xid_timeout: how long to wait for a reply to a request, in ms
+            (optional, default: 10000)
+        capture: record all the southbound messages to this file
+            (optional, default: None)
+        stats_size: the number of samples kept for every statistics series
+            (optional, default: 512)
+        stats_max_series: the max number of statistics series, new series
+            are rejected when the store is full (optional, default: 4096)
     """
 
     HANDLERS = []
 
     def __init__(self, context, service_id, device_type, connection_type,
-                 proto, port):
+                 proto, port, xid_timeout=XID_TIMEOUT, capture=None,
+                 stats_size=SERIES_SIZE, stats_max_series=MAX_SERIES):
+
+        # the capture file is opened only when the service is started
+        self.recorder = None
+
+        # Recent statistics reported by the devices
+        self.stats = StatsStore()
 
-        super().__init__(context=context, service_id=service_id, port=port)
+        super().__init__(context=context, service_id=service_id, port=port,
+                         xid_timeout=xid_timeout, capture=capture,
+                         stats_size=stats_size,
+                         stats_max_series=stats_max_series)
 
         self.device_type = device_type
         self.connection_type = connection_type
         self.proto = proto
         self.devices = {}
 
+        self.dispatcher = Dispatcher(proto, connection_type)
+
+        self.transactions = TransactionManager(self.dispatcher.msg_name,
+                                               self.xid_timeout)
+
+        # A connection is closed if no hello is received for 3 periods
+        self.liveness = LivenessScheduler(HELLO_PERIOD * 3 / 1000,
+                                          HB_PERIOD / 1000)
+
         self.tcp_server = TCPServer()
         self.tcp_server.handle_stream = self.handle_stream
 
@@ -72,11 +108,76 @@ class RANManager(EService):
 
         self.params["port"] = int(value)
 
+    @property
+    def xid_timeout(self):
+        """Return the reply deadline (in ms)."""
+
+        return self.params["xid_timeout"]
+
+    @xid_timeout.setter
+    def xid_timeout(self, value):
+        """Set the reply deadline (in ms)."""
+
+        self.params["xid_timeout"] = int(value)
+
+        if hasattr(self, "transactions"):
+            self.transactions.timeout = self.params["xid_timeout"]
+
+    @property
+    def capture(self):
+        """Return the capture file."""
+
+        return self.params["capture"]
+
+    @capture.setter
+    def capture(self, value):
+        """Set the capture file, an empty value stops the capture."""
+
+        self.params["capture"] = value or None
+
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+        if self.params["capture"] and hasattr(self, "tcp_server"):
+            self.recorder = CaptureWriter(self.params["capture"], self.proto)
+
+    @property
+    def stats_size(self):
+        """Return the number of samples kept for every series."""
+
+        return self.params["stats_size"]
+
+    @stats_size.setter
+    def stats_size(self, value):
+        """Set the number of samples kept for the new series."""
+
+        self.params["stats_size"] = int(value)
+        self.stats.size = self.params["stats_size"]
+
+    @property
+    def stats_max_series(self):
+        """Return the max number of statistics series."""
+
+        return self.params["stats_max_series"]
+
+    @stats_max_series.setter
+    def stats_max_series(self, value):
+        """Set the max number of statistics series."""
+
+        self.params["stats_max_series"] = int(value)
+        self.stats.max_series = self.params["stats_max_series"]
+
     def start(self):
         """Start api manager."""
 
         super().start()
 
+        self.transactions.start()
+
+        if self.capture and not self.recorder:
+            self.recorder = CaptureWriter(self.capture, self.proto)
+
         for device in self.device_type.objects:
             self.devices[device.addr] = device
 
@@ -84,6 +185,18 @@ class RANManager(EService):
 
         self.log.info("Listening on port %u", self.port)
 
+    def stop(self):
+        """Stop api manager."""
+
+        self.transactions.stop()
+        self.liveness.stop()
+
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+        super().stop()
+
     def handle_stream(self, stream, address):
         """Handle incoming connection."""
 
@@ -102,6 +215,11 @@ class RANManager(EService):
 
         out = super().to_dict()
         out["connections"] = self.connections
+        out["dispatcher"] = self.dispatcher
+        out["transactions"] = self.transactions
+        out["recorder"] = self.recorder.to_dict() if self.recorder else None
+        out["writer"] = WRITER
+        out["stats"] = self.stats
         return out
 
     def create(self, addr, desc="Generic device"):
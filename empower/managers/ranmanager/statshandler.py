@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Statistics Handlers."""
+
+import empower_core.apimanager.apimanager as apimanager
+
+# Default time window (in s) and number of points of the returned series
+DEFAULT_WINDOW = 3600
+DEFAULT_POINTS = 360
+
+
+# pylint: disable=W0223
+class StatsHandler(apimanager.APIHandler):
+    """Base handler for accessing the recent statistics."""
+
+    @apimanager.validate(max_args=1)
+    def get(self, *args, **kwargs):
+        """Get the recent statistics.
+
+        Without a metric return the store summary. With a metric return the
+        series of every entity downsampled to points averages over the last
+        window seconds, or a single value per entity if an aggregate (mean,
+        min, max, p95, last, ewma, rate) is specified.
+
+        Args:
+
+            [0]: the metric (optional)
+
+        Query args:
+
+            window: the time window in seconds (optional, default 3600)
+            points: the number of points (optional, default 360)
+            aggregate: the aggregate (optional)
+
+        Example URLs:
+
+            GET /api/v1/lvapp/stats
+
+            {
+                "size": 512,
+                "max_series": 4096,
+                "evicted": 0,
+                "metrics": {
+                    "ucqm.mov_rssi": 12
+                }
+            }
+
+            GET /api/v1/lvapp/stats/ucqm.mov_rssi?window=60&points=4
+
+            {
+                "00:0D:B9:2F:56:64/0/60:F4:45:D0:3B:FC": [
+                    [1571308021.2, -57.5],
+                    [1571308036.2, -58.0],
+                    [1571308051.2, -56.0],
+                    [1571308066.2, -57.0]
+                ]
+            }
+
+            GET /api/v1/lvapp/stats/ucqm.mov_rssi?window=60&aggregate=p95
+
+            {
+                "00:0D:B9:2F:56:64/0/60:F4:45:D0:3B:FC": -56.2
+            }
+        """
+
+        store = self.service.stats
+
+        if not args:
+            return store
+
+        metric = args[0]
+
+        window = float(self.get_argument("window", DEFAULT_WINDOW))
+        points = int(self.get_argument("points", DEFAULT_POINTS))
+        aggregate = self.get_argument("aggregate", None)
+
+        if window <= 0 or points <= 0:
+            raise ValueError("window and points must be positive")
+
+        out = {}
+
+        for entity in store.entities(metric):
+
+            name = "/".join(str(x) for x in entity)
+
+            if aggregate:
+                out[name] = store.query(metric, entity, aggregate, window)
+            else:
+                out[name] = store.downsample(metric, entity, window, points)
+
+        return out
+
+
+# pylint: disable=W0223
+class LVAPPStatsHandler(StatsHandler):
+    """Handler for accessing the recent LVAPP statistics."""
+
+    URLS = [r"/api/v1/lvapp/stats/?",
+            r"/api/v1/lvapp/stats/([a-zA-Z0-9_.]*)/?"]
+
+
+# pylint: disable=W0223
+class VBSPStatsHandler(StatsHandler):
+    """Handler for accessing the recent VBSP statistics."""
+
+    URLS = [r"/api/v1/vbsp/stats/?",
+            r"/api/v1/vbsp/stats/([a-zA-Z0-9_.]*)/?"]
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""In-memory store for recent RAN statistics."""
+
+import time
+
+import numpy as np
+
+from empower_core.serialize import serializable_dict
+
+# Samples kept for each series
+SERIES_SIZE = 512
+
+# Max number of series, new series are rejected when full
+MAX_SERIES = 4096
+
+# Smoothing factor of the exponentially weighted moving average
+EWMA_ALPHA = 0.3
+
+
+def ewma(_, values, alpha=EWMA_ALPHA):
+    """Return the exponentially weighted moving average of values."""
+
+    weights = alpha * (1 - alpha) ** np.arange(len(values) - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (len(values) - 1)
+
+    return float(np.dot(weights, values))
+
+
+def rate(times, values):
+    """Return the rate of change of values (per second)."""
+
+    if len(values) < 2 or times[-1] == times[0]:
+        return None
+
+    return float((values[-1] - values[0]) / (times[-1] - times[0]))
+
+
+AGGREGATES = {
+    "mean": lambda _, values: float(np.mean(values)),
+    "min": lambda _, values: float(np.min(values)),
+    "max": lambda _, values: float(np.max(values)),
+    "p95": lambda _, values: float(np.percentile(values, 95)),
+    "last": lambda _, values: float(values[-1]),
+    "ewma": ewma,
+    "rate": rate
+}
+
+
+class RingBuffer:
+    """Fixed size series of (timestamp, value) samples.
+
+    Timestamps and values are two rows of the same array, the oldest sample
+    is overwritten when the buffer is full.
+    """
+
+    __slots__ = ("data", "index", "count")
+
+    def __init__(self, size):
+
+        self.data = np.zeros((2, size))
+        self.index = 0
+        self.count = 0
+
+    def append(self, timestamp, value):
+        """Add a sample."""
+
+        self.data[0, self.index] = timestamp
+        self.data[1, self.index] = value
+
+        self.index = (self.index + 1) % self.data.shape[1]
+        self.count = min(self.count + 1, self.data.shape[1])
+
+    def extend(self, timestamps, values):
+        """Add a batch of samples."""
+
+        size = self.data.shape[1]
+
+        # only the last size samples are kept
+        timestamps = timestamps[-size:]
+        values = values[-size:]
+
+        first = min(len(values), size - self.index)
+        second = len(values) - first
+
+        self.data[0, self.index:self.index + first] = timestamps[:first]
+        self.data[1, self.index:self.index + first] = values[:first]
+
+        self.data[0, :second] = timestamps[first:]
+        self.data[1, :second] = values[first:]
+
+        self.index = (self.index + len(values)) % size
+        self.count = min(self.count + len(values), size)
+
+    def window(self, window=None, now=None):
+        """Return the timestamps and values of the last window seconds."""
+
+        if self.count < self.data.shape[1]:
+            data = self.data[:, :self.count]
+        else:
+            data = np.roll(self.data, -self.index, axis=1)
+
+        if window:
+            data = data[:, data[0] >= (now or time.time()) - window]
+
+        return data[0], data[1]
+
+    def __len__(self):
+
+        return self.count
+
+
+@serializable_dict
+class StatsStore:
+    """In-memory store for recent RAN statistics.
+
+    Samples are kept in a ring buffer for each (metric, entity) pair, where
+    entity is a tuple, e.g. ("ucqm.mov_rssi", (wtp, block_id, sta)). The
+    memory used is bounded by size and max_series. When the store is full,
+    samples for new series are rejected, the series of an entity must be
+    removed when the entity goes away (see remove_entities).
+
+    Attributes:
+        size: the samples kept for each series
+        max_series: the max number of series
+        series: the ring buffers ((metric, entity) -> RingBuffer)
+        elements: the series of each entity element (element -> set of keys)
+        rejected: the samples rejected because the store was full
+    """
+
+    def __init__(self, size=SERIES_SIZE, max_series=MAX_SERIES):
+
+        self.size = size
+        self.max_series = max_series
+        self.series = {}
+        self.elements = {}
+        self.rejected = 0
+
+    def buffer(self, metric, entity):
+        """Return the series of (metric, entity) for writing.
+
+        The series is created if needed, None is returned if the store is
+        full.
+        """
+
+        key = (metric, entity)
+
+        if key in self.series:
+            return self.series[key]
+
+        if len(self.series) >= self.max_series:
+            self.rejected += 1
+            return None
+
+        self.series[key] = RingBuffer(self.size)
+
+        for element in entity:
+            self.elements.setdefault(element, set()).add(key)
+
+        return self.series[key]
+
+    def append(self, metric, entity, value, timestamp=None):
+        """Add a sample to the series of (metric, entity)."""
+
+        buffer = self.buffer(metric, entity)
+
+        if buffer is not None:
+            buffer.append(timestamp or time.time(), value)
+
+    def extend(self, metric, entity, values, timestamps):
+        """Add a batch of samples to the series of (metric, entity)."""
+
+        if not len(values):
+            return
+
+        buffer = self.buffer(metric, entity)
+
+        if buffer is not None:
+            buffer.extend(timestamps, values)
+
+    def remove(self, metric, entity):
+        """Remove the series of (metric, entity)."""
+
+        key = (metric, entity)
+
+        if self.series.pop(key, None) is None:
+            return
+
+        for element in entity:
+
+            keys = self.elements.get(element)
+
+            if keys is None:
+                continue
+
+            keys.discard(key)
+
+            if not keys:
+                del self.elements[element]
+
+    def remove_entities(self, element, metrics=None):
+        """Remove the series whose entity includes element.
+
+        Only the series of the specified metrics are removed, if any.
+        """
+
+        for metric, entity in list(self.elements.get(element, ())):
+            if not metrics or metric in metrics:
+                self.remove(metric, entity)
+
+    def entities(self, metric):
+        """Return the entities having a series for metric."""
+
+        return [entity for name, entity in self.series if name == metric]
+
+    def query(self, metric, entity, aggregate="mean", window=None):
+        """Aggregate the last window seconds of a series.
+
+        Return None if there are no samples.
+        """
+
+        if aggregate not in AGGREGATES:
+            raise ValueError("Invalid aggregate %s" % aggregate)
+
+        buffer = self.series.get((metric, entity))
+
+        if not buffer:
+            return None
+
+        times, values = buffer.window(window)
+
+        if not values.size:
+            return None
+
+        return AGGREGATES[aggregate](times, values)
+
+    def downsample(self, metric, entity, window, points):
+        """Return the last window seconds of a series as points averages.
+
+        The result is a list of [timestamp, value] pairs, empty intervals
+        are left out.
+        """
+
+        buffer = self.series.get((metric, entity))
+
+        if not buffer:
+            return []
+
+        now = time.time()
+        start = now - window
+        step = window / points
+
+        times, values = buffer.window(window, now)
+
+        bins = np.minimum(((times - start) // step).astype(int), points - 1)
+
+        sums = np.bincount(bins, weights=values, minlength=points)
+        counts = np.bincount(bins, minlength=points)
+
+        return [[float(start + i * step), float(sums[i] / counts[i])]
+                for i in np.flatnonzero(counts)]
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        metrics = {}
+
+        for metric, _ in self.series:
+            metrics[metric] = metrics.get(metric, 0) + 1
+
+        return {
+            "size": self.size,
+            "max_series": self.max_series,
+            "series": len(self.series),
+            "rejected": self.rejected,
+            "metrics": metrics
+        }
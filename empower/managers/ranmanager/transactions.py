@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Pending southbound transactions."""
+
+import time
+import logging
+
+import tornado.ioloop
+
+from empower_core.serialize import serializable_dict
+
+# Default deadline for a reply (in ms)
+XID_TIMEOUT = 10000
+
+# Timing wheel resolution (in ms) and number of slots
+WHEEL_TICK = 250
+WHEEL_SLOTS = 64
+
+# Upper bounds of the latency histogram buckets (in ms)
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+@serializable_dict
+class LatencyHistogram:
+    """Request to response latency histogram for a message type."""
+
+    def __init__(self):
+
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, latency):
+        """Add a new sample (in ms)."""
+
+        index = 0
+
+        for bound in LATENCY_BUCKETS:
+            if latency <= bound:
+                break
+            index += 1
+
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += latency
+
+        if self.min is None or latency < self.min:
+            self.min = latency
+
+        if self.max is None or latency > self.max:
+            self.max = latency
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        buckets = {"<=%u" % bound: self.buckets[i]
+                   for i, bound in enumerate(LATENCY_BUCKETS)}
+
+        buckets["inf"] = self.buckets[-1]
+
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "min": self.min,
+            "max": self.max,
+            "avg": self.total / self.count if self.count else None,
+            "buckets": buckets
+        }
+
+
+class Transaction:
+    """A request waiting for a reply."""
+
+    __slots__ = ("xid", "pt_type", "request", "callback", "on_timeout",
+                 "connection", "device", "sent", "slot", "rounds")
+
+    def __init__(self, connection, pt_type, request, callback, on_timeout):
+
+        self.xid = request.xid
+        self.pt_type = pt_type
+        self.request = request
+        self.callback = callback
+        self.on_timeout = on_timeout
+        self.connection = connection
+        self.device = connection.device
+        self.sent = time.time()
+        self.slot = None
+        self.rounds = 0
+
+
+@serializable_dict
+class TransactionManager:
+    """Pending transactions of all the connections of a RAN manager.
+
+    Transactions are stored in the xids dict of their connection and in a
+    hashed timing wheel shared by all the connections. The wheel advances
+    one slot every tick, transactions still pending when their deadline
+    expires are removed and their timeout callback (if any) is invoked.
+
+    Request to response latencies are tracked per message type.
+
+    Attributes:
+        name: function returning the name of a message type
+        timeout: the default deadline (in ms)
+        wheel: the timing wheel, a list of sets of transactions
+        histograms: the latency histograms (pt_type -> LatencyHistogram)
+    """
+
+    def __init__(self, name, timeout=XID_TIMEOUT, tick=WHEEL_TICK,
+                 slots=WHEEL_SLOTS):
+
+        self.log = logging.getLogger(self.__class__.__module__)
+
+        self.name = name
+        self.timeout = timeout
+        self.tick = tick
+
+        self.wheel = [set() for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+
+        self.histograms = {}
+
+        self.worker = tornado.ioloop.PeriodicCallback(self.advance, tick)
+
+    def start(self):
+        """Start the timing wheel."""
+
+        self.worker.start()
+
+    def stop(self):
+        """Stop the timing wheel."""
+
+        self.worker.stop()
+
+    def histogram(self, pt_type):
+        """Return the latency histogram for pt_type."""
+
+        if pt_type not in self.histograms:
+            self.histograms[pt_type] = LatencyHistogram()
+
+        return self.histograms[pt_type]
+
+    def add(self, connection, pt_type, request, callback, on_timeout=None,
+            timeout=None):
+        """Add a new transaction and return it.
+
+        The transaction expires after timeout ms (default: self.timeout).
+        """
+
+        txn = Transaction(connection, pt_type, request, callback, on_timeout)
+
+        # a pending transaction with the same xid is replaced
+        if txn.xid in connection.xids:
+            self.remove(connection.xids[txn.xid])
+
+        ticks = max(1, -(-(timeout or self.timeout) // self.tick))
+
+        txn.slot = (self.cursor + ticks) % len(self.wheel)
+        txn.rounds = (ticks - 1) // len(self.wheel)
+
+        self.wheel[txn.slot].add(txn)
+        self.pending += 1
+
+        connection.xids[txn.xid] = txn
+
+        return txn
+
+    def remove(self, txn):
+        """Remove a transaction from the wheel and from its connection."""
+
+        if txn.slot is None:
+            return
+
+        self.wheel[txn.slot].discard(txn)
+        self.pending -= 1
+        txn.slot = None
+
+        if txn.connection.xids.get(txn.xid) is txn:
+            del txn.connection.xids[txn.xid]
+
+    def complete(self, connection, xid):
+        """Complete the transaction xid and return it.
+
+        Return None if no transaction is pending for xid.
+        """
+
+        txn = connection.xids.get(xid)
+
+        if not txn:
+            return None
+
+        self.remove(txn)
+        self.histogram(txn.pt_type).update((time.time() - txn.sent) * 1000)
+
+        return txn
+
+    def advance(self):
+        """Advance the wheel by one slot and expire transactions."""
+
+        self.cursor = (self.cursor + 1) % len(self.wheel)
+
+        expired = []
+
+        for txn in self.wheel[self.cursor]:
+            if txn.rounds:
+                txn.rounds -= 1
+            else:
+                expired.append(txn)
+
+        for txn in expired:
+
+            self.remove(txn)
+            self.histogram(txn.pt_type).timeouts += 1
+
+            self.log.debug("Transaction %u (%s) to %s expired", txn.xid,
+                           self.name(txn.pt_type), txn.device)
+
+            if not txn.on_timeout:
+                continue
+
+            try:
+                txn.on_timeout(txn.request, txn.device)
+            except Exception as ex:
+                self.log.exception(ex)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {
+            "timeout": self.timeout,
+            "pending": self.pending,
+            "latency": {self.name(k): v for k, v in self.histograms.items()}
+        }
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Transactions Handlers."""
+
+import empower_core.apimanager.apimanager as apimanager
+
+
+# pylint: disable=W0223
+class TransactionsHandler(apimanager.APIHandler):
+    """Base handler for accessing the pending transactions."""
+
+    @apimanager.validate(max_args=0)
+    def get(self, *args, **kwargs):
+        """Get the pending transactions and the latency histograms.
+
+        Example URLs:
+
+            GET /api/v1/lvapp/transactions
+
+            {
+                "timeout": 10000,
+                "pending": 2,
+                "latency": {
+                    "wcs_request": {
+                        "count": 120,
+                        "timeouts": 1,
+                        "min": 3.1,
+                        "max": 48.2,
+                        "avg": 7.9,
+                        "buckets": {
+                            "<=1": 0,
+                            "<=2": 0,
+                            "<=5": 31,
+                            "<=10": 77,
+                            ...
+                            "inf": 0
+                        }
+                    }
+                }
+            }
+        """
+
+        return self.service.transactions
+
+
+# pylint: disable=W0223
+class LVAPPTransactionsHandler(TransactionsHandler):
+    """Handler for accessing the pending LVAPP transactions."""
+
+    URLS = [r"/api/v1/lvapp/transactions/?"]
+
+
+# pylint: disable=W0223
+class VBSPTransactionsHandler(TransactionsHandler):
+    """Handler for accessing the pending VBSP transactions."""
+
+    URLS = [r"/api/v1/vbsp/transactions/?"]
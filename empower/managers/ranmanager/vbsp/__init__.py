@@ -17,6 +17,10 @@
 
 """VBSP RAN Manager."""
 
+import struct
+
+from collections import namedtuple
+
 from construct import Struct, Int8ub, Int16ub, Int32ub, Flag, Bytes, Bit, \
     BitStruct, Padding, BitsInteger, Array, GreedyRange, Byte, this, Int64ub
 
@@ -65,6 +69,12 @@ HEADER = Struct(
     "xid" / Int32ub,
 )
 
+# Precompiled version of HEADER used by the framing layer
+HEADER_FMT = struct.Struct(">BBHI2s6sII")
+
+Header = namedtuple("Header", "version msg_type crud_result action length "
+                              "device seq xid")
+
 PACKET = Struct(
     "version" / Int8ub,
     "flags" / BitStruct(
@@ -138,9 +148,38 @@ PT_TYPES_HANDLERS = {}
 for k in PT_TYPES:
     PT_TYPES_HANDLERS[k] = []
 
+# Bumped every time the tables above are modified, the dispatchers rebuild
+# their routing tables when this changes
+GENERATION = 0
 
-def register_message(pt_type, parser):
-    """Register new message and a new handler."""
+# Telemetry requests, sent with a lower priority than the control messages
+# (see RANConnection.enqueue)
+TELEMETRY = set()
+
+
+def decode_header(buf):
+    """Decode the fixed header at the beginning of buf."""
+
+    version, flags, tsrc, length, _, device, seq, xid = \
+        HEADER_FMT.unpack_from(buf)
+
+    return Header(version, flags >> 7, tsrc >> 14, tsrc & 0x3FFF, length,
+                  device, seq, xid)
+
+
+def register_message(pt_type, parser, telemetry=False):
+    """Register new message and a new handler.
+
+    Telemetry requests (e.g. statistics polls) are sent with a lower priority
+    than the control messages and can be coalesced or dropped if the device
+    is slow to drain its socket.
+    """
+
+    global GENERATION
+    GENERATION += 1
+
+    if telemetry:
+        TELEMETRY.add(pt_type)
 
     if pt_type not in PT_TYPES:
         PT_TYPES[pt_type] = parser
@@ -152,6 +191,9 @@ def register_message(pt_type, parser):
 def register_callbacks(app, callback_str='handle_'):
     """Register callbacks."""
 
+    global GENERATION
+    GENERATION += 1
+
     for pt_type in PT_TYPES_HANDLERS:
 
         if not PT_TYPES[pt_type]:
@@ -167,6 +209,9 @@ def register_callbacks(app, callback_str='handle_'):
 def unregister_callbacks(app, callback_str='handle_'):
     """Unregister callbacks."""
 
+    global GENERATION
+    GENERATION += 1
+
     for pt_type in PT_TYPES_HANDLERS:
 
         if not PT_TYPES[pt_type]:
@@ -182,6 +227,9 @@ def unregister_callbacks(app, callback_str='handle_'):
 def register_callback(pt_type, handler):
     """Register new message and a new handler."""
 
+    global GENERATION
+    GENERATION += 1
+
     if pt_type not in PT_TYPES:
         raise KeyError("Packet type %u undefined")
 
@@ -194,6 +242,9 @@ def register_callback(pt_type, handler):
 def unregister_callback(pt_type, handler):
     """Register new message and a new handler."""
 
+    global GENERATION
+    GENERATION += 1
+
     if pt_type not in PT_TYPES:
         raise KeyError("Packet type %u undefined")
 
@@ -18,35 +18,31 @@
 """EmPOWER cell pool and cell classes."""
 
 from empower_core.serialize import serializable_dict
+from empower_core.launcher import srv_or_die
 
 
 class CellPool(list):
     """Cell pool.
 
     Extends the list in order to add a few filtering and sorting methods
-    """
-
-    def sort_by_rsrp(self, ue_id):
-        """Return list sorted by rsrp for the specified address."""
 
-        filtered = [x for x in self if ue_id in x.ue_measurements]
+    Sorting uses the measurements matrix of the VBSP manager, cells not
+    measured by the UE are left out.
+    """
 
-        cells = sorted(filtered,
-                       key=lambda x: x.ue_measurements[ue_id]['rsrp'],
-                       reverse=True)
+    def sort_by_rsrp(self, imsi):
+        """Return list sorted by rsrp for the specified UE."""
 
-        return CellPool(cells)
+        measurements = srv_or_die("vbspmanager").ue_measurements
 
-    def sort_by_rsrq(self, ue_id):
-        """Return list sorted by rsrq for the specified address."""
+        return CellPool(measurements.rank(imsi, "rsrp", self))
 
-        filtered = [x for x in self if ue_id in x.ue_measurements]
+    def sort_by_rsrq(self, imsi):
+        """Return list sorted by rsrq for the specified UE."""
 
-        cells = sorted(filtered,
-                       key=lambda x: x.ue_measurements[ue_id]['rsrq'],
-                       reverse=True)
+        measurements = srv_or_die("vbspmanager").ue_measurements
 
-        return CellPool(cells)
+        return CellPool(measurements.rank(imsi, "rsrq", self))
 
     def first(self):
         """Return first entry in the list."""
@@ -78,7 +74,6 @@ class Cell:
         dl_bandwidth: downlink bandwidth
         ul_earfcn: uplink center frequency
         ul_bandwidth: uplink bandwidth
-        ue_measurements: UE measurements (RSRP/RSRQ)
         cell_measurements: cell measurements
     """
 
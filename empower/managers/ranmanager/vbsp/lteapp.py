@@ -18,6 +18,7 @@
 """Base Wi-Fi App class."""
 
 from empower_core.app import EApp
+from empower_core.launcher import srv_or_die
 
 import empower.managers.ranmanager.vbsp as vbsp
 
@@ -42,6 +43,12 @@ class ELTEApp(EApp):
 
         return pool
 
+    @property
+    def ue_measurements(self):
+        """Return the UE measurements matrix."""
+
+        return srv_or_die("vbspmanager").ue_measurements
+
     @property
     def vbses(self):
         """Return the VBSes available to this app."""
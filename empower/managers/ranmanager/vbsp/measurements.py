@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""UE measurements matrix."""
+
+import numpy as np
+
+METRICS = {"rsrp": 0, "rsrq": 1}
+
+INITIAL_SIZE = 16
+
+
+class MeasurementsMatrix:
+    """The latest RSRP/RSRQ reported by every UE for every cell.
+
+    Measurements are stored in a (metric, UE, cell) array, rows are indexed
+    by IMSI and columns by (VBS address, PCI). Missing measurements are NaN.
+    Rows and columns of departed UEs and cells are recycled and the array
+    doubles its size when full.
+
+    Attributes:
+        values: the measurements array
+        rows: the row of each UE (IMSI -> row)
+        columns: the column of each cell ((VBS address, PCI) -> column)
+        imsis: the IMSI of each row (None if unused)
+        cells: the cell of each column (None if unused)
+    """
+
+    def __init__(self, size=INITIAL_SIZE):
+
+        self.values = np.full((len(METRICS), size, size), np.nan)
+
+        self.rows = {}
+        self.columns = {}
+
+        self.imsis = [None] * size
+        self.cells = [None] * size
+
+        self.nb_rows = 0
+        self.nb_columns = 0
+
+        self.free_rows = []
+        self.free_columns = []
+
+    def _grow(self, axis):
+        """Double the size of the array along axis (1: rows, 2: columns)."""
+
+        shape = list(self.values.shape)
+        size = shape[axis]
+        shape[axis] = 2 * size
+
+        values = np.full(shape, np.nan)
+        values[:, :self.values.shape[1], :self.values.shape[2]] = self.values
+        self.values = values
+
+        if axis == 1:
+            self.imsis.extend([None] * size)
+        else:
+            self.cells.extend([None] * size)
+
+    def _row(self, imsi):
+        """Return the row of imsi, allocating one if needed."""
+
+        if imsi not in self.rows:
+
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = self.nb_rows
+                self.nb_rows += 1
+                if row == self.values.shape[1]:
+                    self._grow(1)
+
+            self.rows[imsi] = row
+            self.imsis[row] = imsi
+
+        return self.rows[imsi]
+
+    def _column(self, cell):
+        """Return the column of cell, allocating one if needed."""
+
+        key = (cell.vbs.addr, cell.pci)
+
+        if key not in self.columns:
+
+            if self.free_columns:
+                column = self.free_columns.pop()
+            else:
+                column = self.nb_columns
+                self.nb_columns += 1
+                if column == self.values.shape[2]:
+                    self._grow(2)
+
+            self.columns[key] = column
+
+        # the cell object is replaced when the VBS reconnects
+        self.cells[self.columns[key]] = cell
+
+        return self.columns[key]
+
+    def _metric(self, metric):
+        """Return the used part of the array for metric."""
+
+        if metric not in METRICS:
+            raise ValueError("Invalid metric %s" % metric)
+
+        return self.values[METRICS[metric], :self.nb_rows, :self.nb_columns]
+
+    def update(self, imsi, cell, rsrp, rsrq):
+        """Set the latest measurements of imsi for cell."""
+
+        row = self._row(imsi)
+        column = self._column(cell)
+
+        self.values[METRICS["rsrp"], row, column] = rsrp
+        self.values[METRICS["rsrq"], row, column] = rsrq
+
+    def remove_ue(self, imsi):
+        """Remove all the measurements of a UE."""
+
+        row = self.rows.pop(imsi, None)
+
+        if row is None:
+            return
+
+        self.values[:, row, :] = np.nan
+        self.imsis[row] = None
+        self.free_rows.append(row)
+
+    def remove_vbs(self, addr):
+        """Remove all the measurements for the cells of a VBS."""
+
+        for key in [x for x in self.columns if x[0] == addr]:
+
+            column = self.columns.pop(key)
+
+            self.values[:, :, column] = np.nan
+            self.cells[column] = None
+            self.free_columns.append(column)
+
+    def get(self, imsi):
+        """Return the measurements of imsi (cell -> {metric -> value})."""
+
+        row = self.rows.get(imsi)
+
+        if row is None:
+            return {}
+
+        rsrp = self.values[METRICS["rsrp"], row]
+        rsrq = self.values[METRICS["rsrq"], row]
+
+        return {self.cells[x]: {"rsrp": float(rsrp[x]),
+                                "rsrq": float(rsrq[x])}
+                for x in np.flatnonzero(~np.isnan(rsrp[:self.nb_columns]))}
+
+    def rank(self, imsi, metric="rsrp", cells=None):
+        """Return the cells measured by imsi, best first.
+
+        If cells is specified, only those cells are returned.
+        """
+
+        row = self.rows.get(imsi)
+
+        if row is None:
+            return []
+
+        values = self._metric(metric)[row]
+        measured = np.flatnonzero(~np.isnan(values))
+        order = measured[np.argsort(-values[measured], kind="stable")]
+
+        ranked = [self.cells[x] for x in order]
+
+        if cells is None:
+            return ranked
+
+        keys = {(x.vbs.addr, x.pci) for x in cells}
+
+        return [x for x in ranked if (x.vbs.addr, x.pci) in keys]
+
+    def best_cells(self, metric="rsrp"):
+        """Return the best cell for every UE (IMSI -> cell)."""
+
+        values = self._metric(metric)
+
+        if not values.size:
+            return {}
+
+        measured = ~np.isnan(values)
+        best = np.argmax(np.where(measured, values, -np.inf), axis=1)
+
+        return {self.imsis[row]: self.cells[best[row]]
+                for row in np.flatnonzero(measured.any(axis=1))}
+
+    def below(self, threshold, metric="rsrp"):
+        """Return the UEs below threshold for every cell (cell -> [IMSI])."""
+
+        columns, rows = np.nonzero(self._metric(metric).T < threshold)
+
+        out = {}
+
+        for column, row in zip(columns, rows):
+            out.setdefault(self.cells[column], []).append(self.imsis[row])
+
+        return out
+
+    def __len__(self):
+
+        return len(self.rows)
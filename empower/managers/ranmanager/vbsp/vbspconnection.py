@@ -18,9 +18,9 @@
 """VBSP Connection."""
 
 import time
+import logging
 
 from construct import Container
-from tornado.iostream import StreamClosedError
 
 from empower_core.imsi import IMSI
 from empower_core.etheraddress import EtherAddress
@@ -35,62 +35,44 @@ from empower.managers.ranmanager.vbsp import HELLO_SERVICE_PERIOD, \
 class VBSPConnection(RANConnection):
     """A persistent connection to a VBS."""
 
-    def on_read(self, future):
-        """Assemble message from agent.
+    def on_message(self, hdr, data):
+        """Handle a message from the agent.
 
-        Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown.
+        The header has already been decoded by the framing layer. The message
+        is parsed straight from the receive buffer and then passed to the
+        suitable method or dropped if the packet type in unknown.
         """
 
-        try:
-            self.buffer = self.buffer + future.result()
-        except StreamClosedError as stream_ex:
-            self.log.error(stream_ex)
-            return
-
-        hdr = self.proto.HEADER.parse(self.buffer)
-
-        if len(self.buffer) < hdr.length:
-            remaining = hdr.length - len(self.buffer)
-            future = self.stream.read_bytes(remaining)
-            future.add_done_callback(self.on_read)
-            return
-
         # Check if we know the message type
-        if hdr.tsrc.action not in self.proto.PT_TYPES:
-            self.log.warning("Unknown message type %u, ignoring.",
-                             hdr.tsrc.action)
+        entry = self.proto.PT_TYPES.get(hdr.action)
+
+        if not entry:
+            self.log.warning("Unknown message type %u, ignoring.", hdr.action)
             return
 
         # Check if the Device is among the ones we known
         addr = EtherAddress(hdr.device)
+        device = self.manager.devices.get(addr)
 
-        if addr not in self.manager.devices:
+        if not device:
             self.log.warning("Unknown Device %s, closing connection.", addr)
             self.stream.close()
             return
 
-        device = self.manager.devices[addr]
-
         # Log message informations
-        parser = self.proto.PT_TYPES[hdr.tsrc.action][0]
-        name = self.proto.PT_TYPES[hdr.tsrc.action][1]
-        msg = parser.parse(self.buffer)
-
-        tmp = self.proto.decode_msg(hdr.flags.msg_type, hdr.tsrc.crud_result)
+        parser, name = entry
+        msg = parser.parse(data)
 
-        self.log.debug("Got %s message (%s, %s) from %s seq %u", name,
-                       tmp[0], tmp[1], EtherAddress(addr), msg.seq)
+        if self.log.isEnabledFor(logging.DEBUG):
+            tmp = self.proto.decode_msg(hdr.msg_type, hdr.crud_result)
+            self.log.debug("Got %s message (%s, %s) from %s seq %u", name,
+                           tmp[0], tmp[1], addr, hdr.seq)
 
         # If Device is not online and is not connected, then the only message
         # type we can accept is HELLO_RESPONSE
         if not device.is_connected():
 
             if msg.tsrc.action != self.proto.PT_HELLO_SERVICE:
-                if not self.stream.closed():
-                    self.wait()
                 return
 
             # This is a new connection, set pointer to the device
@@ -102,8 +84,8 @@ class VBSPConnection(RANConnection):
             # Transition to connected state
             device.set_connected()
 
-            # Start hb worker
-            self.hb_worker.start()
+            # Start monitoring the connection
+            self.manager.liveness.add(self)
 
             # Send caps request
             self.send_caps_request()
@@ -116,44 +98,15 @@ class VBSPConnection(RANConnection):
                      self.proto.PT_CAPABILITIES_SERVICE)
 
             if msg.tsrc.action not in valid:
-
-                if not self.stream.closed():
-                    self.wait()
-
                 return
 
         # Otherwise handle message
         try:
-            self.handle_message(name, msg)
+            self.handle_message(hdr.action, msg)
         except Exception as ex:
             self.log.exception(ex)
             self.stream.close()
 
-        if not self.stream.closed():
-            self.wait()
-
-    def handle_message(self, method, msg):
-        """Handle incoming message."""
-
-        # If the default handler is defined then call it
-        handler_name = "_handle_%s" % method
-        if hasattr(self, handler_name):
-            handler = getattr(self, handler_name)
-            handler(msg)
-
-        # Call registered callbacks
-        if msg.tsrc.action in self.proto.PT_TYPES_HANDLERS:
-            for handler in self.proto.PT_TYPES_HANDLERS[msg.tsrc.action]:
-                handler(msg, self.device)
-
-        # Check if there are pending XIDs
-        if msg.xid in self.xids:
-            request = self.xids[msg.xid][0]
-            callback = self.xids[msg.xid][1]
-            if callback:
-                callback(msg, self.device, request)
-            del self.xids[msg.xid]
-
     def on_disconnect(self):
         """Handle device disconnection."""
 
@@ -163,12 +116,16 @@ class VBSPConnection(RANConnection):
         self.log.warning("Device disconnected: %s", self.device.addr)
 
         # Remove hosted Users
-        users = [user for user in self.manager.users.values()
-                 if user.cell.vbs.addr == self.device.addr]
+        users = self.manager.users.view("vbs", self.device.addr)
 
-        for user in list(users):
+        for user in list(users.values()):
             self.send_client_leave_message_to_self(user)
             del self.manager.users[user.imsi]
+            self.manager.ue_measurements.remove_ue(user.imsi)
+            self.manager.stats.remove_entities(user.imsi)
+
+        self.manager.ue_measurements.remove_vbs(self.device.addr)
+        self.manager.stats.remove_entities(self.device.addr)
 
         # reset state
         self.device.set_disconnected()
@@ -177,11 +134,11 @@ class VBSPConnection(RANConnection):
         self.device.cells = {}
         self.device = None
 
-        # Stop hb worker
-        self.hb_worker.stop()
+        # Stop monitoring the connection
+        self.manager.liveness.remove(self)
 
     def send_message(self, action, msg_type, crud_result, tlvs=None,
-                     callback=None):
+                     callback=None, on_timeout=None):
         """Send message and set common parameters."""
 
         parser = self.proto.PT_TYPES[action][0]
@@ -221,10 +178,13 @@ class VBSPConnection(RANConnection):
         self.log.debug("Sending %s message (%s, %s) to %s seq %u",
                        name, tmp[0], tmp[1], addr[0], msg.seq)
 
-        self.stream.write(parser.build(msg))
+        if action in self.proto.TELEMETRY:
+            self.enqueue(action, parser.build(msg))
+        else:
+            self.write(parser.build(msg))
 
         if callback:
-            self.xids[msg.xid] = (msg, callback)
+            self.add_xid(action, msg, callback, on_timeout)
 
         return msg.xid
 
@@ -288,6 +248,7 @@ class VBSPConnection(RANConnection):
         self.device.period = period
         self.device.last_seen = msg.seq
         self.device.last_seen_ts = time.time()
+        self.manager.liveness.touch(self)
 
     def _handle_capabilities_service(self, msg):
         """Handle an incoming CAPABILITIES_SERVICE message."""
@@ -352,6 +313,8 @@ class VBSPConnection(RANConnection):
 
                     self.send_client_leave_message_to_self(user)
                     del self.manager.users[imsi]
+                    self.manager.ue_measurements.remove_ue(imsi)
+                    self.manager.stats.remove_entities(imsi)
 
                     self.log.info("Removing user: %s", user)
 
@@ -17,41 +17,78 @@
 
 """VBSP RAN Manager."""
 
+from operator import attrgetter
+
 import empower.managers.ranmanager.vbsp as vbsp
 
 from empower.managers.ranmanager.ranmanager import RANManager
+from empower.managers.ranmanager.indexeddict import IndexedDict
+from empower.managers.ranmanager.transactions import XID_TIMEOUT
+from empower.managers.ranmanager.statsstore import SERIES_SIZE, MAX_SERIES
+from empower.managers.ranmanager.transactionshandler import \
+    VBSPTransactionsHandler
+from empower.managers.ranmanager.statshandler import VBSPStatsHandler
 from empower.managers.ranmanager.vbsp.vbshandler import VBSHandler
 from empower.managers.ranmanager.vbsp.userhandler import UserHandler
 from empower.managers.ranmanager.vbsp.vbspconnection import VBSPConnection
 from empower.managers.ranmanager.vbsp.vbs import VBS
+from empower.managers.ranmanager.vbsp.measurements import MeasurementsMatrix
 
 
 DEFAULT_PORT = 5533
 
 
+def user_vbs(user):
+    """Return the address of the VBS hosting a UE."""
+
+    return user.vbs.addr
+
+
 class VBSPManager(RANManager):
     """VBSP RAN Manager
 
     Parameters:
         port: the port on which the TCP server should listen (optional,
             default: 5533)
+        xid_timeout: how long to wait for a reply to a request, in ms
+            (optional, default: 10000)
+        capture: record all the southbound messages to this file
+            (optional, default: None)
+        stats_size: the number of samples kept for every statistics series
+            (optional, default: 512)
+        stats_max_series: the max number of statistics series, new series
+            are rejected when the store is full (optional, default: 4096)
     """
 
-    HANDLERS = [VBSHandler, UserHandler]
+    HANDLERS = [VBSHandler, UserHandler, VBSPTransactionsHandler,
+                VBSPStatsHandler]
 
-    def __init__(self, context, service_id, port):
+    def __init__(self, context, service_id, port, xid_timeout, capture,
+                 stats_size, stats_max_series):
 
         super().__init__(context=context,
                          service_id=service_id,
                          device_type=VBS,
                          connection_type=VBSPConnection,
                          proto=vbsp,
-                         port=port)
+                         port=port,
+                         xid_timeout=xid_timeout,
+                         capture=capture,
+                         stats_size=stats_size,
+                         stats_max_series=stats_max_series)
+
+        # UEs, grouped by PLMNID and by hosting VBS
+        self.users = IndexedDict(plmnid=attrgetter("plmnid"), vbs=user_vbs)
 
-        self.users = {}
+        # latest RSRP/RSRQ for every (UE, cell) pair
+        self.ue_measurements = MeasurementsMatrix()
 
 
-def launch(context, service_id, port=DEFAULT_PORT):
+def launch(context, service_id, port=DEFAULT_PORT, xid_timeout=XID_TIMEOUT,
+           capture=None, stats_size=SERIES_SIZE, stats_max_series=MAX_SERIES):
     """ Initialize the module. """
 
-    return VBSPManager(context=context, service_id=service_id, port=port)
+    return VBSPManager(context=context, service_id=service_id, port=port,
+                       xid_timeout=xid_timeout, capture=capture,
+                       stats_size=stats_size,
+                       stats_max_series=stats_max_series)
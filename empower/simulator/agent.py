@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Base simulated agent."""
+
+import time
+import random
+import asyncio
+import logging
+
+from empower_core.etheraddress import EtherAddress
+
+# Connection retry period (in s)
+RECONNECT_PERIOD = 1.0
+
+
+def local_addr(host, addr):
+    """Return the local address to be used by the device addr.
+
+    The RAN managers keep one connection per remote IP address, when the
+    controller runs on the loopback interface every device is bound to its
+    own 127.x.y.z address (derived from the device address).
+    """
+
+    if not host.startswith("127.") and host != "localhost":
+        return None
+
+    raw = EtherAddress(addr).to_raw()
+
+    return ("127.%u.%u.%u" % (raw[3], raw[4], raw[5]), 0)
+
+
+class Stats:
+    """Counters and latency samples shared by all the simulated agents.
+
+    Attributes:
+        sent: messages sent to the controller (name -> count)
+        received: messages received from the controller (name -> count)
+        latencies: latency samples (name -> list of ms)
+        failures: failed procedures (name -> count)
+        online: number of agents currently online
+    """
+
+    def __init__(self):
+
+        self.sent = {}
+        self.received = {}
+        self.latencies = {}
+        self.failures = {}
+        self.online = 0
+
+    def on_sent(self, name):
+        """Account for a message sent to the controller."""
+
+        self.sent[name] = self.sent.get(name, 0) + 1
+
+    def on_received(self, name):
+        """Account for a message received from the controller."""
+
+        self.received[name] = self.received.get(name, 0) + 1
+
+    def on_latency(self, name, latency):
+        """Add a latency sample (in s)."""
+
+        if name not in self.latencies:
+            self.latencies[name] = []
+
+        self.latencies[name].append(latency * 1000)
+
+    def on_failure(self, name):
+        """Account for a failed procedure."""
+
+        self.failures[name] = self.failures.get(name, 0) + 1
+
+    def percentile(self, name, percentile):
+        """Return the given percentile of the latency samples for name."""
+
+        samples = sorted(self.latencies.get(name, []))
+
+        if not samples:
+            return None
+
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+
+        return samples[index]
+
+
+class Agent:
+    """Base simulated agent.
+
+    Connects to the controller, reads the southbound messages using the
+    protocol framing and passes them to the _handle_<name> methods. The
+    connection is re-opened if it is closed by the controller.
+
+    Subclasses must set proto and implement the parse, on_connect and
+    msg_name methods.
+
+    Attributes:
+        addr: the device address
+        host: the controller address
+        port: the controller port
+        stats: the shared statistics
+        period: the hello period (in ms)
+    """
+
+    proto = None
+
+    def __init__(self, addr, host, port, stats, period=2000):
+
+        self.log = logging.getLogger("%s" % self.__class__.__module__)
+
+        self.addr = EtherAddress(addr)
+        self.raw_addr = self.addr.to_raw()
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.period = period
+
+        self.reader = None
+        self.writer = None
+        self.online = False
+        self.connected_ts = None
+
+        self._seq = 0
+        self._xid = 0
+
+        self.tasks = []
+
+    @property
+    def seq(self):
+        """Return next sequence id."""
+
+        self._seq += 1
+        return self._seq
+
+    @property
+    def xid(self):
+        """Return new xid."""
+
+        self._xid += 1
+        return self._xid
+
+    def msg_name(self, hdr):
+        """Return the name of the message described by hdr."""
+
+        raise NotImplementedError()
+
+    def parse(self, hdr, data):
+        """Parse a message."""
+
+        raise NotImplementedError()
+
+    def on_connect(self):
+        """Called when a new connection has been established."""
+
+        raise NotImplementedError()
+
+    def set_online(self):
+        """Mark the agent as online (the controller accepted it)."""
+
+        if self.online:
+            return
+
+        self.online = True
+        self.stats.online += 1
+        self.stats.on_latency("join", time.time() - self.connected_ts)
+
+    def write(self, name, data):
+        """Send an encoded message to the controller."""
+
+        if not self.writer or self.writer.is_closing():
+            return
+
+        self.writer.write(data)
+        self.stats.on_sent(name)
+
+    def spawn(self, coro):
+        """Run a coroutine for the lifetime of the current connection."""
+
+        task = asyncio.ensure_future(coro)
+        self.tasks.append(task)
+
+        return task
+
+    async def run(self, delay=0):
+        """Connect to the controller and serve the connection."""
+
+        await asyncio.sleep(delay)
+
+        while True:
+
+            try:
+                self.reader, self.writer = \
+                    await asyncio.open_connection(
+                        self.host, self.port,
+                        local_addr=local_addr(self.host, self.addr))
+            except OSError:
+                self.stats.on_failure("connect")
+                await asyncio.sleep(RECONNECT_PERIOD * random.random() + 1)
+                continue
+
+            self.connected_ts = time.time()
+            self.on_connect()
+
+            try:
+                await self.read_loop()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.stats.on_failure("disconnect")
+            finally:
+                self.close()
+
+            await asyncio.sleep(RECONNECT_PERIOD)
+
+    def close(self):
+        """Close the connection and stop all the connection tasks."""
+
+        for task in self.tasks:
+            task.cancel()
+
+        self.tasks = []
+
+        if self.online:
+            self.online = False
+            self.stats.online -= 1
+
+        if self.writer:
+            self.writer.close()
+
+        self.reader = None
+        self.writer = None
+
+    async def read_loop(self):
+        """Read and dispatch messages until the connection is closed."""
+
+        hdr_len = self.proto.HEADER_FMT.size
+
+        while True:
+
+            head = await self.reader.readexactly(hdr_len)
+            hdr = self.proto.decode_header(head)
+
+            if hdr.length > hdr_len:
+                data = head + await self.reader.readexactly(hdr.length -
+                                                            hdr_len)
+            else:
+                data = head
+
+            name = self.msg_name(hdr)
+            self.stats.on_received(name)
+
+            handler = getattr(self, "_handle_%s" % name, None)
+
+            if not handler:
+                continue
+
+            handler(self.parse(hdr, data))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound load-test harness.
+
+Provisions the simulated devices (and a Wi-Fi project whose ACL includes all
+the simulated stations) through the REST API, spins up the simulated WTPs
+and VBSes as asyncio tasks, and periodically reports the traffic generated
+by the agents, the handshake latencies, and the controller-side message
+rate and CPU usage.
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+
+import requests
+
+from empower.managers.ranmanager.lvapp.resourcepool import REVERSE_BANDS
+from empower.simulator.agent import Stats
+from empower.simulator.wtp import SimWTP, SimBlock
+from empower.simulator.vbs import SimVBS, SimCell
+
+REST_URL = "http://%s:%s@%s:%u/api/v1%s"
+
+PROJECT_ID = uuid.UUID("5f6f0e3a-1f5c-4e4b-9a57-7d3c2f0f5e11")
+
+LATENCIES = ["join", "probe", "auth", "assoc", "handshake"]
+
+
+def device_addr(prefix, index):
+    """Return the address of the index-th simulated device."""
+
+    return "%02X:%02X:00:%02X:%02X:%02X" % (prefix >> 8, prefix & 0xFF,
+                                            (index >> 16) & 0xFF,
+                                            (index >> 8) & 0xFF,
+                                            index & 0xFF)
+
+
+def station_addr(wtp, index):
+    """Return the address of the index-th station of a WTP."""
+
+    return bytes([0x06, (wtp >> 16) & 0xFF, (wtp >> 8) & 0xFF, wtp & 0xFF,
+                  (index >> 8) & 0xFF, index & 0xFF])
+
+
+def imsi(vbs, cell, index):
+    """Return the IMSI of the index-th UE of a cell."""
+
+    return 222930000000000 + vbs * 100000 + cell * 1000 + index
+
+
+class Harness:
+    """Southbound load-test harness."""
+
+    def __init__(self, args):
+
+        self.args = args
+        self.stats = Stats()
+        self.wtps = []
+        self.vbses = []
+
+        self.last = None
+        self.start = None
+
+        channels = [int(x) for x in args.channels.split(",")]
+        bands = [REVERSE_BANDS[x] for x in args.bands.split(",")]
+
+        for index in range(0, args.wtps):
+
+            addr = device_addr(0x0200, index)
+            raw = bytes.fromhex(addr.replace(":", ""))
+
+            blocks = []
+
+            for block_id in range(0, args.blocks):
+                hwaddr = bytes([0x02, 0x10 + block_id]) + raw[2:]
+                blocks.append(SimBlock(block_id, hwaddr,
+                                       channels[block_id % len(channels)],
+                                       bands[block_id % len(bands)]))
+
+            stations = [station_addr(index, x)
+                        for x in range(0, args.stations)]
+
+            self.wtps.append(SimWTP(addr, args.host, args.lvapp_port,
+                                    self.stats, blocks, stations))
+
+        for index in range(0, args.vbses):
+
+            addr = device_addr(0x0201, index)
+
+            cells = [SimCell(pci=cell, dl_earfcn=3400, ul_earfcn=21400,
+                             n_prbs=25,
+                             ues=[imsi(index, cell, x)
+                                  for x in range(0, args.ues)])
+                     for cell in range(0, args.cells)]
+
+            self.vbses.append(SimVBS(addr, args.host, args.vbsp_port,
+                                     self.stats, cells))
+
+    def rest(self, method, path, expected, data=None):
+        """Call the REST API."""
+
+        url = REST_URL % (self.args.user, self.args.password, self.args.host,
+                          self.args.rest_port, path)
+
+        if data is not None:
+            data["version"] = "1.0"
+
+        response = getattr(requests, method)(url, json=data)
+
+        if response.status_code not in expected:
+            print("%s %s: %u" % (method.upper(), path, response.status_code))
+
+        return response
+
+    def setup(self):
+        """Provision the simulated devices and the project."""
+
+        for wtp in self.wtps:
+            self.rest("post", "/wtps", (201, 400),
+                      {"addr": str(wtp.addr), "desc": "Simulated WTP"})
+
+        for vbs in self.vbses:
+            self.rest("post", "/vbses", (201, 400),
+                      {"addr": str(vbs.addr), "desc": "Simulated VBS"})
+
+        if not self.wtps:
+            return
+
+        allowed = {}
+
+        for wtp in self.wtps:
+            for sta in wtp.stations:
+                addr = ":".join("%02X" % x for x in sta)
+                allowed[addr] = {"addr": addr, "desc": "Simulated station"}
+
+        self.rest("post", "/projects/%s" % PROJECT_ID, (201, 400), {
+            "owner": self.args.user,
+            "desc": "Load test",
+            "wifi_props": {
+                "ssid": self.args.ssid,
+                "bssid_type": "shared",
+                "allowed": allowed
+            }
+        })
+
+    def teardown(self):
+        """Remove the simulated devices and the project."""
+
+        if self.wtps:
+            self.rest("delete", "/projects/%s" % PROJECT_ID, (204,))
+
+        for wtp in self.wtps:
+            self.rest("delete", "/wtps/%s" % wtp.addr, (204,))
+
+        for vbs in self.vbses:
+            self.rest("delete", "/vbses/%s" % vbs.addr, (204,))
+
+    def controller_stats(self):
+        """Return the messages handled by the controller and its CPU time."""
+
+        calls = 0
+
+        for manager in ("lvappmanager", "vbspmanager"):
+
+            try:
+                response = self.rest("get", "/managers/%s" % manager, (200,))
+                dispatcher = response.json().get("dispatcher", {})
+            except (requests.RequestException, ValueError):
+                continue
+
+            calls += sum(x["calls"] for x in dispatcher.values())
+
+        cpu = None
+
+        if self.args.pid:
+            with open("/proc/%u/stat" % self.args.pid) as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+            cpu = (int(fields[11]) + int(fields[12])) / \
+                os.sysconf("SC_CLK_TCK")
+
+        return calls, cpu
+
+    async def snapshot(self):
+        """Return the current counters."""
+
+        out = {
+            "time": time.time(),
+            "sent": sum(self.stats.sent.values()),
+            "received": sum(self.stats.received.values()),
+            "own_cpu": time.process_time()
+        }
+
+        # the REST calls must not block the agents
+        loop = asyncio.get_event_loop()
+        out["calls"], out["cpu"] = \
+            await loop.run_in_executor(None, self.controller_stats)
+
+        return out
+
+    async def report(self):
+        """Print the statistics since the last report."""
+
+        now = await self.snapshot()
+        last = self.last
+        self.last = now
+
+        elapsed = now["time"] - last["time"]
+
+        line = "[%6.1fs] online %u/%u sent %.0f/s recv %.0f/s " \
+               "controller %.0f msg/s" % \
+            (now["time"] - self.start, self.stats.online,
+             len(self.wtps) + len(self.vbses),
+             (now["sent"] - last["sent"]) / elapsed,
+             (now["received"] - last["received"]) / elapsed,
+             (now["calls"] - last["calls"]) / elapsed)
+
+        if now["cpu"] is not None:
+            line += " cpu %.0f%%" % \
+                (100 * (now["cpu"] - last["cpu"]) / elapsed)
+
+        line += " (harness cpu %.0f%%)" % \
+            (100 * (now["own_cpu"] - last["own_cpu"]) / elapsed)
+
+        print(line)
+        sys.stdout.flush()
+
+    def summary(self):
+        """Print the latency percentiles and the failures."""
+
+        print("%-10s %8s %10s %10s %10s" % ("latency", "samples", "p50",
+                                            "p95", "p99"))
+
+        for name in LATENCIES:
+
+            samples = len(self.stats.latencies.get(name, []))
+
+            if not samples:
+                continue
+
+            print("%-10s %8u %8.1fms %8.1fms %8.1fms" %
+                  (name, samples, self.stats.percentile(name, 50),
+                   self.stats.percentile(name, 95),
+                   self.stats.percentile(name, 99)))
+
+        for name, count in sorted(self.stats.failures.items()):
+            print("failures %s: %u" % (name, count))
+
+    async def run(self):
+        """Run the agents for the given duration."""
+
+        agents = self.wtps + self.vbses
+        tasks = []
+
+        for index, agent in enumerate(agents):
+            delay = self.args.stagger * index / max(1, len(agents))
+            tasks.append(asyncio.ensure_future(agent.run(delay)))
+
+        self.start = time.time()
+        self.last = await self.snapshot()
+
+        while time.time() - self.start < self.args.duration:
+            await asyncio.sleep(self.args.report)
+            await self.report()
+
+        for task in tasks:
+            task.cancel()
+
+        for agent in agents:
+            agent.close()
+
+
+def main(argv=None):
+    """Parse the command line and run the harness."""
+
+    parser = argparse.ArgumentParser(description="Southbound load test")
+
+    parser.add_argument("-r", "--host", dest="host", default="127.0.0.1",
+                        help="Controller address; default='127.0.0.1'")
+    parser.add_argument("--rest-port", dest="rest_port", type=int,
+                        default=8888, help="REST port; default=8888")
+    parser.add_argument("--lvapp-port", dest="lvapp_port", type=int,
+                        default=4433, help="LVAPP port; default=4433")
+    parser.add_argument("--vbsp-port", dest="vbsp_port", type=int,
+                        default=5533, help="VBSP port; default=5533")
+    parser.add_argument("-u", "--user", dest="user", default="root",
+                        help="EmPOWER admin user; default='root'")
+    parser.add_argument("-p", "--password", dest="password", default="root",
+                        help="EmPOWER admin password; default='root'")
+    parser.add_argument("-w", "--wtps", dest="wtps", type=int, default=100,
+                        help="Number of WTPs; default=100")
+    parser.add_argument("-b", "--blocks", dest="blocks", type=int, default=2,
+                        help="Resource blocks per WTP; default=2")
+    parser.add_argument("--channels", dest="channels", default="6,36",
+                        help="Channels assigned round-robin to the blocks; "
+                             "default='6,36'")
+    parser.add_argument("--bands", dest="bands", default="HT20",
+                        help="Bands assigned round-robin to the blocks; "
+                             "default='HT20'")
+    parser.add_argument("-s", "--stations", dest="stations", type=int,
+                        default=10, help="Stations per WTP; default=10")
+    parser.add_argument("--ssid", dest="ssid", default="EmPOWER-load",
+                        help="SSID of the test project")
+    parser.add_argument("-v", "--vbses", dest="vbses", type=int, default=0,
+                        help="Number of VBSes; default=0")
+    parser.add_argument("-c", "--cells", dest="cells", type=int, default=1,
+                        help="Cells per VBS; default=1")
+    parser.add_argument("--ues", dest="ues", type=int, default=10,
+                        help="UEs per cell; default=10")
+    parser.add_argument("-d", "--duration", dest="duration", type=float,
+                        default=60, help="Test duration in s; default=60")
+    parser.add_argument("--stagger", dest="stagger", type=float, default=0,
+                        help="Spread the connections over this many s; "
+                             "default=0 (connection storm)")
+    parser.add_argument("--report", dest="report", type=float, default=5,
+                        help="Report period in s; default=5")
+    parser.add_argument("--pid", dest="pid", type=int, default=None,
+                        help="Controller pid, used to report its CPU usage")
+    parser.add_argument("--no-setup", dest="setup", action="store_false",
+                        default=True, help="Do not provision the devices")
+    parser.add_argument("--teardown", dest="teardown", action="store_true",
+                        default=False, help="Remove the devices at the end")
+
+    args = parser.parse_args(argv)
+
+    harness = Harness(args)
+
+    if args.setup:
+        harness.setup()
+
+    loop = asyncio.get_event_loop()
+
+    try:
+        loop.run_until_complete(harness.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        harness.summary()
+
+    if args.teardown:
+        harness.teardown()
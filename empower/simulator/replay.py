@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Replay a southbound capture against a running controller.
+
+The messages received by the controller are read from a capture file (see
+the capture parameter of the RAN managers) and sent again, one connection
+per device, either preserving the original timing (optionally accelerated)
+or as fast as possible.
+"""
+
+import time
+import asyncio
+import argparse
+import importlib
+
+from empower_core.etheraddress import EtherAddress
+
+from empower.managers.ranmanager.capture import CaptureReader, INBOUND
+from empower.simulator.agent import local_addr
+
+DEFAULT_PORTS = {"lvapp": 4433, "vbsp": 5533}
+
+# With no pacing, wait for the socket buffers every this many messages
+DRAIN_EVERY = 256
+
+
+class Replay:
+    """Replay a southbound capture.
+
+    Attributes:
+        reader: the capture reader
+        host: the controller address
+        port: the controller port
+        speed: the speed-up factor, 0 means as fast as possible
+        sent: messages sent to the controller
+        received: messages received from the controller
+    """
+
+    def __init__(self, reader, host, port, speed=1.0):
+
+        self.reader = reader
+        self.proto = importlib.import_module("empower.managers.ranmanager.%s"
+                                             % reader.proto)
+        self.host = host
+        self.port = port
+        self.speed = speed
+
+        self.writers = {}
+        self.tasks = []
+
+        self.sent = 0
+        self.received = 0
+
+    async def connect(self, device):
+        """Open the connection for device."""
+
+        addr = EtherAddress(bytes(device))
+
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, local_addr=local_addr(self.host, addr))
+
+        self.writers[device] = writer
+        self.tasks.append(asyncio.ensure_future(self.drain(reader)))
+
+        return writer
+
+    async def drain(self, reader):
+        """Read and discard the messages sent by the controller."""
+
+        hdr_len = self.proto.HEADER_FMT.size
+
+        try:
+            while True:
+                hdr = self.proto.decode_header(
+                    await reader.readexactly(hdr_len))
+                if hdr.length > hdr_len:
+                    await reader.readexactly(hdr.length - hdr_len)
+                self.received += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def run(self):
+        """Send all the inbound messages, return the elapsed time."""
+
+        start = time.time()
+        first = None
+
+        for record in self.reader:
+
+            if record.direction != INBOUND:
+                continue
+
+            if first is None:
+                first = record.ts
+
+            if self.speed:
+                delay = start + (record.ts - first) / self.speed - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            writer = self.writers.get(record.device)
+
+            if not writer:
+                writer = await self.connect(record.device)
+
+            writer.write(record.data)
+            self.sent += 1
+
+            if not self.speed and not self.sent % DRAIN_EVERY:
+                await writer.drain()
+
+        for writer in self.writers.values():
+            await writer.drain()
+
+        return time.time() - start
+
+    def close(self):
+        """Close all the connections."""
+
+        for task in self.tasks:
+            task.cancel()
+
+        for writer in self.writers.values():
+            writer.close()
+
+
+def main(argv=None):
+    """Parse the command line and replay the capture."""
+
+    parser = argparse.ArgumentParser(description="Replay a capture")
+
+    parser.add_argument("capture", help="The capture file")
+    parser.add_argument("-r", "--host", dest="host", default="127.0.0.1",
+                        help="Controller address; default='127.0.0.1'")
+    parser.add_argument("-p", "--port", dest="port", type=int, default=None,
+                        help="Controller port; default: 4433 (lvapp) or "
+                             "5533 (vbsp)")
+    parser.add_argument("-s", "--speed", dest="speed", type=float,
+                        default=1.0,
+                        help="Speed-up factor, 0 replays the capture as "
+                             "fast as possible; default=1")
+    parser.add_argument("-w", "--wait", dest="wait", type=float, default=1.0,
+                        help="Wait for the replies for this many s after "
+                             "the last message; default=1")
+
+    args = parser.parse_args(argv)
+
+    reader = CaptureReader(args.capture)
+    port = args.port or DEFAULT_PORTS[reader.proto]
+
+    replay = Replay(reader, args.host, port, args.speed)
+
+    loop = asyncio.get_event_loop()
+
+    try:
+        elapsed = loop.run_until_complete(replay.run())
+        loop.run_until_complete(asyncio.sleep(args.wait))
+    finally:
+        replay.close()
+        reader.close()
+
+    print("%s: %u devices, %u messages sent in %.2fs (%.0f msg/s), "
+          "%u messages received" %
+          (reader.proto, len(replay.writers), replay.sent, elapsed,
+           replay.sent / elapsed if elapsed else 0, replay.received))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Simulated VBS."""
+
+import random
+import asyncio
+
+from construct import Container
+
+import empower.managers.ranmanager.vbsp as vbsp
+
+from empower.managers.ranmanager.vbsp.user import USER_STATUS_CONNECTED, \
+    USER_STATUS_DISCONNECTED
+from empower.simulator.agent import Agent
+
+# Period of the UE reports stream (in s)
+UE_REPORTS_PERIOD = 1.0
+
+
+class SimCell:
+    """A simulated cell."""
+
+    def __init__(self, pci, dl_earfcn, ul_earfcn, n_prbs, ues):
+
+        self.pci = pci
+        self.dl_earfcn = dl_earfcn
+        self.ul_earfcn = ul_earfcn
+        self.n_prbs = n_prbs
+
+        # imsi -> [tmsi, rnti, status]
+        self.ues = {imsi: [random.getrandbits(32), random.getrandbits(16),
+                           USER_STATUS_CONNECTED] for imsi in ues}
+
+
+class SimVBS(Agent):
+    """A simulated VBS.
+
+    Answers the capabilities and UE reports requests and, once online,
+    streams UE reports: every period a random UE attaches or detaches.
+
+    Attributes:
+        cells: the cells (a list of SimCells)
+    """
+
+    proto = vbsp
+
+    def __init__(self, addr, host, port, stats, cells, period=2000):
+
+        super().__init__(addr, host, port, stats, period)
+
+        self.cells = cells
+
+    def msg_name(self, hdr):
+        """Return the name of the message described by hdr."""
+
+        if not self.proto.PT_TYPES.get(hdr.action):
+            return "unknown"
+
+        return self.proto.PT_TYPES[hdr.action][1]
+
+    def parse(self, hdr, data):
+        """Parse a message."""
+
+        return vbsp.PACKET.parse(data)
+
+    def send(self, action, msg_type, tlvs, xid=None):
+        """Encode and send a message.
+
+        Each TLV is a (type, parser, Container) tuple.
+        """
+
+        msg = Container(version=vbsp.PT_VERSION,
+                        flags=Container(msg_type=msg_type),
+                        tsrc=Container(crud_result=vbsp.RESULT_SUCCESS,
+                                       action=action),
+                        length=vbsp.HEADER.sizeof(),
+                        padding=bytes(2),
+                        device=self.raw_addr,
+                        seq=self.seq,
+                        xid=self.xid if xid is None else xid,
+                        tlvs=[])
+
+        for tlv_type, parser, option in tlvs:
+            value = parser.build(option)
+            msg.tlvs.append(Container(type=tlv_type, length=4 + len(value),
+                                      value=value))
+            msg.length += 4 + len(value)
+
+        self.write(self.proto.PT_TYPES[action][1], vbsp.PACKET.build(msg))
+
+    def on_connect(self):
+        """Start sending hellos."""
+
+        self.spawn(self.hello_loop())
+
+    async def hello_loop(self):
+        """Periodically send HELLO_SERVICE requests."""
+
+        tlv = (vbsp.PT_HELLO_SERVICE_PERIOD, vbsp.HELLO_SERVICE_PERIOD,
+               Container(period=self.period))
+
+        while True:
+            self.send(vbsp.PT_HELLO_SERVICE, vbsp.MSG_TYPE_REQUEST, [tlv])
+            await asyncio.sleep(self.period / 1000)
+
+    @staticmethod
+    def ue_tlv(cell, imsi):
+        """Return the UE identity TLV for a UE."""
+
+        tmsi, rnti, status = cell.ues[imsi]
+
+        option = Container(imsi=imsi, tmsi=tmsi, rnti=rnti, status=status,
+                           pci=cell.pci)
+
+        return (vbsp.PT_UE_REPORTS_SERVICE_IDENTITY,
+                vbsp.UE_REPORTS_SERVICE_IDENTITY, option)
+
+    async def ue_reports_loop(self):
+        """Periodically attach or detach a random UE."""
+
+        cells = [x for x in self.cells if x.ues]
+
+        while cells:
+
+            await asyncio.sleep(UE_REPORTS_PERIOD)
+
+            cell = random.choice(cells)
+            imsi = random.choice(list(cell.ues))
+
+            ue = cell.ues[imsi]
+
+            if ue[2] == USER_STATUS_CONNECTED:
+                ue[2] = USER_STATUS_DISCONNECTED
+            else:
+                ue[1] = random.getrandbits(16)
+                ue[2] = USER_STATUS_CONNECTED
+
+            self.send(vbsp.PT_UE_REPORTS_SERVICE, vbsp.MSG_TYPE_RESPONSE,
+                      [self.ue_tlv(cell, imsi)])
+
+    def _handle_capabilities_service(self, msg):
+        """Handle an incoming CAPABILITIES_SERVICE request."""
+
+        tlvs = [(vbsp.PT_CAPABILITIES_SERVICE_CELL,
+                 vbsp.CAPABILITIES_SERVICE_CELL,
+                 Container(pci=x.pci,
+                           dl_earfcn=x.dl_earfcn,
+                           ul_earfcn=x.ul_earfcn,
+                           n_prbs=x.n_prbs)) for x in self.cells]
+
+        self.send(vbsp.PT_CAPABILITIES_SERVICE, vbsp.MSG_TYPE_RESPONSE,
+                  tlvs, xid=msg.xid)
+
+    def _handle_ue_reports_service(self, msg):
+        """Handle an incoming UE_REPORTS_SERVICE request.
+
+        This is the first message sent by the controller after the VBS goes
+        online.
+        """
+
+        tlvs = [self.ue_tlv(cell, imsi)
+                for cell in self.cells for imsi in cell.ues
+                if cell.ues[imsi][2] == USER_STATUS_CONNECTED]
+
+        self.send(vbsp.PT_UE_REPORTS_SERVICE, vbsp.MSG_TYPE_RESPONSE, tlvs,
+                  xid=msg.xid)
+
+        if not self.online:
+            self.set_online()
+            self.spawn(self.ue_reports_loop())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Simulated WTP."""
+
+import time
+import random
+import asyncio
+
+import numpy as np
+
+from construct import Container
+
+from empower_core.ssid import WIFI_NWID_MAXSIZE
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.managers.ranmanager.codec import compile_codec
+from empower.workers.wifichannelstats.wifichannelstats import \
+    PT_WCS_REQUEST, PT_WCS_RESPONSE, WCS_REQUEST, WCS_RESPONSE, WCS_ENTRIES
+from empower.workers.wifichannelqualitymap.wifichannelqualitymap import \
+    PT_UCQM_REQUEST, PT_UCQM_RESPONSE, PT_NCQM_REQUEST, PT_NCQM_RESPONSE, \
+    CQM_REQUEST, CQM_RESPONSE
+from empower.apps.wifircstats.wifircstats import PT_WIFI_RC_STATS_REQUEST, \
+    PT_WIFI_RC_STATS_RESPONSE, WIFI_RC_STATS_REQUEST, \
+    WIFI_RC_STATS_RESPONSE, RC_ENTRIES
+from empower.simulator.agent import Agent
+
+# How long a station waits for each reply during the handshake (in s)
+HANDSHAKE_TIMEOUT = 5.0
+
+# Legacy and HT rates advertised in the rate control statistics
+RATES = [2, 4, 11, 12, 18, 22, 24, 36, 48, 72, 96, 108]
+HT_RATES = list(range(0, 16))
+
+HT_CAPS_INFO = {
+    "L_SIG_TXOP_Protection_Support": False,
+    "Forty_MHz_Intolerant": False,
+    "Reserved": False,
+    "DSSS_CCK_Mode_in_40_MHz": False,
+    "Maximum_AMSDU_Length": True,
+    "HT_Delayed_Block_Ack": False,
+    "Rx_STBC": 1,
+    "Tx_STBC": False,
+    "Short_GI_for_40_MHz": False,
+    "Short_GI_for_20_MHz": True,
+    "HT_Greenfield": False,
+    "SM_Power_Save": 3,
+    "Supported_Channel_Width_Set": False,
+    "LDPC_Coding_Capability": True
+}
+
+# All the messages spoken by the simulated WTPs, including the ones defined
+# by the workers and by the apps (pt_type -> (name, parser))
+MESSAGES = {k: (v.name, v) for k, v in lvapp.PT_TYPES.items() if v}
+
+MESSAGES.update({
+    PT_WCS_REQUEST: ("wcs_request", WCS_REQUEST),
+    PT_WCS_RESPONSE: ("wcs_response", WCS_RESPONSE),
+    PT_UCQM_REQUEST: ("ucqm_request", CQM_REQUEST),
+    PT_UCQM_RESPONSE: ("ucqm_response", CQM_RESPONSE),
+    PT_NCQM_REQUEST: ("ncqm_request", CQM_REQUEST),
+    PT_NCQM_RESPONSE: ("ncqm_response", CQM_RESPONSE),
+    PT_WIFI_RC_STATS_REQUEST: ("wifi_rc_stats_request",
+                               WIFI_RC_STATS_REQUEST),
+    PT_WIFI_RC_STATS_RESPONSE: ("wifi_rc_stats_response",
+                                WIFI_RC_STATS_RESPONSE),
+})
+
+CODECS = {k: compile_codec(v[1]) for k, v in MESSAGES.items()}
+
+
+class SimBlock:
+    """A simulated resource block."""
+
+    def __init__(self, block_id, hwaddr, channel, band):
+
+        self.block_id = block_id
+        self.hwaddr = hwaddr
+        self.channel = channel
+        self.band = band
+
+
+class SimWTP(Agent):
+    """A simulated WTP.
+
+    Answers the controller requests (capabilities, status, LVAP and VAP
+    management, channel statistics, channel quality maps, rate control
+    statistics) and, once online, makes its stations go through the
+    probe/auth/assoc handshake.
+
+    Attributes:
+        blocks: the resource blocks (a list of SimBlocks)
+        stations: the addresses of the stations attached to this WTP
+        lvaps: the LVAPs added by the controller (sta -> ADD_LVAP_REQUEST)
+        vaps: the VAPs added by the controller (bssid -> ADD_VAP)
+    """
+
+    proto = lvapp
+
+    def __init__(self, addr, host, port, stats, blocks, stations,
+                 period=2000):
+
+        super().__init__(addr, host, port, stats, period)
+
+        self.blocks = blocks
+        self.stations = stations
+
+        self.lvaps = {}
+        self.vaps = {}
+        self.waiting = {}
+
+    def msg_name(self, hdr):
+        """Return the name of the message described by hdr."""
+
+        if hdr.type not in MESSAGES:
+            return "unknown"
+
+        return MESSAGES[hdr.type][0]
+
+    def parse(self, hdr, data):
+        """Parse a message."""
+
+        codec = CODECS[hdr.type]
+
+        if codec:
+            return codec.decode(data)
+
+        return MESSAGES[hdr.type][1].parse(data)
+
+    def send(self, pt_type, xid=None, **kwargs):
+        """Encode and send a message."""
+
+        name, parser = MESSAGES[pt_type]
+        codec = CODECS[pt_type]
+
+        msg = Container(version=lvapp.PT_VERSION,
+                        type=pt_type,
+                        length=0,
+                        seq=self.seq,
+                        xid=self.xid if xid is None else xid,
+                        device=self.raw_addr,
+                        **kwargs)
+
+        if codec:
+            msg.length = codec.length(msg)
+            self.write(name, codec.encode(msg))
+            return
+
+        # messages with length-dependent fields have no codec
+        msg.length = len(parser.build(msg))
+        self.write(name, parser.build(msg))
+
+    def on_connect(self):
+        """Start sending hellos."""
+
+        self.lvaps = {}
+        self.vaps = {}
+        self.waiting = {}
+
+        self.spawn(self.hello_loop())
+
+    async def hello_loop(self):
+        """Periodically send HELLO_REQUEST messages."""
+
+        while True:
+            self.send(lvapp.PT_HELLO_REQUEST, period=self.period)
+            await asyncio.sleep(self.period / 1000)
+
+    def set_online(self):
+        """Mark the WTP as online and start the stations handshakes."""
+
+        if self.online:
+            return
+
+        super().set_online()
+
+        for index, sta in enumerate(self.stations):
+            block = self.blocks[index % len(self.blocks)]
+            self.spawn(self.station(sta, block))
+
+    async def request(self, pt_type, reply_type, sta, **kwargs):
+        """Send a station request and wait for the reply."""
+
+        future = asyncio.get_event_loop().create_future()
+        self.waiting[(reply_type, sta)] = future
+
+        self.send(pt_type, sta=sta, **kwargs)
+
+        try:
+            return await asyncio.wait_for(future, HANDSHAKE_TIMEOUT)
+        finally:
+            self.waiting.pop((reply_type, sta), None)
+
+    def reply(self, reply_type, msg):
+        """Wake up the station waiting for msg."""
+
+        future = self.waiting.get((reply_type, msg.sta))
+
+        if future and not future.done():
+            future.set_result(msg)
+
+    async def station(self, sta, block):
+        """Run the probe/auth/assoc handshake for a station."""
+
+        flags = Container(ht_caps=True)
+        ht_caps_info = Container(**HT_CAPS_INFO)
+
+        start = time.time()
+
+        try:
+
+            await self.request(lvapp.PT_PROBE_REQUEST,
+                               lvapp.PT_PROBE_RESPONSE, sta,
+                               iface_id=block.block_id,
+                               flags=flags,
+                               ht_caps_info=ht_caps_info,
+                               ssid=bytes(WIFI_NWID_MAXSIZE + 1))
+
+            self.stats.on_latency("probe", time.time() - start)
+
+            lvap = self.lvaps.get(sta)
+
+            if not lvap or not lvap.networks:
+                self.stats.on_failure("handshake")
+                return
+
+            bssid = lvap.networks[0].bssid
+            ssid = lvap.networks[0].ssid
+
+            step = time.time()
+
+            await self.request(lvapp.PT_AUTH_REQUEST,
+                               lvapp.PT_AUTH_RESPONSE, sta,
+                               bssid=bssid)
+
+            self.stats.on_latency("auth", time.time() - step)
+
+            step = time.time()
+
+            await self.request(lvapp.PT_ASSOC_REQUEST,
+                               lvapp.PT_ASSOC_RESPONSE, sta,
+                               flags=flags,
+                               ht_caps_info=ht_caps_info,
+                               bssid=bssid,
+                               ssid=ssid)
+
+            self.stats.on_latency("assoc", time.time() - step)
+
+        except asyncio.TimeoutError:
+            self.stats.on_failure("handshake")
+            return
+
+        self.stats.on_latency("handshake", time.time() - start)
+
+    def send_lvap_status(self, lvap):
+        """Send a LVAP_STATUS_RESPONSE message."""
+
+        self.send(lvapp.PT_LVAP_STATUS_RESPONSE,
+                  iface_id=lvap.iface_id,
+                  flags=lvap.flags,
+                  assoc_id=lvap.assoc_id,
+                  ht_caps_info=lvap.ht_caps_info,
+                  sta=lvap.sta,
+                  encap=lvap.encap,
+                  bssid=lvap.bssid,
+                  ssid=lvap.ssid,
+                  networks=lvap.networks)
+
+    def _handle_caps_request(self, _):
+        """Handle an incoming CAPS_REQUEST message."""
+
+        blocks = [Container(block_id=x.block_id,
+                            hwaddr=x.hwaddr,
+                            channel=x.channel,
+                            band=x.band) for x in self.blocks]
+
+        self.send(lvapp.PT_CAPS_RESPONSE, nb_blocks=len(blocks),
+                  blocks=blocks)
+
+    def _handle_lvap_status_request(self, _):
+        """Handle an incoming LVAP_STATUS_REQUEST message.
+
+        This is the first message sent by the controller after the WTP goes
+        online.
+        """
+
+        for lvap in self.lvaps.values():
+            self.send_lvap_status(lvap)
+
+        self.set_online()
+
+    def _handle_vap_status_request(self, _):
+        """Handle an incoming VAP_STATUS_REQUEST message."""
+
+        for vap in self.vaps.values():
+            self.send(lvapp.PT_VAP_STATUS_RESPONSE,
+                      iface_id=vap.iface_id,
+                      bssid=vap.bssid,
+                      ssid=vap.ssid)
+
+    def _handle_add_vap(self, msg):
+        """Handle an incoming ADD_VAP message."""
+
+        self.vaps[msg.bssid] = msg
+
+    def _handle_del_vap(self, msg):
+        """Handle an incoming DEL_VAP message."""
+
+        self.vaps.pop(msg.bssid, None)
+
+    def _handle_add_lvap_request(self, msg):
+        """Handle an incoming ADD_LVAP_REQUEST message."""
+
+        if msg.flags.set_mask:
+            self.lvaps[msg.sta] = msg
+
+        self.send(lvapp.PT_ADD_LVAP_RESPONSE, xid=msg.xid, sta=msg.sta,
+                  status=0)
+
+        self.send_lvap_status(msg)
+
+    def _handle_del_lvap_request(self, msg):
+        """Handle an incoming DEL_LVAP_REQUEST message."""
+
+        self.lvaps.pop(msg.sta, None)
+
+        self.send(lvapp.PT_DEL_LVAP_RESPONSE, xid=msg.xid, sta=msg.sta,
+                  status=0)
+
+    def _handle_probe_response(self, msg):
+        """Handle an incoming PROBE_RESPONSE message."""
+
+        self.reply(lvapp.PT_PROBE_RESPONSE, msg)
+
+    def _handle_auth_response(self, msg):
+        """Handle an incoming AUTH_RESPONSE message."""
+
+        self.reply(lvapp.PT_AUTH_RESPONSE, msg)
+
+    def _handle_assoc_response(self, msg):
+        """Handle an incoming ASSOC_RESPONSE message."""
+
+        self.reply(lvapp.PT_ASSOC_RESPONSE, msg)
+
+    def _handle_wcs_request(self, msg):
+        """Handle an incoming WCS_REQUEST message.
+
+        Reply with 100 tx, rx and ed samples (1ms apart).
+        """
+
+        now = int(time.time() * 1e6)
+
+        tx_samples = np.random.randint(0, 51, 100)
+        rx_samples = np.random.randint(0, 51, 100)
+        ed_samples = tx_samples + rx_samples + np.random.randint(0, 21, 100)
+
+        entries = np.zeros(300, dtype=WCS_ENTRIES)
+        entries["type"] = np.repeat([0, 1, 2], 100)
+        entries["timestamp"] = np.tile(now + np.arange(100) * 1000, 3)
+        entries["sample"] = \
+            np.concatenate([tx_samples, rx_samples, ed_samples]) * 180
+
+        self.send(PT_WCS_RESPONSE, xid=msg.xid, iface_id=msg.iface_id,
+                  nb_entries=len(entries), entries=entries.tobytes())
+
+    def send_cqm_response(self, pt_type, msg):
+        """Send a channel quality map with the LVAPs on the block."""
+
+        entries = [Container(addr=sta,
+                             last_rssi_std=random.randint(0, 10),
+                             last_rssi_avg=random.randint(30, 90),
+                             last_packets=random.randint(0, 1000),
+                             hist_packets=random.randint(0, 100000),
+                             mov_rssi=random.randint(30, 90))
+                   for sta, lvap in self.lvaps.items()
+                   if lvap.iface_id == msg.iface_id]
+
+        self.send(pt_type, xid=msg.xid, iface_id=msg.iface_id,
+                  nb_entries=len(entries), entries=entries)
+
+    def _handle_ucqm_request(self, msg):
+        """Handle an incoming UCQM_REQUEST message."""
+
+        self.send_cqm_response(PT_UCQM_RESPONSE, msg)
+
+    def _handle_ncqm_request(self, msg):
+        """Handle an incoming NCQM_REQUEST message."""
+
+        self.send_cqm_response(PT_NCQM_RESPONSE, msg)
+
+    def _handle_wifi_rc_stats_request(self, msg):
+        """Handle an incoming WIFI_RC_STATS_REQUEST message."""
+
+        lvap = self.lvaps.get(msg.sta)
+
+        if not lvap:
+            return
+
+        rates = HT_RATES if lvap.flags.ht_caps else RATES
+        attempts = np.random.randint(0, 101, len(rates))
+
+        stats = np.zeros(len(rates), dtype=RC_ENTRIES)
+        stats["rate"] = rates
+        stats["prob"] = np.random.randint(0, 18001, len(rates))
+        stats["cur_prob"] = np.random.randint(0, 18001, len(rates))
+        stats["cur_tp"] = np.random.randint(0, 100001, len(rates))
+        stats["last_attempts"] = attempts
+        stats["last_successes"] = attempts // 2
+        stats["hist_attempts"] = attempts * 10
+        stats["hist_successes"] = attempts * 5
+
+        self.send(PT_WIFI_RC_STATS_RESPONSE, xid=msg.xid,
+                  iface_id=lvap.iface_id, sta=msg.sta,
+                  nb_entries=len(stats), stats=stats.tobytes())
@@ -22,6 +22,7 @@ import time
 from construct import Struct, Int16ub, Int32ub
 
 from empower_core.app import EVERY
+from empower_core.launcher import srv_or_die
 
 import empower.managers.ranmanager.vbsp as vbsp
 
@@ -159,6 +160,10 @@ class MACPrbUtilization(ELTEWorker):
                 "ul_prb_counter": self.ul_prb_counter,
             }
 
+            stats = srv_or_die("vbspmanager").stats
+            stats.append("prb.dl_rate", (vbs.addr, cell.pci), self.dl_prb_rate)
+            stats.append("prb.ul_rate", (vbs.addr, cell.pci), self.ul_prb_rate)
+
         # handle callbacks
         self.handle_callbacks()
 
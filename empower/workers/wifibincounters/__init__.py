@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Wi-Fi Bin Counters Worker."""
+
+MANIFEST = {
+    "label": "Wi-Fi Bin Counters",
+    "desc": "Tracks TX/RX packets/bytes counters for all the LVAPs",
+    "callbacks": {
+        "default": "Called when new measurements are available"
+    },
+    "modules": ['lvapp'],
+    "params": {
+        "bins": {
+            "desc": "The bins for the measurements (comma separated).",
+            "mandatory": False,
+            "default": "8192",
+            "type": "str"
+        },
+        "every": {
+            "desc": "The control loop period (in ms).",
+            "mandatory": False,
+            "default": 2000,
+            "type": "int"
+        }
+    }
+}
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Wi-Fi Bin Counters Worker."""
+
+import time
+
+import numpy as np
+import tornado.ioloop
+
+from construct import Container
+
+import empower_core.apimanager.apimanager as apimanager
+
+from empower_core.app import EVERY
+from empower_core.etheraddress import EtherAddress
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.managers.ranmanager.lvapp.wifiworker import EWiFiWorker
+from empower.apps.lvapbincounter.lvapbincounter import \
+    PT_BIN_COUNTERS_REQUEST, PT_BIN_COUNTERS_RESPONSE, BIN_COUNTERS_REQUEST, \
+    BIN_COUNTERS_RESPONSE, parse_bins, decode_counters, bin_counters
+
+COUNTERS = ("tx_bytes", "rx_bytes", "tx_packets", "rx_packets")
+RATES = ("tx_bps", "rx_bps", "tx_pps", "rx_pps")
+
+INITIAL_SIZE = 64
+
+
+class CountersTable:
+    """The bin counters and rates of all the stations.
+
+    Counters and rates are stored in (station, counter, bin) arrays, rows
+    are indexed by station. The rows of departed stations are recycled and
+    the arrays double their size when full.
+
+    Attributes:
+        counters: the counters (see COUNTERS)
+        rates: the rates, per second (see RATES)
+        last: the time of the last update of each row
+        rows: the row of each station (EtherAddress -> row)
+    """
+
+    def __init__(self, nb_bins, size=INITIAL_SIZE):
+
+        self.counters = np.zeros((size, len(COUNTERS), nb_bins))
+        self.rates = np.zeros((size, len(COUNTERS), nb_bins))
+        self.last = np.zeros(size)
+
+        self.rows = {}
+        self.nb_rows = 0
+        self.free_rows = []
+
+    def _grow(self):
+        """Double the size of the arrays."""
+
+        size = len(self.last)
+
+        self.counters = np.concatenate((self.counters,
+                                        np.zeros_like(self.counters)))
+        self.rates = np.concatenate((self.rates, np.zeros_like(self.rates)))
+        self.last = np.concatenate((self.last, np.zeros(size)))
+
+    def _row(self, sta):
+        """Return the row of sta, allocating one if needed."""
+
+        if sta not in self.rows:
+
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = self.nb_rows
+                self.nb_rows += 1
+                if row == len(self.last):
+                    self._grow()
+
+            self.rows[sta] = row
+
+        return self.rows[sta]
+
+    def update(self, sta, counters, timestamp):
+        """Set the counters of sta and update its rates."""
+
+        row = self._row(sta)
+
+        if self.last[row] and timestamp > self.last[row]:
+            delta = timestamp - self.last[row]
+            self.rates[row] = (counters - self.counters[row]) / delta
+
+        self.counters[row] = counters
+        self.last[row] = timestamp
+
+    def remove(self, sta):
+        """Remove a station."""
+
+        row = self.rows.pop(sta, None)
+
+        if row is None:
+            return
+
+        self.counters[row] = 0
+        self.rates[row] = 0
+        self.last[row] = 0
+        self.free_rows.append(row)
+
+    def station(self, sta):
+        """Return the counters and the rates of sta."""
+
+        row = self.rows[sta]
+
+        out = dict(zip(COUNTERS, self.counters[row].tolist()))
+        out.update(zip(RATES, self.rates[row].tolist()))
+
+        return out
+
+    def aggregate(self):
+        """Return the counters and the rates of all the stations."""
+
+        # unused rows are zeroed
+        counters = self.counters[:self.nb_rows].sum(axis=0)
+        rates = self.rates[:self.nb_rows].sum(axis=0)
+
+        out = dict(zip(COUNTERS, counters.tolist()))
+        out.update(zip(RATES, rates.tolist()))
+
+        return out
+
+    def __len__(self):
+
+        return len(self.rows)
+
+
+# pylint: disable=W0223
+class BinCountersHandler(apimanager.APIHandler):
+    """Access the bin counters of all the LVAPs."""
+
+    URLS = [r"/api/v1/workers/([a-zA-Z0-9-]*)/bincounters/?",
+            r"/api/v1/workers/([a-zA-Z0-9-]*)/bincounters/([a-zA-Z0-9:]*)/?"]
+
+    @apimanager.validate(min_args=1, max_args=2)
+    def get(self, *args, **kwargs):
+        """Access the bin counters.
+
+        Args:
+
+            [0]: the worker id (mandatory)
+            [1]: the LVAP MAC address (optional)
+
+        Example URLs:
+
+            GET /api/v1/workers/0f91e8ad-1c2a-4b06-97f9-e34097c4c1d0/
+                bincounters
+
+            {
+                "bins": [8192],
+                "aggregate": {
+                    "tx_bytes": [1826043.0],
+                    "rx_bytes": [55873.0],
+                    "tx_packets": [1540.0],
+                    "rx_packets": [713.0],
+                    "tx_bps": [19234.2],
+                    "rx_bps": [610.5],
+                    "tx_pps": [14.5],
+                    "rx_pps": [7.0]
+                },
+                "stations": {
+                    "60:F4:45:D0:3B:FC": {
+                        ...
+                    }
+                }
+            }
+
+            GET /api/v1/workers/0f91e8ad-1c2a-4b06-97f9-e34097c4c1d0/
+                bincounters/60:F4:45:D0:3B:FC
+
+            {
+                "tx_bytes": [1826043.0],
+                ...
+            }
+        """
+
+        if len(args) == 1:
+            return self.service.counters
+
+        return self.service.table.station(EtherAddress(args[1]))
+
+
+class WiFiBinCounters(EWiFiWorker):
+    """Wi-Fi Bin Counters Worker
+
+    Collects the packet counters of all the LVAPs. The WTPs are polled one
+    after the other over the loop period, a single request is sent for each
+    LVAP hosted by the WTP. Callbacks are invoked once per period, when all
+    the polled LVAPs replied (or at the next period if some replies were
+    lost).
+
+    Parameters:
+        bins: the bins for the measurements (optional, default: [8192])
+        every: the polling period in ms (optional, default: 2000)
+    """
+
+    HANDLERS = [BinCountersHandler]
+
+    def __init__(self, context, service_id, bins, every):
+
+        super().__init__(context=context, service_id=service_id, bins=bins,
+                         every=every)
+
+        lvapp.register_message(PT_BIN_COUNTERS_REQUEST, BIN_COUNTERS_REQUEST,
+                               telemetry=True)
+        lvapp.register_message(PT_BIN_COUNTERS_RESPONSE, BIN_COUNTERS_RESPONSE)
+
+        # Stations still to be heard from in the current period
+        self.pending = set()
+
+        # Whether new counters are waiting to be notified
+        self.updated = False
+
+    @property
+    def bins(self):
+        """ Return the bins. """
+
+        return self.params['bins']
+
+    @bins.setter
+    def bins(self, bins):
+        """ Set the bins. Default is [ 8192 ]. """
+
+        self.params['bins'] = parse_bins(bins)
+        self.table = CountersTable(len(self.params['bins']))
+
+    @property
+    def counters(self):
+        """Return the counters of all the stations."""
+
+        return {
+            "bins": self.bins,
+            "aggregate": self.table.aggregate(),
+            "stations": {sta: self.table.station(sta)
+                         for sta in self.table.rows}
+        }
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        out = super().to_dict()
+
+        out['bins'] = self.bins
+        out['stations'] = len(self.table)
+        out['aggregate'] = self.table.aggregate()
+
+        return out
+
+    def loop(self):
+        """Schedule the polls of the WTPs over the loop period."""
+
+        # some responses of the previous period were lost
+        if self.updated:
+            self.notify()
+
+        wtps = {}
+
+        for wtp in self.wtps.values():
+
+            if not wtp.connection:
+                continue
+
+            stas = list(self.lvaps.view("wtp", wtp.addr))
+
+            if stas:
+                wtps[wtp.addr] = stas
+
+        self.pending = {sta for stas in wtps.values() for sta in stas}
+
+        ioloop = tornado.ioloop.IOLoop.current()
+
+        for index, (addr, stas) in enumerate(wtps.items()):
+            delay = index * self.every / len(wtps) / 1000
+            ioloop.call_later(delay, self.poll, addr, stas)
+
+    def poll(self, addr, stas):
+        """Send out the requests for the LVAPs hosted by a WTP."""
+
+        wtp = self.wtps.get(addr)
+
+        if not wtp or not wtp.connection:
+            return
+
+        for sta in stas:
+
+            msg = Container(length=BIN_COUNTERS_REQUEST.sizeof(),
+                            sta=sta.to_raw())
+
+            wtp.connection.send_message(PT_BIN_COUNTERS_REQUEST,
+                                        msg,
+                                        self.handle_response)
+
+    def handle_lvap_leave(self, lvap):
+        """Called when an LVAP leaves a network."""
+
+        self.table.remove(lvap.addr)
+
+    def handle_response(self, response, *_):
+        """Handle BIN_COUNTERS_RESPONSE message."""
+
+        sta = EtherAddress(response.sta)
+
+        tx_samples, rx_samples = decode_counters(response)
+
+        tx_bytes, tx_packets = bin_counters(tx_samples, self.bins)
+        rx_bytes, rx_packets = bin_counters(rx_samples, self.bins)
+
+        self.table.update(sta, (tx_bytes, rx_bytes, tx_packets, rx_packets),
+                          time.time())
+
+        self.updated = True
+
+        # notify once all the stations polled in this period replied
+        if sta in self.pending:
+            self.pending.discard(sta)
+            if not self.pending:
+                self.notify()
+
+    def notify(self):
+        """Invoke the callbacks."""
+
+        self.updated = False
+
+        # handle callbacks
+        self.handle_callbacks()
+
+
+def launch(context, service_id, bins="8192", every=EVERY):
+    """ Initialize the module. """
+
+    return WiFiBinCounters(context=context, service_id=service_id, bins=bins,
+                           every=every)
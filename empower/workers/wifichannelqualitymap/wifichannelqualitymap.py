@@ -23,6 +23,7 @@ from construct import Struct, Int8ub, Int16ub, Int32ub, Bytes, Array
 from construct import Container
 from empower_core.app import EVERY
 from empower_core.etheraddress import EtherAddress
+from empower_core.launcher import srv_or_die
 
 import empower.managers.ranmanager.lvapp as lvapp
 
@@ -83,9 +84,9 @@ class ChannelQualityMap(EWiFiWorker):
         self.ucqm = {}
         self.ncqm = {}
 
-        lvapp.register_message(PT_UCQM_REQUEST, CQM_REQUEST)
+        lvapp.register_message(PT_UCQM_REQUEST, CQM_REQUEST, telemetry=True)
         lvapp.register_message(PT_UCQM_RESPONSE, CQM_RESPONSE)
-        lvapp.register_message(PT_NCQM_REQUEST, CQM_REQUEST)
+        lvapp.register_message(PT_NCQM_REQUEST, CQM_REQUEST, telemetry=True)
         lvapp.register_message(PT_NCQM_RESPONSE, CQM_RESPONSE)
 
     def to_dict(self):
@@ -122,8 +123,10 @@ class ChannelQualityMap(EWiFiWorker):
     def handle_ucqm_response(self, response, wtp, _):
         """Handle UCQM_RESPONSE message."""
 
+        lvappmanager = srv_or_die("lvappmanager")
+
         block = wtp.blocks[response.iface_id]
-        block.ucqm = {}
+        ucqm = {}
 
         # generate data points
         points = []
@@ -131,7 +134,7 @@ class ChannelQualityMap(EWiFiWorker):
 
         for entry in response.entries:
             addr = EtherAddress(entry['addr'])
-            block.ucqm[addr] = {
+            ucqm[addr] = {
                 'addr': addr,
                 'last_rssi_std': entry['last_rssi_std'],
                 'last_rssi_avg': entry['last_rssi_avg'],
@@ -140,20 +143,23 @@ class ChannelQualityMap(EWiFiWorker):
                 'mov_rssi': entry['mov_rssi']
             }
 
-            tags = dict(self.params)
-            tags["wtp"] = wtp.addr
-            tags["block_id"] = response.iface_id
-            tags["addr"] = addr
+            lvappmanager.stats.append("ucqm.mov_rssi",
+                                      (wtp.addr, block.block_id, addr),
+                                      entry['mov_rssi'])
 
             sample = {
                 "measurement": self.name,
-                "tags": tags,
+                "tags": self.tags(wtp=wtp.addr, block_id=response.iface_id,
+                                  addr=addr),
                 "time": timestamp,
-                "fields": block.ucqm[addr]
+                "fields": ucqm[addr]
             }
 
             points.append(sample)
 
+        # replace the block UCQM and update the per-station ranking
+        lvappmanager.blocks.update_ucqm(block, ucqm)
+
         # save to db
         self.write_points(points)
 
@@ -17,12 +17,17 @@
 
 """WiFi Channel Statistics Worker."""
 
+import math
+import time
+
 from datetime import datetime
-from datetime import timedelta
-from itertools import groupby
-from construct import Struct, Int8ub, Int16ub, Int32ub, Int64ub, Bytes, Array
+
+import numpy as np
+
+from construct import Struct, Int8ub, Int16ub, Int32ub, Int64ub, Bytes
 from construct import Container
 from empower_core.app import EVERY
+from empower_core.launcher import srv_or_die
 
 import empower.managers.ranmanager.lvapp as lvapp
 
@@ -49,6 +54,7 @@ WCS_ENTRY = Struct(
 )
 WCS_ENTRY.name = "wcs_entry"
 
+# the entries are decoded with numpy (see WCS_ENTRIES)
 WCS_RESPONSE = Struct(
     "version" / Int8ub,
     "type" / Int8ub,
@@ -58,10 +64,17 @@ WCS_RESPONSE = Struct(
     "device" / Bytes(6),
     "iface_id" / Int32ub,
     "nb_entries" / Int16ub,
-    "entries" / Array(lambda ctx: ctx.nb_entries, WCS_ENTRY)
+    "entries" / Bytes(lambda ctx: ctx.nb_entries * WCS_ENTRY.sizeof())
 )
 WCS_RESPONSE.name = "wcs_response"
 
+# same layout as WCS_ENTRY
+WCS_ENTRIES = np.dtype([("type", "u1"),
+                        ("timestamp", ">u8"),
+                        ("sample", ">u4")])
+
+STAT_TYPES = ["tx", "rx", "ed"]
+
 
 class ChannelStats(EWiFiWorker):
     """WiFi Channel Statistics Worker
@@ -74,7 +87,7 @@ class ChannelStats(EWiFiWorker):
 
         super().__init__(context=context, service_id=service_id, every=every)
 
-        lvapp.register_message(PT_WCS_REQUEST, WCS_REQUEST)
+        lvapp.register_message(PT_WCS_REQUEST, WCS_REQUEST, telemetry=True)
         lvapp.register_message(PT_WCS_RESPONSE, WCS_RESPONSE)
 
         self.channel_stats = {}
@@ -108,83 +121,83 @@ class ChannelStats(EWiFiWorker):
                                             self.handle_response)
 
     def handle_response(self, response, wtp, _):
-        """Handle WCS_RESPONSE message."""
+        """Handle WCS_RESPONSE message.
+
+        The response carries the same number of tx, rx, and ed samples, in
+        this order. Samples are pivoted into one row per timestamp.
+        """
 
         block_id = response.iface_id
+        entries = np.frombuffer(response.entries, dtype=WCS_ENTRIES)
 
-        # init data structures for the incoming block
-        if block_id not in self.channel_stats:
-            self.channel_stats[block_id] = {}
-            self.agent_ts_ref[block_id] = 0
-            self.runtime_ts_ref[block_id] = None
+        if not entries.size:
+            return
+
+        types = entries["type"]
+        raw = entries["sample"].astype(np.int64)
 
         # pre-processing: ed = ed - (rx + tx)
-        # tx: 0:100, rx: 100:200, ed: 200:300
-        for index in range(200, 300):
-            response.entries[index].sample -= \
-                response.entries[index - 100].sample + \
-                response.entries[index - 200].sample
+        nb_samples = len(raw) // 3
+        raw[2 * nb_samples:3 * nb_samples] -= \
+            raw[nb_samples:2 * nb_samples] + raw[:nb_samples]
+
+        values = raw / 180.0
 
         # at the beginning, create the map between runtime and agent timestamps
-        # entry[0] = stat type [0, 1, 2] -> [tx, rx, ed]
-        # entry[1] = agent timestamp
-        # entry[2] = stat value
-        if self.agent_ts_ref[block_id] == 0:
-            for entry in response.entries:
-                if entry.timestamp > self.agent_ts_ref[block_id]:
-                    self.agent_ts_ref[block_id] = entry.timestamp
-            self.runtime_ts_ref[block_id] = datetime.utcnow()
-
-        self.channel_stats[block_id] = []
-
-        for entry in response.entries:
-
-            stat_type = ["tx", "rx", "ed"][entry.type]
-            ts_delta = timedelta(microseconds=(entry.timestamp -
-                                               self.agent_ts_ref[block_id]))
-            value = entry.sample / 180.0
-
-            # skip invalid samples
-            if abs(value) == 200:  # tx, rx: 200; ed: 200 - (200 + 200)
-                continue
+        if not self.agent_ts_ref.get(block_id):
+            self.agent_ts_ref[block_id] = int(entries["timestamp"].max())
+            self.runtime_ts_ref[block_id] = time.time()
 
-            sample = {
-                "type": stat_type,
-                "time": self.runtime_ts_ref[block_id] + ts_delta,
-                "value": value
-            }
+        # skip invalid samples, tx, rx: 200; ed: 200 - (200 + 200)
+        valid = (np.abs(values) != 200) & (types < len(STAT_TYPES))
 
-            self.channel_stats[block_id].append(sample)
+        # agent timestamps are in us
+        times = self.runtime_ts_ref[block_id] + \
+            (entries["timestamp"][valid].astype(np.int64) -
+             self.agent_ts_ref[block_id]) / 1e6
 
-        # update wifi_stats module
-        block = wtp.blocks[block_id]
-        block.channel_stats = self.channel_stats[block_id]
+        times, columns = np.unique(times, return_inverse=True)
 
-        # save samples
-        sorted_samples = sorted(block.channel_stats,
-                                key=lambda x: x["time"].timestamp())
+        table = np.full((len(STAT_TYPES), len(times)), np.nan)
+        table[types[valid], columns] = values[valid]
+
+        tags = self.tags(wtp=wtp.addr, block_id=block_id)
+
+        rows = []
         samples = []
 
-        for tstamp, sample_fields in groupby(sorted_samples,
-                                             lambda x: x["time"].timestamp()):
+        for tstamp, column in zip(times.tolist(), table.T.tolist()):
 
-            fields = {}
+            fields = {stat_type: value
+                      for stat_type, value in zip(STAT_TYPES, column)
+                      if not math.isnan(value)}
 
-            for item in sample_fields:
-                fields[item["type"]] = item["value"]
+            timestamp = datetime.utcfromtimestamp(tstamp)
 
-            tags = dict(self.params)
-            tags["wtp"] = wtp.addr
-            tags["block_id"] = block_id
+            rows.append(dict(fields, time=timestamp))
 
-            sample = {
+            samples.append({
                 "measurement": self.name,
                 "tags": tags,
-                "time": datetime.fromtimestamp(tstamp),
+                "time": timestamp,
                 "fields": fields
-            }
-            samples.append(sample)
+            })
+
+        self.channel_stats[block_id] = rows
+
+        # update wifi_stats module
+        block = wtp.blocks[block_id]
+        block.channel_stats = rows
+
+        # update the recent statistics
+        stats = srv_or_die("lvappmanager").stats
 
+        for stat_type, row in zip(STAT_TYPES, table):
+            measured = ~np.isnan(row)
+            stats.extend("channel.%s" % stat_type, (wtp.addr, block_id),
+                         row[measured], times[measured])
+
+        # save samples
         self.write_points(samples)
 
         # handle callbacks
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Wi-Fi Rate Control Statistics Worker."""
+
+from datetime import datetime
+
+import numpy as np
+import tornado.ioloop
+
+from construct import Container
+
+import empower_core.apimanager.apimanager as apimanager
+
+from empower_core.app import EVERY
+from empower_core.etheraddress import EtherAddress
+from empower_core.launcher import srv_or_die
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.managers.ranmanager.lvapp.wifiworker import EWiFiWorker
+from empower.apps.wifircstats.wifircstats import PT_WIFI_RC_STATS_REQUEST, \
+    PT_WIFI_RC_STATS_RESPONSE, WIFI_RC_STATS_REQUEST, \
+    WIFI_RC_STATS_RESPONSE, RC_FIELDS, decode_rc_stats
+
+INITIAL_SIZE = 64
+INITIAL_RATES = 16
+
+
+class RCStatsTable:
+    """The rate control statistics of all the stations.
+
+    The rates reported by each station are stored in a (station, rate)
+    array, unused entries are NaN. The statistics are stored in a (station,
+    field, rate) array (see RC_FIELDS). Rows are indexed by station, the
+    rows of departed stations are recycled and the arrays double their size
+    when full.
+
+    Attributes:
+        rates: the rates reported by each station
+        stats: the statistics of each rate
+        rows: the row of each station (EtherAddress -> row)
+    """
+
+    def __init__(self, size=INITIAL_SIZE, nb_rates=INITIAL_RATES):
+
+        self.rates = np.full((size, nb_rates), np.nan)
+        self.stats = np.zeros((size, len(RC_FIELDS), nb_rates))
+
+        self.rows = {}
+        self.nb_rows = 0
+        self.free_rows = []
+
+    def _grow(self, size, nb_rates):
+        """Resize the arrays to size rows and nb_rates rates."""
+
+        old_size, old_nb_rates = self.rates.shape
+
+        rates = np.full((size, nb_rates), np.nan)
+        stats = np.zeros((size, len(RC_FIELDS), nb_rates))
+
+        rates[:old_size, :old_nb_rates] = self.rates
+        stats[:old_size, :, :old_nb_rates] = self.stats
+
+        self.rates = rates
+        self.stats = stats
+
+    def _row(self, sta):
+        """Return the row of sta, allocating one if needed."""
+
+        if sta not in self.rows:
+
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = self.nb_rows
+                self.nb_rows += 1
+                if row == len(self.rates):
+                    self._grow(2 * row, self.rates.shape[1])
+
+            self.rows[sta] = row
+
+        return self.rows[sta]
+
+    def update(self, sta, rates, stats):
+        """Replace the statistics of sta."""
+
+        row = self._row(sta)
+
+        if len(rates) > self.rates.shape[1]:
+            self._grow(len(self.rates),
+                       max(len(rates), 2 * self.rates.shape[1]))
+
+        self.rates[row] = np.nan
+        self.stats[row] = 0
+
+        self.rates[row, :len(rates)] = rates
+        self.stats[row, :, :len(rates)] = stats
+
+    def remove(self, sta):
+        """Remove a station."""
+
+        row = self.rows.pop(sta, None)
+
+        if row is None:
+            return
+
+        self.rates[row] = np.nan
+        self.stats[row] = 0
+        self.free_rows.append(row)
+
+    def best(self, field):
+        """Return the rate maximizing field for every station.
+
+        Stations without statistics are not returned.
+        """
+
+        column = RC_FIELDS.index(field)
+
+        rates = self.rates[:self.nb_rows]
+        values = np.where(np.isnan(rates), -np.inf,
+                          self.stats[:self.nb_rows, column])
+
+        best = rates[np.arange(len(rates)), values.argmax(axis=1)]
+
+        return {sta: best[row].item() for sta, row in self.rows.items()
+                if not np.isnan(best[row])}
+
+    def station(self, sta):
+        """Return the statistics of sta as a rate -> fields dict."""
+
+        row = self.rows[sta]
+        valid = ~np.isnan(self.rates[row])
+
+        rates = self.rates[row, valid].tolist()
+        stats = self.stats[row][:, valid].T.tolist()
+
+        return {rate: dict(zip(RC_FIELDS, values))
+                for rate, values in zip(rates, stats)}
+
+    def __contains__(self, sta):
+
+        return sta in self.rows
+
+    def __len__(self):
+
+        return len(self.rows)
+
+
+# pylint: disable=W0223
+class RCStatsHandler(apimanager.APIHandler):
+    """Access the rate control statistics of the subscribed LVAPs."""
+
+    URLS = [r"/api/v1/workers/([a-zA-Z0-9-]*)/rcstats/?",
+            r"/api/v1/workers/([a-zA-Z0-9-]*)/rcstats/([a-zA-Z0-9:]*)/?"]
+
+    @apimanager.validate(min_args=1, max_args=2)
+    def get(self, *args, **kwargs):
+        """Access the rate control statistics.
+
+        Args:
+
+            [0]: the worker id (mandatory)
+            [1]: the LVAP MAC address (optional)
+
+        Example URLs:
+
+            GET /api/v1/workers/0f91e8ad-1c2a-4b06-97f9-e34097c4c1d0/
+                rcstats/60:F4:45:D0:3B:FC
+
+            {
+                "sta": "60:F4:45:D0:3B:FC",
+                "best_prob": 54.0,
+                "best_tp": 54.0,
+                "rates": {
+                    "54.0": {
+                        "prob": 98.2,
+                        "cur_prob": 97.6,
+                        "cur_tp": 25.1,
+                        "last_attempts": 12.0,
+                        "last_successes": 12.0,
+                        "hist_attempts": 1742.0,
+                        "hist_successes": 1702.0
+                    },
+                    ...
+                }
+            }
+        """
+
+        if len(args) == 1:
+            return [self.service.station(sta)
+                    for sta in self.service.table.rows]
+
+        return self.service.station(EtherAddress(args[1]))
+
+
+class RCStats(EWiFiWorker):
+    """Wi-Fi Rate Control Statistics Worker.
+
+    Collects the rate control statistics of the LVAPs subscribed by the
+    apps. Identical subscriptions are merged and every station is polled
+    once per period no matter how many apps subscribed to it. The WTPs are
+    polled one after the other over the loop period, a single request is
+    sent for each subscribed LVAP hosted by the WTP. Subscribers are
+    notified for every station, the service callbacks are invoked once per
+    period, when all the polled stations replied (or at the next period if
+    some replies were lost).
+
+    Apps should use get_rc_stats() in order to fetch the shared worker.
+
+    Parameters:
+        every: the polling period in ms (optional, default: 2000)
+    """
+
+    HANDLERS = [RCStatsHandler]
+
+    def __init__(self, context, service_id, every):
+
+        super().__init__(context=context, service_id=service_id, every=every)
+
+        lvapp.register_message(PT_WIFI_RC_STATS_REQUEST,
+                               WIFI_RC_STATS_REQUEST, telemetry=True)
+        lvapp.register_message(PT_WIFI_RC_STATS_RESPONSE,
+                               WIFI_RC_STATS_RESPONSE)
+
+        # Subscriptions (frozenset of stations -> set of callbacks)
+        self.subscriptions = {}
+
+        # The subscribed stations
+        self.stations = frozenset()
+
+        # Stations still to be heard from in the current period
+        self.pending = set()
+
+        # Whether new statistics are waiting to be notified
+        self.updated = False
+
+        # The statistics of the subscribed stations
+        self.table = RCStatsTable()
+
+    def subscribe(self, stas, callback):
+        """Subscribe to the statistics of stas and return the subscription.
+
+        The callback is invoked with the station address every time new
+        statistics are available for one of the stations.
+        """
+
+        stas = frozenset(EtherAddress(sta) for sta in stas)
+
+        self.subscriptions.setdefault(stas, set()).add(callback)
+        self.stations = self.stations | stas
+
+        return stas
+
+    def unsubscribe(self, stas, callback):
+        """Remove a subscription."""
+
+        stas = frozenset(EtherAddress(sta) for sta in stas)
+
+        if stas not in self.subscriptions:
+            return
+
+        self.subscriptions[stas].discard(callback)
+
+        if not self.subscriptions[stas]:
+            del self.subscriptions[stas]
+
+        self.stations = frozenset().union(*self.subscriptions)
+
+        stats = srv_or_die("lvappmanager").stats
+
+        for sta in list(self.table.rows):
+            if sta not in self.stations:
+                self.table.remove(sta)
+                stats.remove_entities(sta, ("rc.prob", "rc.cur_tp"))
+
+    def station(self, sta):
+        """Return the statistics of sta."""
+
+        rates = self.table.station(sta)
+
+        return {
+            "sta": sta,
+            "best_prob": max(rates, key=lambda x: rates[x]['prob'],
+                             default=None),
+            "best_tp": max(rates, key=lambda x: rates[x]['cur_tp'],
+                           default=None),
+            "rates": rates
+        }
+
+    @property
+    def best_prob(self):
+        """Return the rate with the highest probability for every station."""
+
+        return self.table.best("prob")
+
+    @property
+    def best_tp(self):
+        """Return the rate with the highest throughput for every station."""
+
+        return self.table.best("cur_tp")
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        out = super().to_dict()
+
+        out['subscriptions'] = [sorted(x) for x in self.subscriptions]
+        out['best_prob'] = self.best_prob
+        out['best_tp'] = self.best_tp
+
+        return out
+
+    def loop(self):
+        """Schedule the polls of the WTPs over the loop period."""
+
+        # some responses of the previous period were lost
+        if self.updated:
+            self.notify()
+
+        wtps = {}
+
+        for sta in self.stations:
+
+            lvap = self.lvaps.get(sta)
+
+            if not lvap or not lvap.wtp or not lvap.wtp.connection:
+                continue
+
+            wtps.setdefault(lvap.wtp.addr, []).append(sta)
+
+        self.pending = {sta for stas in wtps.values() for sta in stas}
+
+        ioloop = tornado.ioloop.IOLoop.current()
+
+        for index, (addr, stas) in enumerate(wtps.items()):
+            delay = index * self.every / len(wtps) / 1000
+            ioloop.call_later(delay, self.poll, addr, stas)
+
+    def poll(self, addr, stas):
+        """Send out the requests for the stations hosted by a WTP."""
+
+        wtp = self.wtps.get(addr)
+
+        if not wtp or not wtp.connection:
+            return
+
+        for sta in stas:
+
+            msg = Container(length=WIFI_RC_STATS_REQUEST.sizeof(),
+                            sta=sta.to_raw())
+
+            wtp.connection.send_message(PT_WIFI_RC_STATS_REQUEST,
+                                        msg,
+                                        self.handle_response)
+
+    def handle_lvap_leave(self, lvap):
+        """Called when an LVAP leaves a network."""
+
+        self.table.remove(lvap.addr)
+
+    def handle_response(self, response, *_):
+        """Handle WIFI_RC_STATS_RESPONSE message."""
+
+        sta = EtherAddress(response.sta)
+        lvap = self.lvaps.get(sta)
+
+        if not lvap or sta not in self.stations:
+            return
+
+        rates, fields = decode_rc_stats(response, lvap.ht_caps)
+
+        self.table.update(sta, rates, fields)
+
+        # feed the statistics store
+        stats = srv_or_die("lvappmanager").stats
+        timestamp = datetime.utcnow()
+
+        points = []
+
+        for rate, values in zip(rates.tolist(), fields.T.tolist()):
+
+            stats.append("rc.prob", (sta, rate), values[0])
+            stats.append("rc.cur_tp", (sta, rate), values[2])
+
+            sample = {
+                "measurement": self.name,
+                "tags": self.tags(sta=sta, rate=rate),
+                "time": timestamp,
+                "fields": dict(zip(RC_FIELDS, values))
+            }
+
+            points.append(sample)
+
+        # save to db
+        self.write_points(points)
+
+        # notify the subscribers
+        for subscription, callbacks in list(self.subscriptions.items()):
+            if sta in subscription:
+                for callback in list(callbacks):
+                    callback(sta)
+
+        self.updated = True
+
+        # notify once all the stations polled in this period replied
+        if sta in self.pending:
+            self.pending.discard(sta)
+            if not self.pending:
+                self.notify()
+
+    def notify(self):
+        """Invoke the callbacks."""
+
+        self.updated = False
+
+        # handle callbacks
+        self.handle_callbacks()
+
+
+def get_rc_stats(every=EVERY):
+    """Return the shared RC stats worker, starting it if needed."""
+
+    env = srv_or_die("envmanager").env
+
+    return env.register_service(__name__, params={"every": every})
+
+
+def launch(context, service_id, every=EVERY):
+    """ Initialize the module. """
+
+    return RCStats(context=context, service_id=service_id, every=every)
@@ -26,4 +26,5 @@ setup(name="empower-runtime",
       author_email="roberto.riggio@gmail.com",
       url="http://5g-empower.github.io/",
       long_description="The 5G-EmPOWER Mobile Network Operating System",
-      packages=find_packages())
+      packages=find_packages(),
+      install_requires=["numpy"])
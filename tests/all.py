@@ -28,6 +28,22 @@ from .lteslices import TestLTESlices
 from .applications import TestApplications
 from .workers import TestWorkers
 from .alerts import TestAlerts
+from .codecs import TestCodecs
+from .dispatcher import TestDispatcher
+from .transactions import TestTransactions
+from .liveness import TestLiveness
+from .capture import TestCapture
+from .outbound import TestOutbound
+from .indexeddict import TestIndexedDict
+from .blockregistry import TestBlockRegistry
+from .planner import TestPlanner
+from .measurements import TestMeasurements
+from .lvapcommit import TestLVAPCommit
+from .pointswriter import TestPointsWriter
+from .statsstore import TestStatsStore
+from .channelstats import TestChannelStats
+from .bincounters import TestBinCounters
+from .rcstats import TestRCStats
 
 
 def full_suite():
@@ -35,6 +51,75 @@ def full_suite():
 
     suite = unittest.TestSuite()
 
+    suite.addTest(TestCodecs('test_lvapp_codecs'))
+    suite.addTest(TestCodecs('test_lvapp_hot_messages'))
+    suite.addTest(TestCodecs('test_variable_length'))
+    suite.addTest(TestCodecs('test_bytes_length'))
+
+    suite.addTest(TestDispatcher('test_dispatch'))
+    suite.addTest(TestDispatcher('test_unknown_type'))
+
+    suite.addTest(TestTransactions('test_complete'))
+    suite.addTest(TestTransactions('test_expire'))
+
+    suite.addTest(TestLiveness('test_expire'))
+
+    suite.addTest(TestCapture('test_round_trip'))
+    suite.addTest(TestCapture('test_truncated'))
+    suite.addTest(TestCapture('test_invalid_length'))
+    suite.addTest(TestCapture('test_close'))
+    suite.addTest(TestCapture('test_mismatch'))
+
+    suite.addTest(TestOutbound('test_priority'))
+    suite.addTest(TestOutbound('test_coalesce'))
+    suite.addTest(TestOutbound('test_backpressure'))
+    suite.addTest(TestOutbound('test_drop'))
+
+    suite.addTest(TestIndexedDict('test_views'))
+    suite.addTest(TestIndexedDict('test_serialize'))
+    suite.addTest(TestIndexedDict('test_multiple_indexes'))
+
+    suite.addTest(TestBlockRegistry('test_filters'))
+    suite.addTest(TestBlockRegistry('test_remove_wtp'))
+    suite.addTest(TestBlockRegistry('test_ucqm'))
+
+    suite.addTest(TestPlanner('test_hysteresis'))
+    suite.addTest(TestPlanner('test_unheard'))
+    suite.addTest(TestPlanner('test_budget'))
+    suite.addTest(TestPlanner('test_max_load'))
+    suite.addTest(TestPlanner('test_external_load'))
+
+    suite.addTest(TestMeasurements('test_queries'))
+    suite.addTest(TestMeasurements('test_remove'))
+
+    suite.addTest(TestLVAPCommit('test_commit'))
+    suite.addTest(TestLVAPCommit('test_timeout'))
+    suite.addTest(TestLVAPCommit('test_failure'))
+
+    suite.addTest(TestPointsWriter('test_batches'))
+    suite.addTest(TestPointsWriter('test_drop'))
+    suite.addTest(TestPointsWriter('test_errors'))
+    suite.addTest(TestPointsWriter('test_restart'))
+    suite.addTest(TestPointsWriter('test_stop_timeout'))
+    suite.addTest(TestPointsWriter('test_tags'))
+
+    suite.addTest(TestStatsStore('test_ring_buffer'))
+    suite.addTest(TestStatsStore('test_aggregates'))
+    suite.addTest(TestStatsStore('test_downsample'))
+    suite.addTest(TestStatsStore('test_full'))
+    suite.addTest(TestStatsStore('test_rotation'))
+    suite.addTest(TestStatsStore('test_remove_entities'))
+
+    suite.addTest(TestChannelStats('test_entries'))
+    suite.addTest(TestChannelStats('test_simulator'))
+
+    suite.addTest(TestBinCounters('test_bins'))
+    suite.addTest(TestBinCounters('test_table'))
+
+    suite.addTest(TestRCStats('test_decode'))
+    suite.addTest(TestRCStats('test_simulator'))
+    suite.addTest(TestRCStats('test_table'))
+
     suite.addTest(TestAlerts('test_create_new_alert'))
     suite.addTest(TestAlerts('test_create_new_alert_empty_body'))
     suite.addTest(TestAlerts('test_subscriptions'))
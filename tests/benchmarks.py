@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Micro-benchmarks.
+
+Run with:
+
+    python3 -m tests.benchmarks
+"""
+
+import timeit
+
+from construct import Container
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+ROUNDS = 5000
+
+HT_CAPS_INFO = {
+    "L_SIG_TXOP_Protection_Support": False,
+    "Forty_MHz_Intolerant": False,
+    "Reserved": False,
+    "DSSS_CCK_Mode_in_40_MHz": False,
+    "Maximum_AMSDU_Length": True,
+    "HT_Delayed_Block_Ack": False,
+    "Rx_STBC": 1,
+    "Tx_STBC": False,
+    "Short_GI_for_40_MHz": False,
+    "Short_GI_for_20_MHz": True,
+    "HT_Greenfield": False,
+    "SM_Power_Save": 3,
+    "Supported_Channel_Width_Set": False,
+    "LDPC_Coding_Capability": True
+}
+
+
+def header(pt_type, **kwargs):
+    """Return a container with the common header fields."""
+
+    return Container(version=lvapp.PT_VERSION, type=pt_type, length=0,
+                     seq=1, xid=1, device=b'\x00\x0d\xb9\x2f\x56\x64',
+                     **kwargs)
+
+
+def outbound_messages():
+    """Return a sample of outbound messages."""
+
+    hello = header(lvapp.PT_HELLO_RESPONSE, period=2000)
+
+    probe = header(lvapp.PT_PROBE_RESPONSE,
+                   sta=b'\x60\xf4\x45\xd0\x3b\xfc',
+                   ssid=b'EmPOWER'.ljust(33, b'\0'))
+
+    txp = header(lvapp.PT_SET_TX_POLICY,
+                 flags=Container(no_ack=False),
+                 sta=b'\x60\xf4\x45\xd0\x3b\xfc',
+                 iface_id=0,
+                 rts_cts=2436,
+                 max_amsdu_len=3839,
+                 tx_mcast=0,
+                 ur_count=3,
+                 nb_mcses=12,
+                 nb_ht_mcses=16,
+                 mcs=[2, 4, 11, 12, 18, 22, 24, 36, 48, 72, 96, 108],
+                 mcs_ht=list(range(0, 16)))
+
+    lvap = header(lvapp.PT_ADD_LVAP_REQUEST,
+                  flags=Container(ht_caps=True, authenticated=True,
+                                  associated=False, set_mask=True),
+                  assoc_id=732,
+                  iface_id=0,
+                  ht_caps_info=Container(**HT_CAPS_INFO),
+                  sta=b'\x60\xf4\x45\xd0\x3b\xfc',
+                  encap=bytes(6),
+                  bssid=b'\x52\x31\x3e\xd0\x3b\xfc',
+                  ssid=b'EmPOWER'.ljust(33, b'\0'),
+                  networks=[Container(bssid=bytes([0x52, 0x31, i, 1, 2, 3]),
+                                      ssid=b'EmPOWER'.ljust(33, b'\0'))
+                            for i in range(0, 4)])
+
+    return [(lvapp.PT_HELLO_RESPONSE, hello),
+            (lvapp.PT_PROBE_RESPONSE, probe),
+            (lvapp.PT_SET_TX_POLICY, txp),
+            (lvapp.PT_ADD_LVAP_REQUEST, lvap)]
+
+
+def codecs_benchmark():
+    """Compare the precompiled encoders against construct.build."""
+
+    buf = bytearray(4096)
+
+    print("%-20s %12s %12s %8s" % ("message", "construct", "codec",
+                                   "speedup"))
+
+    for pt_type, msg in outbound_messages():
+
+        parser = lvapp.PT_TYPES[pt_type]
+        codec = lvapp.CODECS[pt_type]
+
+        msg.length = codec.length(msg)
+
+        if parser.build(msg) != codec.encode(msg):
+            raise ValueError("Codec mismatch for %s" % parser.name)
+
+        ref = timeit.timeit(lambda: parser.build(msg), number=ROUNDS)
+        new = timeit.timeit(lambda: codec.encode_into(buf, 0, msg),
+                            number=ROUNDS)
+
+        print("%-20s %10.2fus %10.2fus %7.1fx" %
+              (parser.name, ref / ROUNDS * 1e6, new / ROUNDS * 1e6,
+               ref / new))
+
+
+if __name__ == '__main__':
+    codecs_benchmark()
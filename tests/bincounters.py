@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Bin counters tests."""
+
+import unittest
+
+import numpy as np
+
+from empower.apps.lvapbincounter.lvapbincounter import \
+    COUNTERS_ENTRIES, parse_bins, bin_counters
+from empower.workers.wifibincounters.wifibincounters import CountersTable
+
+
+class TestBinCounters(unittest.TestCase):
+    """Bin counters tests."""
+
+    def test_bins(self):
+        """test_bins."""
+
+        self.assertEqual(parse_bins("8192"), [8192])
+        self.assertEqual(parse_bins("128,256,8192"), [128, 256, 8192])
+        self.assertRaises(ValueError, parse_bins, "256,128")
+
+        entries = np.array([(64, 2), (128, 1), (129, 3), (1500, 4)],
+                           dtype=COUNTERS_ENTRIES)
+
+        nb_bytes, nb_packets = bin_counters(entries, [128, 8192])
+
+        self.assertEqual(nb_bytes.tolist(), [256, 387 + 6000])
+        self.assertEqual(nb_packets.tolist(), [3, 7])
+
+        nb_bytes, nb_packets = bin_counters(entries[:0], [128, 8192])
+
+        self.assertEqual(nb_bytes.tolist(), [0, 0])
+        self.assertEqual(nb_packets.tolist(), [0, 0])
+
+    def test_table(self):
+        """test_table."""
+
+        table = CountersTable(1, size=2)
+
+        for i in range(5):
+            table.update("sta%u" % i, [[100], [10], [2], [1]], 10.0)
+
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table.station("sta0")["tx_bps"], [0.0])
+
+        table.update("sta0", [[300], [10], [4], [1]], 12.0)
+
+        station = table.station("sta0")
+
+        self.assertEqual(station["tx_bytes"], [300.0])
+        self.assertEqual(station["tx_bps"], [100.0])
+        self.assertEqual(station["tx_pps"], [1.0])
+
+        aggregate = table.aggregate()
+
+        self.assertEqual(aggregate["tx_bytes"], [700.0])
+        self.assertEqual(aggregate["tx_bps"], [100.0])
+
+        table.remove("sta0")
+        table.update("sta5", [[50], [0], [1], [0]], 12.0)
+
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table.rows["sta5"], 0)
+        self.assertEqual(table.aggregate()["tx_bytes"], [450.0])
+        self.assertRaises(KeyError, table.station, "sta0")
+
+
+if __name__ == '__main__':
+    unittest.main()
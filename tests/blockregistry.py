@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Block registry tests."""
+
+import random
+import unittest
+
+from empower_core.etheraddress import EtherAddress
+
+from empower.managers.ranmanager.lvapp.resourcepool import BlockRegistry, \
+    ResourceBlock, ResourcePool, BT_L20, BT_HT20
+
+
+class WTP:
+    """Minimal WTP."""
+
+    def __init__(self, addr):
+
+        self.addr = EtherAddress(addr)
+
+
+def add_blocks(registry, wtp):
+    """Add a 2.4GHz and a 5GHz block to the registry."""
+
+    for block_id, channel, band in [(0, 6, BT_L20), (1, 36, BT_HT20)]:
+
+        hwaddr = EtherAddress(bytes([0x02, block_id]) + wtp.addr.to_raw()[2:])
+        registry.add(ResourceBlock(wtp, block_id, hwaddr, channel, band))
+
+
+class TestBlockRegistry(unittest.TestCase):
+    """Block registry tests."""
+
+    def test_filters(self):
+        """test_filters."""
+
+        registry = BlockRegistry()
+
+        wtps = [WTP("00:0D:B9:2F:56:%02X" % x) for x in range(0, 10)]
+
+        for wtp in wtps:
+            add_blocks(registry, wtp)
+
+        pool = registry.pool()
+        plain = ResourcePool(list(pool))
+
+        self.assertEqual(len(pool), 20)
+
+        for channel in (6, 11, 36):
+            self.assertEqual(pool.filter_by_channel(channel),
+                             plain.filter_by_channel(channel))
+
+        for band in (BT_L20, BT_HT20):
+            self.assertEqual(pool.filter_by_band(band),
+                             plain.filter_by_band(band))
+
+        self.assertEqual(
+            pool.filter_by_channel(36).filter_by_band(BT_HT20).first(),
+            plain.filter_by_channel(36).filter_by_band(BT_HT20).first())
+
+        hwaddr = EtherAddress("02:01:B9:2F:56:03")
+        self.assertEqual(registry.by_hwaddr(hwaddr).wtp, wtps[3])
+
+    def test_remove_wtp(self):
+        """test_remove_wtp."""
+
+        registry = BlockRegistry()
+
+        first = WTP("00:0D:B9:2F:56:01")
+        second = WTP("00:0D:B9:2F:56:02")
+
+        add_blocks(registry, first)
+        add_blocks(registry, second)
+
+        # capabilities received again
+        add_blocks(registry, first)
+
+        self.assertEqual(len(registry.pool()), 4)
+
+        registry.remove_wtp(first.addr)
+
+        self.assertEqual(len(registry.pool()), 2)
+        self.assertTrue(all(x.wtp is second for x in registry.pool()))
+        self.assertEqual(len(registry.pool().filter_by_channel(6)), 1)
+
+    def test_ucqm(self):
+        """test_ucqm."""
+
+        registry = BlockRegistry()
+
+        wtps = [WTP("00:0D:B9:2F:56:%02X" % x) for x in range(0, 10)]
+
+        for wtp in wtps:
+            add_blocks(registry, wtp)
+
+        stations = [EtherAddress("60:F4:45:D0:3B:%02X" % x)
+                    for x in range(0, 20)]
+
+        pool = registry.pool()
+
+        for _ in range(0, 5):
+
+            for block in pool:
+                heard = random.sample(stations, 10)
+                registry.update_ucqm(block, {
+                    sta: {'addr': sta, 'mov_rssi': random.randint(0, 255)}
+                    for sta in heard
+                })
+
+            for sta in stations:
+
+                expected = ResourcePool(list(pool)).sort_by_rssi(sta)
+                ranked = pool.sort_by_rssi(sta)
+
+                self.assertEqual(len(ranked), len(expected))
+                self.assertEqual([x.ucqm[sta]['mov_rssi'] for x in ranked],
+                                 [x.ucqm[sta]['mov_rssi'] for x in expected])
+
+        registry.remove_wtp(wtps[0].addr)
+
+        for sta in stations:
+            self.assertTrue(all(x.wtp is not wtps[0]
+                                for x in registry.pool().sort_by_rssi(sta)))
+
+
+if __name__ == '__main__':
+    unittest.main()
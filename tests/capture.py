@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound capture tests."""
+
+import os
+import tempfile
+import unittest
+
+import empower.managers.ranmanager.lvapp as lvapp
+import empower.managers.ranmanager.vbsp as vbsp
+
+from empower.managers.ranmanager.capture import CaptureWriter, \
+    CaptureReader, INBOUND, OUTBOUND
+
+DEVICE = b'\x00\x0d\xb9\x2f\x56\x64'
+
+
+def hello(seq):
+    """Return an encoded hello request."""
+
+    return lvapp.HELLO_REQUEST.build(dict(version=lvapp.PT_VERSION,
+                                          type=lvapp.PT_HELLO_REQUEST,
+                                          length=24, seq=seq, xid=0,
+                                          device=DEVICE, period=2000))
+
+
+class TestCapture(unittest.TestCase):
+    """Southbound capture tests."""
+
+    def setUp(self):
+
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.unlink(self.path)
+
+    def tearDown(self):
+
+        os.unlink(self.path)
+
+    def test_round_trip(self):
+        """test_round_trip."""
+
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record(INBOUND, DEVICE, hello(1))
+        writer.record_stream(OUTBOUND, hello(2) + hello(3))
+        writer.close()
+
+        # the file is appended to
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record(INBOUND, DEVICE, hello(4))
+        writer.close()
+
+        reader = CaptureReader(self.path)
+        records = list(reader)
+
+        self.assertEqual(reader.proto, "lvapp")
+        self.assertEqual([x.direction for x in records],
+                         [INBOUND, OUTBOUND, OUTBOUND, INBOUND])
+        self.assertEqual([bytes(x.data) for x in records],
+                         [hello(1), hello(2), hello(3), hello(4)])
+        self.assertTrue(all(x.device == DEVICE for x in records))
+
+    def test_truncated(self):
+        """test_truncated."""
+
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record(INBOUND, DEVICE, hello(1))
+        writer.record(INBOUND, DEVICE, hello(2))
+        writer.close()
+
+        with open(self.path, "r+b") as capture:
+            capture.truncate(os.path.getsize(self.path) - 1)
+
+        self.assertEqual(len(list(CaptureReader(self.path))), 1)
+
+        # the truncated record is dropped before appending
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record(INBOUND, DEVICE, hello(3))
+        writer.close()
+
+        self.assertEqual([bytes(x.data) for x in CaptureReader(self.path)],
+                         [hello(1), hello(3)])
+
+    def test_invalid_length(self):
+        """test_invalid_length."""
+
+        empty = bytearray(hello(2))
+        empty[2:6] = bytes(4)
+
+        overlong = bytearray(hello(3))
+        overlong[5] = 0xff
+
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record_stream(OUTBOUND, hello(1) + empty + hello(4))
+        writer.record_stream(OUTBOUND, overlong + hello(5))
+        writer.record_stream(OUTBOUND, hello(6) + hello(7)[:10])
+        writer.close()
+
+        self.assertEqual([bytes(x.data) for x in CaptureReader(self.path)],
+                         [hello(1), empty + hello(4), overlong + hello(5),
+                          hello(6), hello(7)[:10]])
+
+    def test_close(self):
+        """test_close."""
+
+        writer = CaptureWriter(self.path, lvapp)
+        writer.record(INBOUND, DEVICE, hello(1))
+        writer.close()
+
+        reader = CaptureReader(self.path)
+        records = list(reader)
+        reader.close()
+
+        self.assertEqual(records[0].data, hello(1))
+
+    def test_mismatch(self):
+        """test_mismatch."""
+
+        with open(self.path, "wb") as capture:
+            capture.write(b"not a capture file")
+
+        self.assertRaises(ValueError, CaptureWriter, self.path, lvapp)
+
+        os.unlink(self.path)
+
+        CaptureWriter(self.path, vbsp).close()
+
+        self.assertRaises(ValueError, CaptureWriter, self.path, lvapp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Channel statistics decoding tests."""
+
+import asyncio
+import unittest
+
+import numpy as np
+
+from construct import Container
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.workers.wifichannelstats.wifichannelstats import WCS_ENTRY, \
+    WCS_ENTRIES, WCS_RESPONSE, WCS_REQUEST, PT_WCS_REQUEST
+from empower.simulator.agent import Stats
+from empower.simulator.wtp import SimWTP
+
+
+class Writer:
+    """Collect the messages sent by a simulated agent."""
+
+    def __init__(self):
+
+        self.sent = []
+
+    def is_closing(self):
+        """The stream is never closed."""
+
+        return False
+
+    def write(self, data):
+        """Save the message."""
+
+        self.sent.append(bytes(data))
+
+
+def exchange(agent, data):
+    """Feed data to a simulated agent and return the messages it sends."""
+
+    async def serve():
+
+        agent.reader = asyncio.StreamReader()
+        agent.reader.feed_data(data)
+        agent.reader.feed_eof()
+
+        try:
+            await agent.read_loop()
+        except asyncio.IncompleteReadError:
+            pass
+
+    agent.writer = Writer()
+    asyncio.run(serve())
+
+    return agent.writer.sent
+
+
+class TestChannelStats(unittest.TestCase):
+    """Channel statistics decoding tests."""
+
+    def test_entries(self):
+        """test_entries."""
+
+        entries = [Container(type=i % 3, timestamp=(1 << 40) + i,
+                             sample=180 * i) for i in range(9)]
+
+        data = b"".join(WCS_ENTRY.build(x) for x in entries)
+
+        msg = Container(version=0, type=0x4B, length=0, seq=1, xid=1,
+                        device=bytes(6), iface_id=0, nb_entries=len(entries),
+                        entries=data)
+
+        response = WCS_RESPONSE.parse(WCS_RESPONSE.build(msg))
+        decoded = np.frombuffer(response.entries, dtype=WCS_ENTRIES)
+
+        self.assertEqual(WCS_ENTRIES.itemsize, WCS_ENTRY.sizeof())
+        self.assertEqual(decoded["type"].tolist(), [x.type for x in entries])
+        self.assertEqual(decoded["timestamp"].tolist(),
+                         [x.timestamp for x in entries])
+        self.assertEqual(decoded["sample"].tolist(),
+                         [x.sample for x in entries])
+
+    def test_simulator(self):
+        """test_simulator."""
+
+        wtp = SimWTP("00:0D:B9:2F:56:64", "127.0.0.1", 4433, Stats(), [], [])
+
+        request = Container(version=lvapp.PT_VERSION, type=PT_WCS_REQUEST,
+                            length=WCS_REQUEST.sizeof(), seq=1, xid=7,
+                            device=bytes(6), iface_id=1)
+
+        sent = exchange(wtp, WCS_REQUEST.build(request))
+
+        self.assertEqual(len(sent), 1)
+
+        response = WCS_RESPONSE.parse(sent[0])
+        decoded = np.frombuffer(response.entries, dtype=WCS_ENTRIES)
+
+        self.assertEqual(response.length, len(sent[0]))
+        self.assertEqual(response.xid, 7)
+        self.assertEqual(response.iface_id, 1)
+        self.assertEqual(response.nb_entries, 300)
+        self.assertEqual(decoded["type"].tolist(), [0] * 100 + [1] * 100 +
+                         [2] * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
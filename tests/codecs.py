@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Codecs conformance tests."""
+
+import os
+import unittest
+
+from construct import Struct, Int16ub, Bytes, Array, Container, \
+    StreamError, this
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.managers.ranmanager.codec import compile_codec
+
+
+class TestCodecs(unittest.TestCase):
+    """Codecs conformance tests.
+
+    Every registered codec is checked against the construct definition it
+    has been compiled from.
+    """
+
+    def assert_same(self, record, container):
+        """Check that a decoded record matches a construct container."""
+
+        for field in record._fields:
+
+            value = getattr(record, field)
+            expected = container[field]
+
+            if hasattr(value, "_fields"):
+                self.assert_same(value, expected)
+            elif isinstance(value, list) and value and \
+                    hasattr(value[0], "_fields"):
+                self.assertEqual(len(value), len(expected))
+                for item, expected_item in zip(value, expected):
+                    self.assert_same(item, expected_item)
+            elif isinstance(value, list):
+                self.assertEqual(value, list(expected), field)
+            else:
+                self.assertEqual(value, expected, field)
+
+    def round_trip(self, codec, nb_items=0):
+        """Round trip a random message through codec and construct."""
+
+        size = codec.sizeof()
+
+        # arrays take their length from the fixed part, leave enough room for
+        # the longest ones, construct will ignore the extra bytes
+        for tail in codec.tail:
+            if tail.count is None:
+                size += nb_items * tail.fmt.size
+            else:
+                size += 255 * tail.fmt.size
+
+        # construct zeroes the paddings, so use its output as reference
+        data = codec.parser.build(codec.parser.parse(os.urandom(size)))
+        container = codec.parser.parse(data)
+
+        record = codec.decode(data)
+        self.assert_same(record, container)
+
+        record = codec.decode(memoryview(bytearray(data)))
+        self.assert_same(record, container)
+
+        self.assertEqual(codec.length(record), len(data))
+        self.assertEqual(codec.encode(record), data)
+        self.assertEqual(codec.encode(container), data)
+
+        buf = bytearray(len(data) + 10)
+        self.assertEqual(codec.encode_into(buf, 5, container), len(data) + 5)
+        self.assertEqual(buf[5:-5], data)
+
+    def test_lvapp_codecs(self):
+        """test_lvapp_codecs."""
+
+        for pt_type, codec in lvapp.CODECS.items():
+
+            if not codec:
+                continue
+
+            self.assertIs(codec.parser, lvapp.PT_TYPES[pt_type])
+
+            for nb_items in range(0, 5 if codec.tail else 1):
+                for _ in range(0, 20):
+                    self.round_trip(codec, nb_items)
+
+    def test_lvapp_hot_messages(self):
+        """test_lvapp_hot_messages."""
+
+        hot = [lvapp.PT_HELLO_REQUEST, lvapp.PT_PROBE_REQUEST,
+               lvapp.PT_AUTH_REQUEST, lvapp.PT_ASSOC_REQUEST,
+               lvapp.PT_LVAP_STATUS_RESPONSE]
+
+        for pt_type in hot:
+            self.assertIsNotNone(lvapp.CODECS[pt_type])
+
+    def test_variable_length(self):
+        """test_variable_length."""
+
+        self.assertIsNotNone(lvapp.CODECS[lvapp.PT_CAPS_RESPONSE])
+        self.assertIsNotNone(lvapp.CODECS[lvapp.PT_SET_TX_POLICY])
+        self.assertIsNone(compile_codec(None))
+
+        tlvs = Struct("type" / Int16ub,
+                      "length" / Int16ub,
+                      "value" / Bytes(this.length - 4))
+
+        self.assertIsNone(compile_codec(tlvs))
+
+    def test_bytes_length(self):
+        """test_bytes_length."""
+
+        parser = Struct("length" / Int16ub,
+                        "addr" / Bytes(6),
+                        "entries" / Array(lambda ctx: 1,
+                                        Struct("ssid" / Bytes(4))))
+
+        codec = compile_codec(parser)
+
+        msg = Container(length=0, addr=bytes(6),
+                        entries=[Container(ssid=bytes(4))])
+
+        self.assertEqual(codec.encode(msg), parser.build(msg))
+
+        for addr, ssid in ((bytes(5), bytes(4)), (bytes(7), bytes(4)),
+                           (bytes(6), bytes(3))):
+
+            msg = Container(length=0, addr=addr,
+                            entries=[Container(ssid=ssid)])
+
+            self.assertRaises(StreamError, parser.build, msg)
+            self.assertRaises(StreamError, codec.encode, msg)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Dispatcher tests."""
+
+import unittest
+
+from construct import Container
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.managers.ranmanager.dispatcher import Dispatcher
+
+
+class Connection:
+    """Minimal connection with a default handler."""
+
+    def __init__(self):
+
+        self.device = "device"
+        self.xids = {}
+        self.received = []
+
+    def resolve_xid(self, msg):
+        """Invoke the callback of the pending request."""
+
+        request, callback = self.xids.pop(msg.xid)
+        callback(msg, self.device, request)
+
+    def _handle_hello_request(self, msg):
+        """Default handler."""
+
+        self.received.append(("default", msg.xid))
+
+
+class TestDispatcher(unittest.TestCase):
+    """Dispatcher tests."""
+
+    def test_dispatch(self):
+        """test_dispatch."""
+
+        dispatcher = Dispatcher(lvapp, Connection)
+        connection = Connection()
+        received = []
+
+        def callback(msg, device):
+            received.append((msg.xid, device))
+
+        def resolved(msg, device, request):
+            received.append(("xid", msg.xid, request))
+
+        msg = Container(type=lvapp.PT_HELLO_REQUEST, xid=7)
+
+        dispatcher.dispatch(connection, lvapp.PT_HELLO_REQUEST, msg)
+        self.assertEqual(connection.received, [("default", 7)])
+        self.assertEqual(received, [])
+
+        generation = dispatcher.generation
+        lvapp.register_callback(lvapp.PT_HELLO_REQUEST, callback)
+
+        try:
+
+            connection.xids[7] = ("request", resolved)
+            dispatcher.dispatch(connection, lvapp.PT_HELLO_REQUEST, msg)
+
+            self.assertNotEqual(dispatcher.generation, generation)
+            self.assertEqual(received, [(7, "device"),
+                                        ("xid", 7, "request")])
+            self.assertEqual(connection.xids, {})
+
+        finally:
+            lvapp.unregister_callback(lvapp.PT_HELLO_REQUEST, callback)
+
+        dispatcher.dispatch(connection, lvapp.PT_HELLO_REQUEST, msg)
+        self.assertEqual(len(received), 2)
+
+        stats = dispatcher.to_dict()["hello_request"]
+        self.assertEqual(stats.calls, 3)
+        self.assertEqual(stats.handlers[callback.__qualname__].calls, 1)
+
+    def test_unknown_type(self):
+        """test_unknown_type."""
+
+        dispatcher = Dispatcher(lvapp, Connection)
+        connection = Connection()
+
+        dispatcher.dispatch(connection, 0xFF, Container(xid=1))
+
+        self.assertEqual(connection.received, [])
+        self.assertEqual(dispatcher.to_dict(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Indexed dict tests."""
+
+import unittest
+
+from operator import attrgetter
+
+from empower_core.serialize import serialize
+
+from empower.managers.ranmanager.indexeddict import IndexedDict
+
+
+class Item:
+    """Item with two indexed attributes."""
+
+    def __init__(self, ssid, wtp=None):
+
+        self.ssid = ssid
+        self.wtp = wtp
+
+
+class TestIndexedDict(unittest.TestCase):
+    """Indexed dict tests."""
+
+    def test_views(self):
+        """test_views."""
+
+        items = IndexedDict(ssid=attrgetter("ssid"))
+
+        view_a = items.view("ssid", "a")
+        view_b = items.view("ssid", "b")
+
+        items[1] = Item("a")
+        items[2] = Item("a")
+        items[3] = Item("b")
+
+        self.assertEqual(sorted(view_a), [1, 2])
+        self.assertEqual(list(view_b), [3])
+        self.assertIn(1, view_a)
+        self.assertNotIn(3, view_a)
+
+        # views are read only
+        with self.assertRaises(TypeError):
+            view_a[4] = Item("a")
+
+        # replace
+        items[2] = Item("b")
+        self.assertEqual(list(view_a), [1])
+        self.assertEqual(sorted(view_b), [2, 3])
+
+        # attribute modified in place
+        items[1].ssid = "b"
+        items.reindex(1, "ssid")
+        self.assertEqual(len(view_a), 0)
+        self.assertEqual(sorted(view_b), [1, 2, 3])
+
+        del items[3]
+        self.assertEqual(items.pop(2).ssid, "b")
+        self.assertIsNone(items.pop(2, None))
+        self.assertEqual(list(view_b), [1])
+
+        items.clear()
+        self.assertEqual(len(view_b), 0)
+        self.assertEqual(len(items), 0)
+
+    def test_serialize(self):
+        """test_serialize."""
+
+        # floats grouped by their real part
+        items = IndexedDict(real=attrgetter("real"))
+        items[1] = 1.0
+        items[2] = 2.0
+
+        self.assertEqual(serialize(items), {"1": 1.0, "2": 2.0})
+        self.assertEqual(serialize(items.view("real", 2.0)), {"2": 2.0})
+
+    def test_multiple_indexes(self):
+        """test_multiple_indexes."""
+
+        items = IndexedDict(ssid=attrgetter("ssid"), wtp=attrgetter("wtp"))
+
+        items[1] = Item("a", "wtp1")
+        items[2] = Item("b", "wtp1")
+        items[3] = Item("b", "wtp2")
+
+        self.assertEqual(sorted(items.view("wtp", "wtp1")), [1, 2])
+        self.assertEqual(sorted(items.view("ssid", "b")), [2, 3])
+
+        # only the specified index is updated
+        items[2].wtp = "wtp2"
+        items[2].ssid = "a"
+        items.reindex(2, "wtp")
+
+        self.assertEqual(list(items.view("wtp", "wtp1")), [1])
+        self.assertEqual(sorted(items.view("wtp", "wtp2")), [2, 3])
+        self.assertEqual(sorted(items.view("ssid", "b")), [2, 3])
+
+        items.reindex(2)
+        self.assertEqual(list(items.view("ssid", "b")), [3])
+
+        del items[2]
+        self.assertEqual(list(items.view("wtp", "wtp2")), [3])
+        self.assertEqual(list(items.view("ssid", "a")), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
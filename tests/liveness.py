@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Liveness scheduler tests."""
+
+import unittest
+
+import tornado.gen
+import tornado.ioloop
+
+from empower.managers.ranmanager.liveness import LivenessScheduler
+
+
+class Connection:
+    """Minimal connection."""
+
+    def __init__(self, name, expired):
+
+        self.name = name
+        self.expired = expired
+        self.deadline = None
+        self.hb_token = None
+
+    def heartbeat_timeout(self):
+        """Record the timeout."""
+
+        self.expired.append(self.name)
+
+
+class TestLiveness(unittest.TestCase):
+    """Liveness scheduler tests."""
+
+    def test_expire(self):
+        """test_expire."""
+
+        expired = []
+        scheduler = LivenessScheduler(0.1, 0.01)
+
+        silent = Connection("silent", expired)
+        alive = Connection("alive", expired)
+        removed = Connection("removed", expired)
+
+        async def run():
+
+            scheduler.add(silent)
+            scheduler.add(alive)
+            scheduler.add(removed)
+            scheduler.remove(removed)
+
+            for _ in range(0, 10):
+                await tornado.gen.sleep(0.03)
+                scheduler.touch(alive)
+
+            self.assertEqual(expired, ["silent"])
+
+            await tornado.gen.sleep(0.2)
+
+            self.assertEqual(expired, ["silent", "alive"])
+            self.assertEqual(scheduler.heap, [])
+            self.assertIsNone(scheduler.timer)
+
+        tornado.ioloop.IOLoop.current().run_sync(run)
+
+
+if __name__ == '__main__':
+    unittest.main()
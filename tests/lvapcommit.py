@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""LVAP commit tests."""
+
+import unittest
+
+from collections import namedtuple
+
+from construct import Container
+
+from empower_core.etheraddress import EtherAddress
+from empower_core.ssid import SSID
+
+from empower.managers.ranmanager.lvapp.lvap import LVAP, PROCESS_RUNNING
+
+WTP = namedtuple("WTP", "connection")
+Block = namedtuple("Block", "wtp hwaddr")
+
+
+class Connection:
+    """Records the add lvap requests."""
+
+    def __init__(self):
+
+        self.sent = []
+
+    def send_add_lvap_request(self, lvap, block, set_mask):
+        """Record an add lvap request and return its xid."""
+
+        self.sent.append((lvap.addr, block, set_mask))
+        return len(self.sent)
+
+
+class TestLVAPCommit(unittest.TestCase):
+    """LVAP commit tests."""
+
+    def test_commit(self):
+        """test_commit."""
+
+        connection = Connection()
+
+        block = Block(WTP(connection), EtherAddress("00:0D:B9:2F:56:64"))
+
+        lvap = LVAP(EtherAddress("60:F4:45:D0:3B:FC"), 1)
+        lvap._downlink = block
+
+        networks = [(EtherAddress("52:31:3E:D0:3B:FC"), SSID("EmPOWER"))]
+
+        lvap.networks = networks
+        lvap.commit()
+
+        lvap.networks = list(networks)
+        lvap.commit()
+
+        self.assertEqual(len(connection.sent), 1)
+        self.assertEqual(lvap.commits, {"sent": 1, "suppressed": 1})
+
+        lvap.bssid = EtherAddress("52:31:3E:D0:3B:FC")
+        lvap.authentication_state = True
+        lvap.commit()
+
+        self.assertEqual(len(connection.sent), 2)
+        self.assertEqual(lvap.pending, [1, 2])
+        self.assertEqual(lvap.commits, {"sent": 2, "suppressed": 1})
+
+    def setup_lvap(self):
+        """Return a committed LVAP and its connection."""
+
+        connection = Connection()
+
+        block = Block(WTP(connection), EtherAddress("00:0D:B9:2F:56:64"))
+
+        lvap = LVAP(EtherAddress("60:F4:45:D0:3B:FC"), 1)
+        lvap._downlink = block
+        lvap._state = PROCESS_RUNNING
+
+        lvap.networks = [(EtherAddress("52:31:3E:D0:3B:FC"),
+                          SSID("EmPOWER"))]
+        lvap.commit()
+
+        return lvap, connection
+
+    def test_timeout(self):
+        """test_timeout."""
+
+        lvap, connection = self.setup_lvap()
+
+        lvap.handle_add_lvap_timeout(Container(xid=1), None)
+        lvap.commit()
+
+        self.assertEqual(len(connection.sent), 2)
+        self.assertEqual(lvap.commits, {"sent": 2, "suppressed": 0})
+
+        lvap.commit()
+
+        self.assertEqual(lvap.commits, {"sent": 2, "suppressed": 1})
+
+    def test_failure(self):
+        """test_failure."""
+
+        lvap, connection = self.setup_lvap()
+
+        lvap.handle_add_lvap_response(Container(xid=1, status=0))
+        lvap.commit()
+
+        self.assertEqual(len(connection.sent), 1)
+
+        lvap.networks = []
+        lvap.commit()
+
+        lvap.handle_add_lvap_response(Container(xid=2, status=1))
+        lvap.commit()
+
+        self.assertEqual(len(connection.sent), 3)
+        self.assertEqual(lvap.commits, {"sent": 3, "suppressed": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""UE measurements matrix tests."""
+
+import unittest
+
+from collections import namedtuple
+
+from empower.managers.ranmanager.vbsp.measurements import MeasurementsMatrix
+
+VBS = namedtuple("VBS", "addr")
+Cell = namedtuple("Cell", "vbs pci")
+
+
+class TestMeasurements(unittest.TestCase):
+    """UE measurements matrix tests."""
+
+    def setUp(self):
+
+        self.cell1 = Cell(VBS("vbs1"), 1)
+        self.cell2 = Cell(VBS("vbs1"), 2)
+        self.cell3 = Cell(VBS("vbs2"), 1)
+
+        self.matrix = MeasurementsMatrix(size=2)
+
+        self.matrix.update("ue1", self.cell1, -90, -10)
+        self.matrix.update("ue1", self.cell2, -80, -12)
+        self.matrix.update("ue2", self.cell3, -100, -15)
+        self.matrix.update("ue3", self.cell1, -70, -8)
+        self.matrix.update("ue3", self.cell3, -75, -5)
+
+    def test_queries(self):
+        """test_queries."""
+
+        self.assertEqual(len(self.matrix), 3)
+
+        self.assertEqual(self.matrix.get("ue1"),
+                         {self.cell1: {"rsrp": -90, "rsrq": -10},
+                          self.cell2: {"rsrp": -80, "rsrq": -12}})
+        self.assertEqual(self.matrix.get("ue4"), {})
+
+        self.assertEqual(self.matrix.rank("ue3"), [self.cell1, self.cell3])
+        self.assertEqual(self.matrix.rank("ue3", "rsrq"),
+                         [self.cell3, self.cell1])
+        self.assertEqual(self.matrix.rank("ue1", cells=[self.cell1]),
+                         [self.cell1])
+
+        self.assertEqual(self.matrix.best_cells(),
+                         {"ue1": self.cell2, "ue2": self.cell3,
+                          "ue3": self.cell1})
+
+        self.assertEqual(self.matrix.below(-85),
+                         {self.cell1: ["ue1"], self.cell3: ["ue2"]})
+
+        self.assertRaises(ValueError, self.matrix.best_cells, "cqi")
+
+    def test_remove(self):
+        """test_remove."""
+
+        self.matrix.remove_ue("ue1")
+        self.matrix.remove_vbs("vbs2")
+
+        self.assertEqual(self.matrix.best_cells(), {"ue3": self.cell1})
+        self.assertEqual(self.matrix.below(0), {self.cell1: ["ue3"]})
+        self.assertEqual(self.matrix.rank("ue2"), [])
+
+        # rows and columns are recycled
+        self.matrix.update("ue4", self.cell3, -60, -3)
+
+        self.assertEqual(self.matrix.rows["ue4"], 0)
+        self.assertEqual(self.matrix.best_cells(),
+                         {"ue3": self.cell1, "ue4": self.cell3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Outbound queues tests."""
+
+import unittest
+
+import tornado.gen
+import tornado.ioloop
+
+from tornado.concurrent import Future
+
+import empower.managers.ranmanager.lvapp as lvapp
+import empower.managers.ranmanager.ranconnection as ranconnection
+
+from empower.managers.ranmanager.ranconnection import RANConnection
+from empower.managers.ranmanager.transactions import TransactionManager
+
+DEVICE = b'\x00\x0d\xb9\x2f\x56\x64'
+
+PT_TELEMETRY = 0xF0
+
+
+class Stream:
+    """Minimal stream, writes complete only when drain is called."""
+
+    def __init__(self):
+
+        self.data = []
+        self.futures = []
+
+    def set_nodelay(self, value):
+        """Do nothing."""
+
+    def set_close_callback(self, callback):
+        """Do nothing."""
+
+    def read_into(self, buf):
+        """Never complete."""
+
+        return Future()
+
+    def closed(self):
+        """Always open."""
+
+        return False
+
+    def write(self, data):
+        """Record the data."""
+
+        self.data.append(data)
+        self.futures.append(Future())
+
+        return self.futures[-1]
+
+    def drain(self):
+        """Complete all the pending writes."""
+
+        for future in self.futures:
+            future.set_result(None)
+
+        self.futures = []
+
+
+class Manager:
+    """Minimal manager."""
+
+    proto = lvapp
+    recorder = None
+
+    def __init__(self):
+
+        self.transactions = TransactionManager(str)
+
+
+def message(pt_type, xid, period=2000):
+    """Return an encoded message."""
+
+    return lvapp.HELLO_REQUEST.build(dict(version=lvapp.PT_VERSION,
+                                          type=pt_type, length=24, seq=xid,
+                                          xid=xid, device=DEVICE,
+                                          period=period))
+
+
+class TestOutbound(unittest.TestCase):
+    """Outbound queues tests."""
+
+    def test_priority(self):
+        """test_priority."""
+
+        stream = Stream()
+        connection = RANConnection(stream, Manager())
+
+        telemetry = message(PT_TELEMETRY, 1)
+        control = message(lvapp.PT_HELLO_RESPONSE, 2)
+
+        connection.enqueue(PT_TELEMETRY, telemetry)
+        connection.write(control)
+        connection.flush()
+
+        self.assertEqual(stream.data, [control + telemetry])
+        self.assertEqual(connection.inflight, 48)
+
+        async def run():
+            stream.drain()
+
+        tornado.ioloop.IOLoop.current().run_sync(run)
+
+        self.assertEqual(connection.inflight, 0)
+
+    def test_coalesce(self):
+        """test_coalesce."""
+
+        stream = Stream()
+        connection = RANConnection(stream, Manager())
+        manager = connection.manager
+
+        first = message(PT_TELEMETRY, 1)
+        connection.enqueue(PT_TELEMETRY, first)
+        manager.transactions.add(connection, PT_TELEMETRY,
+                                 lvapp.decode_header(first), None)
+
+        # same request, the first one is replaced
+        connection.enqueue(PT_TELEMETRY, message(PT_TELEMETRY, 2))
+
+        # different request
+        connection.enqueue(PT_TELEMETRY, message(PT_TELEMETRY, 3, 1000))
+
+        self.assertEqual(connection.coalesced, 1)
+        self.assertEqual(len(connection.telemetry), 2)
+        self.assertNotIn(1, connection.xids)
+        self.assertEqual(manager.transactions.pending, 0)
+
+    def test_backpressure(self):
+        """test_backpressure."""
+
+        stream = Stream()
+        connection = RANConnection(stream, Manager())
+
+        budget = ranconnection.OUTBOUND_BUDGET
+
+        connection.write(bytes(budget))
+        connection.flush()
+
+        # the socket is not keeping up, telemetry is held back
+        connection.enqueue(PT_TELEMETRY, message(PT_TELEMETRY, 1))
+        connection.flush()
+
+        self.assertEqual(len(stream.data), 1)
+        self.assertEqual(len(connection.telemetry), 1)
+
+        # control messages are never held back
+        connection.write(message(lvapp.PT_HELLO_RESPONSE, 2))
+        connection.flush()
+
+        self.assertEqual(len(stream.data), 2)
+
+        async def run():
+            stream.drain()
+            await tornado.gen.sleep(0)
+            await tornado.gen.sleep(0)
+
+        tornado.ioloop.IOLoop.current().run_sync(run)
+
+        self.assertEqual(len(stream.data), 3)
+        self.assertEqual(stream.data[2], message(PT_TELEMETRY, 1))
+        self.assertFalse(connection.telemetry)
+
+    def test_drop(self):
+        """test_drop."""
+
+        connection = RANConnection(Stream(), Manager())
+
+        nb_messages = ranconnection.TELEMETRY_BUDGET // 24 + 10
+
+        for xid in range(0, nb_messages):
+            connection.enqueue(PT_TELEMETRY, message(PT_TELEMETRY, xid, xid))
+
+        self.assertEqual(connection.dropped, 10)
+        self.assertEqual(connection.telemetry_bytes,
+                         24 * (nb_messages - 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Handover planner tests."""
+
+import unittest
+
+from collections import namedtuple
+
+from empower.apps.wifimobilitymanager.planner import HandoverPlanner
+
+LVAP = namedtuple("LVAP", "addr downlink")
+
+
+class TestPlanner(unittest.TestCase):
+    """Handover planner tests."""
+
+    @staticmethod
+    def ucqm(measurements):
+        """Return an inverted UCQM from (sta, block, rssi) tuples."""
+
+        out = {}
+
+        for sta, block, rssi in measurements:
+            out.setdefault(sta, {})[block] = (rssi, block)
+
+        return out
+
+    def test_hysteresis(self):
+        """test_hysteresis."""
+
+        lvaps = [LVAP("sta1", "b1"), LVAP("sta2", "b1"), LVAP("sta3", "b2")]
+
+        ucqm = self.ucqm([("sta1", "b1", -70), ("sta1", "b2", -60),
+                          ("sta2", "b1", -70), ("sta2", "b2", -68),
+                          ("sta3", "b1", -50), ("sta3", "b2", -40)])
+
+        planner = HandoverPlanner(hysteresis=3)
+        self.assertEqual(planner.plan(lvaps, ucqm), [(lvaps[0], "b2")])
+
+        planner = HandoverPlanner(hysteresis=0)
+        self.assertEqual(planner.plan(lvaps, ucqm),
+                         [(lvaps[0], "b2"), (lvaps[1], "b2")])
+
+        self.assertEqual(planner.plan([], ucqm), [])
+
+    def test_unheard(self):
+        """test_unheard."""
+
+        lvaps = [LVAP("sta1", "b1"), LVAP("sta2", "b3")]
+
+        ucqm = self.ucqm([("sta1", "b2", -80)])
+
+        planner = HandoverPlanner(hysteresis=3)
+        self.assertEqual(planner.plan(lvaps, ucqm), [(lvaps[0], "b2")])
+
+    def test_budget(self):
+        """test_budget."""
+
+        lvaps = [LVAP("sta%u" % i, "b1") for i in range(4)]
+
+        ucqm = self.ucqm([("sta%u" % i, "b1", -80) for i in range(4)] +
+                         [("sta%u" % i, "b2", -60 + i) for i in range(4)])
+
+        planner = HandoverPlanner(max_handovers=2)
+        self.assertEqual(planner.plan(lvaps, ucqm),
+                         [(lvaps[3], "b2"), (lvaps[2], "b2")])
+
+    def test_max_load(self):
+        """test_max_load."""
+
+        lvaps = [LVAP("sta1", "b1"), LVAP("sta2", "b1"), LVAP("sta3", "b2")]
+
+        ucqm = self.ucqm([("sta1", "b2", -50), ("sta1", "b3", -60),
+                          ("sta2", "b2", -55), ("sta2", "b3", -75),
+                          ("sta3", "b2", -50)])
+
+        planner = HandoverPlanner(max_load=2)
+        self.assertEqual(planner.plan(lvaps, ucqm),
+                         [(lvaps[0], "b2"), (lvaps[1], "b3")])
+
+        planner = HandoverPlanner(max_load=2, max_handovers=1)
+        self.assertEqual(planner.plan(lvaps, ucqm), [(lvaps[0], "b2")])
+
+    def test_external_load(self):
+        """test_external_load."""
+
+        lvaps = [LVAP("sta1", "b1"), LVAP("sta2", "b1")]
+
+        ucqm = self.ucqm([("sta1", "b2", -50), ("sta1", "b3", -60),
+                          ("sta2", "b2", -55), ("sta2", "b3", -75)])
+
+        planner = HandoverPlanner(max_load=2)
+
+        # b2 hosts an LVAP of another project, b3 a handover in progress
+        load = {"b1": 2, "b2": 1, "b3": 1}
+
+        self.assertEqual(planner.plan(lvaps, ucqm, load),
+                         [(lvaps[0], "b2"), (lvaps[1], "b3")])
+
+        load = {"b1": 2, "b2": 2, "b3": 1}
+
+        self.assertEqual(planner.plan(lvaps, ucqm, load),
+                         [(lvaps[0], "b3")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Batched time-series writer tests."""
+
+import threading
+import unittest
+
+from empower.managers.ranmanager.pointswriter import PointsWriter, TagSets, \
+    DROP_NEWEST
+
+
+class TestPointsWriter(unittest.TestCase):
+    """Batched time-series writer tests."""
+
+    def test_batches(self):
+        """test_batches."""
+
+        batches = []
+
+        writer = PointsWriter(sink=batches.append, batch_size=4, interval=10)
+
+        writer.write(list(range(10)))
+        writer.stop()
+
+        self.assertEqual(sum(batches, []), list(range(10)))
+        self.assertTrue(all(len(x) <= 4 for x in batches))
+        self.assertEqual(writer.written, 10)
+        self.assertFalse(writer.thread)
+
+    def test_drop(self):
+        """test_drop."""
+
+        oldest = PointsWriter(sink=None, size=4)
+        newest = PointsWriter(sink=None, size=4, policy=DROP_NEWEST)
+
+        # not started, points stay in the buffer
+        for writer in (oldest, newest):
+            writer.running = True
+            writer.write(list(range(6)))
+
+        self.assertEqual(list(oldest.buffer), [2, 3, 4, 5])
+        self.assertEqual(list(newest.buffer), [0, 1, 2, 3])
+        self.assertEqual(oldest.dropped, 2)
+        self.assertEqual(newest.dropped, 2)
+        self.assertEqual(newest.accepted, 4)
+
+        self.assertRaises(ValueError, PointsWriter, policy="random")
+
+    def test_errors(self):
+        """test_errors."""
+
+        def sink(_):
+            raise IOError("Database unreachable")
+
+        writer = PointsWriter(sink=sink, batch_size=2)
+
+        writer.buffer.extend(range(3))
+        writer.flush()
+
+        self.assertEqual(writer.errors, 2)
+        self.assertEqual(writer.written, 0)
+        self.assertFalse(writer.buffer)
+
+    def test_restart(self):
+        """test_restart."""
+
+        batches = []
+
+        def sink(batch):
+            if not batches:
+                batches.append(None)
+                raise SystemExit(1)
+            batches.append(batch)
+
+        writer = PointsWriter(sink=sink, batch_size=2, interval=0.01)
+
+        writer.write([1, 2])
+        writer.thread.join(1)
+
+        self.assertFalse(writer.running)
+
+        writer.write([3, 4])
+        writer.stop()
+
+        self.assertEqual(batches, [None, [3, 4]])
+        self.assertEqual(writer.written, 2)
+
+    def test_stop_timeout(self):
+        """test_stop_timeout."""
+
+        release = threading.Event()
+        batches = []
+
+        def sink(batch):
+            release.wait(10)
+            batches.append(batch)
+
+        writer = PointsWriter(sink=sink, interval=0.01)
+
+        writer.write([1, 2])
+        writer.stop(0.05)
+
+        # the sink is blocked, the thread is left running
+        self.assertFalse(writer.running)
+        self.assertTrue(writer.thread.is_alive())
+
+        release.set()
+        writer.thread.join(1)
+
+        self.assertEqual(batches, [[1, 2]])
+
+    def test_tags(self):
+        """test_tags."""
+
+        tag_sets = TagSets()
+        params = {"sta": "sta1", "every": 2000}
+
+        tags = tag_sets.get(params, {"bin": 8192})
+
+        self.assertEqual(tags, {"sta": "sta1", "every": 2000, "bin": 8192})
+        self.assertIs(tag_sets.get(params, {"bin": 8192}), tags)
+
+        params["every"] = 1000
+
+        self.assertEqual(tag_sets.get(params, {"bin": 8192})["every"], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
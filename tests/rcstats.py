@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Rate control statistics tests."""
+
+import unittest
+
+import numpy as np
+
+from construct import Container
+
+import empower.managers.ranmanager.lvapp as lvapp
+
+from empower.apps.wifircstats.wifircstats import RC_ENTRIES, \
+    WIFI_RC_STATS_REQUEST, WIFI_RC_STATS_RESPONSE, PT_WIFI_RC_STATS_REQUEST, \
+    decode_rc_stats
+from empower.workers.wifircstats.wifircstats import RCStatsTable
+from empower.simulator.agent import Stats
+from empower.simulator.wtp import SimWTP, RATES
+
+from .channelstats import exchange
+
+
+class TestRCStats(unittest.TestCase):
+    """Rate control statistics tests."""
+
+    def test_decode(self):
+        """test_decode."""
+
+        entries = np.zeros(2, dtype=RC_ENTRIES)
+        entries["rate"] = [12, 108]
+        entries["prob"] = [18000, 9000]
+        entries["last_attempts"] = [10, 20]
+
+        response = Container(nb_entries=2, stats=entries.tobytes())
+
+        rates, stats = decode_rc_stats(response, False)
+
+        self.assertEqual(rates.tolist(), [6.0, 54.0])
+        self.assertEqual(stats.shape, (7, 2))
+        self.assertEqual(stats[0].tolist(), [100.0, 50.0])
+        self.assertEqual(stats[3].tolist(), [10.0, 20.0])
+
+        rates, stats = decode_rc_stats(response, True)
+
+        self.assertEqual(rates.tolist(), [12, 108])
+
+    def test_simulator(self):
+        """test_simulator."""
+
+        sta = b'\x60\xf4\x45\xd0\x3b\xfc'
+
+        wtp = SimWTP("00:0D:B9:2F:56:64", "127.0.0.1", 4433, Stats(), [], [])
+        wtp.lvaps[sta] = Container(flags=Container(ht_caps=False), iface_id=1)
+
+        request = Container(version=lvapp.PT_VERSION,
+                            type=PT_WIFI_RC_STATS_REQUEST,
+                            length=WIFI_RC_STATS_REQUEST.sizeof(), seq=1,
+                            xid=7, device=bytes(6), sta=sta)
+
+        sent = exchange(wtp, WIFI_RC_STATS_REQUEST.build(request))
+
+        self.assertEqual(len(sent), 1)
+
+        response = WIFI_RC_STATS_RESPONSE.parse(sent[0])
+
+        self.assertEqual(response.length, len(sent[0]))
+        self.assertEqual(response.xid, 7)
+        self.assertEqual(response.sta, sta)
+        self.assertEqual(response.nb_entries, len(RATES))
+
+        rates, stats = decode_rc_stats(response, False)
+
+        self.assertEqual(rates.tolist(), [x / 2.0 for x in RATES])
+        self.assertEqual(stats.shape, (7, len(RATES)))
+        self.assertTrue((stats[0] <= 100.0).all())
+        self.assertTrue((stats[4] * 2 <= stats[3]).all())
+
+    def test_table(self):
+        """test_table."""
+
+        table = RCStatsTable(size=2, nb_rates=2)
+
+        stats = np.zeros((7, 3))
+        stats[0] = [90.0, 95.0, 40.0]
+        stats[2] = [5.0, 10.0, 20.0]
+
+        for i in range(3):
+            table.update("sta%u" % i, [6.0, 12.0, 24.0], stats)
+
+        table.update("sta1", [6.0], stats[:, :1])
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.best("prob"),
+                         {"sta0": 12.0, "sta1": 6.0, "sta2": 12.0})
+        self.assertEqual(table.best("cur_tp"),
+                         {"sta0": 24.0, "sta1": 6.0, "sta2": 24.0})
+
+        self.assertEqual(list(table.station("sta1")), [6.0])
+        self.assertEqual(table.station("sta0")[24.0]["prob"], 40.0)
+
+        table.remove("sta0")
+        table.update("sta3", [], np.zeros((7, 0)))
+
+        self.assertEqual(table.rows["sta3"], 0)
+        self.assertEqual(table.station("sta3"), {})
+        self.assertNotIn("sta3", table.best("prob"))
+        self.assertNotIn("sta0", table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Statistics store tests."""
+
+import time
+import unittest
+
+from empower.managers.ranmanager.statsstore import StatsStore, RingBuffer
+
+
+class TestStatsStore(unittest.TestCase):
+    """Statistics store tests."""
+
+    def test_ring_buffer(self):
+        """test_ring_buffer."""
+
+        buffer = RingBuffer(4)
+
+        for i in range(6):
+            buffer.append(100 + i, i)
+
+        times, values = buffer.window()
+
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(list(times), [102, 103, 104, 105])
+        self.assertEqual(list(values), [2, 3, 4, 5])
+
+        times, values = buffer.window(2, now=105)
+        self.assertEqual(list(values), [3, 4, 5])
+
+        buffer.extend([106, 107, 108], [6, 7, 8])
+        self.assertEqual(list(buffer.window()[1]), [5, 6, 7, 8])
+
+        buffer.extend(list(range(109, 115)), list(range(9, 15)))
+        self.assertEqual(list(buffer.window()[1]), [11, 12, 13, 14])
+
+    def test_aggregates(self):
+        """test_aggregates."""
+
+        store = StatsStore()
+        now = time.time()
+
+        for i in range(20):
+            store.append("rx_bytes", ("wtp1", 0), 1000 * i, now - 19 + i)
+
+        query = store.query
+
+        self.assertEqual(query("rx_bytes", ("wtp1", 0), "last"), 19000)
+        self.assertEqual(query("rx_bytes", ("wtp1", 0), "rate"), 1000)
+        self.assertEqual(query("rx_bytes", ("wtp1", 0), "mean", 4.5),
+                         17000)
+        self.assertAlmostEqual(query("rx_bytes", ("wtp1", 0), "p95"),
+                               18050)
+        self.assertIsNone(query("rx_bytes", ("wtp2", 0)))
+        self.assertRaises(ValueError, query, "rx_bytes", ("wtp1", 0), "avg")
+
+        store.append("rssi", ("sta1",), -60, now - 1)
+        store.append("rssi", ("sta1",), -50, now)
+
+        # 0.7 * -60 + 0.3 * -50
+        self.assertAlmostEqual(query("rssi", ("sta1",), "ewma"), -57)
+
+    def test_downsample(self):
+        """test_downsample."""
+
+        store = StatsStore()
+        now = time.time()
+
+        for i in range(10):
+            store.append("rssi", ("sta1",), i, now - 9.5 + i)
+
+        points = store.downsample("rssi", ("sta1",), 10, 2)
+
+        self.assertEqual([x[1] for x in points], [2, 7])
+        self.assertEqual(store.downsample("rssi", ("sta2",), 10, 2), [])
+
+    def test_full(self):
+        """test_full."""
+
+        store = StatsStore(size=4, max_series=2)
+
+        store.append("rssi", ("sta1",), -60)
+        store.append("rssi", ("sta2",), -60)
+        store.append("rssi", ("sta1",), -60)
+        store.append("rssi", ("sta3",), -60)
+
+        self.assertEqual(store.entities("rssi"), [("sta1",), ("sta2",)])
+        self.assertEqual(store.to_dict()["rejected"], 1)
+
+        store.remove("rssi", ("sta2",))
+        store.append("rssi", ("sta3",), -60)
+
+        self.assertEqual(store.entities("rssi"), [("sta1",), ("sta3",)])
+
+    def test_rotation(self):
+        """test_rotation."""
+
+        store = StatsStore(size=8, max_series=100)
+        now = time.time()
+
+        # more entities than max_series, all updated every round
+        for i in range(5):
+            for sta in range(150):
+                store.append("ucqm.mov_rssi", ("wtp1", 0, sta), -60 - i,
+                             now - 5 + i)
+
+        self.assertEqual(len(store.series), 100)
+        self.assertEqual(store.rejected, 250)
+        self.assertTrue(all(len(x) == 5 for x in store.series.values()))
+        self.assertEqual(store.query("ucqm.mov_rssi", ("wtp1", 0, 0),
+                                     "mean"), -62)
+
+    def test_remove_entities(self):
+        """test_remove_entities."""
+
+        store = StatsStore()
+
+        store.append("ucqm.mov_rssi", ("wtp1", 0, "sta1"), -60)
+        store.append("ucqm.mov_rssi", ("wtp2", 0, "sta1"), -60)
+        store.append("ucqm.mov_rssi", ("wtp1", 0, "sta2"), -60)
+        store.append("rc.prob", ("sta1", 6.0), 90)
+        store.append("rc.cur_tp", ("sta1", 6.0), 5)
+
+        store.remove_entities("sta1", ("rc.prob",))
+
+        self.assertEqual(store.entities("rc.prob"), [])
+        self.assertEqual(store.entities("rc.cur_tp"), [("sta1", 6.0)])
+
+        store.remove_entities("sta1")
+
+        self.assertEqual(store.entities("ucqm.mov_rssi"),
+                         [("wtp1", 0, "sta2")])
+
+        store.remove_entities("wtp1")
+
+        self.assertFalse(store.series)
+        self.assertFalse(store.elements)
+
+if __name__ == '__main__':
+    unittest.main()
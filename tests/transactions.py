@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Transactions tests."""
+
+import unittest
+
+from construct import Container
+
+from empower.managers.ranmanager.transactions import TransactionManager
+
+
+class Connection:
+    """Minimal connection."""
+
+    def __init__(self):
+
+        self.device = "device"
+        self.xids = {}
+
+
+class TestTransactions(unittest.TestCase):
+    """Transactions tests."""
+
+    def test_complete(self):
+        """test_complete."""
+
+        transactions = TransactionManager(str, timeout=1000, tick=100,
+                                          slots=4)
+        connection = Connection()
+
+        request = Container(xid=1)
+        transactions.add(connection, 0x10, request, None)
+
+        self.assertEqual(transactions.pending, 1)
+        self.assertIn(1, connection.xids)
+
+        txn = transactions.complete(connection, 1)
+
+        self.assertIs(txn.request, request)
+        self.assertEqual(transactions.pending, 0)
+        self.assertEqual(connection.xids, {})
+        self.assertEqual(transactions.histograms[0x10].count, 1)
+        self.assertIsNone(transactions.complete(connection, 1))
+
+        # completed transactions do not expire
+        for _ in range(0, 20):
+            transactions.advance()
+
+        self.assertEqual(transactions.histograms[0x10].timeouts, 0)
+
+    def test_expire(self):
+        """test_expire."""
+
+        transactions = TransactionManager(str, timeout=1000, tick=100,
+                                          slots=4)
+        connection = Connection()
+        expired = []
+
+        def on_timeout(request, device):
+            expired.append((request.xid, device))
+
+        transactions.add(connection, 0x10, Container(xid=1), None,
+                         on_timeout)
+        transactions.add(connection, 0x10, Container(xid=2), None,
+                         on_timeout, timeout=300)
+
+        for _ in range(0, 3):
+            transactions.advance()
+
+        self.assertEqual(expired, [(2, "device")])
+        self.assertEqual(list(connection.xids), [1])
+
+        for _ in range(0, 6):
+            transactions.advance()
+
+        self.assertEqual(len(expired), 1)
+
+        transactions.advance()
+
+        self.assertEqual(expired, [(2, "device"), (1, "device")])
+        self.assertEqual(connection.xids, {})
+        self.assertEqual(transactions.pending, 0)
+        self.assertEqual(transactions.histograms[0x10].timeouts, 2)
+
+        out = transactions.to_dict()
+        self.assertEqual(out["latency"]["16"].timeouts, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()